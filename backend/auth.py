@@ -24,12 +24,14 @@ Email жіберу үшін email_sender.py файлы қолданылады:
    - send_verification_email(email, code)
 """
 
+import time
 from datetime import datetime, timedelta, timezone
 
 from fastapi import HTTPException
 
-from database import supabase
+from database import get_supabase
 from email_sender import generate_code, send_verification_email
+from metrics import observe_db_call
 
 
 # ===================== Көмекші =====================
@@ -58,14 +60,18 @@ def _exec(query, ctx: str = ""):
     - Қате болса → Exception тастайды (try/except ұстаймыз)
     - Сәтті болса → res.data қайтарамыз
     """
+    start = time.perf_counter()
     try:
         res = query.execute()
     except Exception as e:
+        observe_db_call(ctx, time.perf_counter() - start, ok=False)
         raise HTTPException(
             status_code=500,
             detail=f"Supabase error{f' ({ctx})' if ctx else ''}: {e}",
         )
 
+    observe_db_call(ctx, time.perf_counter() - start, ok=True)
+
     data = getattr(res, "data", None)
     if data is None and isinstance(res, dict):
         data = res.get("data")
@@ -107,7 +113,7 @@ def register_user(payload):
 
     # 1) Осындай email/username бар ма?
     existing = _exec(
-        supabase.table("users")
+        get_supabase().table("users")
         .select("id,is_verified")
         .or_(f"email.eq.{email},username.eq.{username}"),
         ctx="check existing user",
@@ -129,7 +135,7 @@ def register_user(payload):
         user_id = user["id"]
 
         _exec(
-            supabase.table("verification_codes")
+            get_supabase().table("verification_codes")
             .delete()
             .eq("user_id", user_id),
             ctx="cleanup old codes (register existing)",
@@ -139,7 +145,7 @@ def register_user(payload):
         exp = _now_utc() + timedelta(minutes=10)
 
         _exec(
-            supabase.table("verification_codes").insert(
+            get_supabase().table("verification_codes").insert(
                 {
                     "user_id": user_id,
                     "code": code,
@@ -162,7 +168,7 @@ def register_user(payload):
     hashed = _hash_pw(password)
 
     ins = _exec(
-        supabase.table("users").insert(
+        get_supabase().table("users").insert(
             {
                 "email": email,
                 "username": username,
@@ -187,7 +193,7 @@ def register_user(payload):
     exp = _now_utc() + timedelta(minutes=10)
 
     _exec(
-        supabase.table("verification_codes").insert(
+        get_supabase().table("verification_codes").insert(
             {
                 "user_id": user_id,
                 "code": code,
@@ -224,7 +230,7 @@ def verify_user(payload):
 
     # Қолданушыны табу
     users = _exec(
-        supabase.table("users")
+        get_supabase().table("users")
         .select("id,is_verified")
         .eq("email", email),
         ctx="find user (verify)",
@@ -238,7 +244,7 @@ def verify_user(payload):
 
     # Кодты табу
     records = _exec(
-        supabase.table("verification_codes")
+        get_supabase().table("verification_codes")
         .select("*")
         .eq("user_id", user_id)
         .eq("code", code)
@@ -266,7 +272,7 @@ def verify_user(payload):
 
     # User-ді verified қыламыз
     _exec(
-        supabase.table("users")
+        get_supabase().table("users")
         .update({"is_verified": True})
         .eq("id", user_id),
         ctx="set user verified",
@@ -274,7 +280,7 @@ def verify_user(payload):
 
     # Қаласаң, қолданылған кодтарды өшіруге болады:
     # _exec(
-    #     supabase.table("verification_codes").delete().eq("user_id", user_id),
+    #     get_supabase().table("verification_codes").delete().eq("user_id", user_id),
     #     ctx="cleanup codes after verify",
     # )
 
@@ -293,7 +299,7 @@ def resend_verification_code(payload):
         raise HTTPException(status_code=400, detail="Email бос.")
 
     users = _exec(
-        supabase.table("users")
+        get_supabase().table("users")
         .select("id,is_verified")
         .eq("email", email),
         ctx="find user (resend)",
@@ -313,7 +319,7 @@ def resend_verification_code(payload):
 
     # Ескі кодтарды өшіру
     _exec(
-        supabase.table("verification_codes")
+        get_supabase().table("verification_codes")
         .delete()
         .eq("user_id", user_id),
         ctx="cleanup old codes (resend)",
@@ -324,7 +330,7 @@ def resend_verification_code(payload):
     exp = _now_utc() + timedelta(minutes=10)
 
     _exec(
-        supabase.table("verification_codes").insert(
+        get_supabase().table("verification_codes").insert(
             {
                 "user_id": user_id,
                 "code": code,
@@ -357,7 +363,7 @@ def login_user(payload):
         raise HTTPException(status_code=400, detail="Логин немесе пароль бос.")
 
     users = _exec(
-        supabase.table("users")
+        get_supabase().table("users")
         .select("id,email,username,hashed_password,is_verified")
         .eq("username", username)
         .limit(1),
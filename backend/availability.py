@@ -0,0 +1,210 @@
+# availability.py
+# Email / username бос па — тіркелу формасында теру кезінде тексеру.
+#
+# Бар email-дер мен username-дер Bloom filter-де ұсталады:
+#   - filter "жоқ" десе — нақты жоқ, дерекқорға бармаймыз;
+#   - "мүмкін бар" десе (нақты бар немесе ~1% жалған оң) — дерекқордан тексереміз.
+# Filter іске қосылғанда фондық ағында толтырылады (дайын болғанша әр тексеру
+# дерекқорға барады), тіркелу/профиль өзгергенде толықтырылады. Басқа
+# worker-лердің жазбалары (тіркелу де, update_profile-дағы username ауысуы
+# да) refresh_seconds сайын фондық ағында оқылады — курсор id емес,
+# delta_sync.py-дағы bump_sync_change триггері беретін change_seq:
+#
+#   alter table public.users add column change_seq bigint, add column changed_at timestamptz;
+#   create trigger users_sync_change before insert or update on public.users
+#     for each row execute function public.bump_sync_change();
+#   create index on public.users (change_seq);
+#   update public.users set id = id;  -- бар жолдарды толтыру
+#
+# Sequence мәні commit ретімен берілмейді, сондықтан соңғы SETTLE_SECONDS
+# ішінде өзгерген жолдар келесі refresh-те қайта оқылады (Bloom-ға қайта
+# қосу зиянсыз). rebuild_seconds сайын толық қайта құрылады (Bloom-нан
+# өшіру мүмкін емес, көлем өскенде де қайта өлшенеді).
+#
+# Нәтиже тек кеңес: тіркелудің өзі (auth.register_user) дерекқорда тексереді.
+
+from __future__ import annotations
+
+import hashlib
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from database import get_supabase
+from repository import supabase_exec
+
+PAGE_SIZE = 1000  # PostgREST max-rows әдепкі шегі
+SETTLE_SECONDS = float(os.getenv("EASY_SYNC_SETTLE_SECONDS", "30"))
+
+
+def normalize_email(email: str) -> str:
+    # auth.register_user-мен бірдей
+    return (email or "").strip().lower()
+
+
+def normalize_username(username: str) -> str:
+    return (username or "").strip()
+
+
+class BloomFilter:
+    """m бит, k хэш (blake2b-дан double hashing). Тек қосу және тексеру."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(1, capacity)
+        self.size = max(64, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> Iterable[int]:
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class IdentityFilter:
+    """users кестесіндегі email / username үшін екі Bloom filter."""
+
+    def __init__(
+        self,
+        loader: Optional[Callable[[int], List[Dict[str, Any]]]] = None,
+        refresh_seconds: float = 30.0,
+        rebuild_seconds: float = 3600.0,
+        error_rate: float = 0.01,
+    ):
+        self.loader = loader or load_users_changed
+        self.refresh_seconds = refresh_seconds
+        self.rebuild_seconds = rebuild_seconds
+        self.error_rate = error_rate
+        self._emails: Optional[BloomFilter] = None
+        self._usernames: Optional[BloomFilter] = None
+        self._last_seq = 0
+        self._built_at = 0.0
+        self._refreshed_at = 0.0
+        self._lock = threading.Lock()
+        self._loading = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self._emails is not None
+
+    def _add_rows(self, rows: Iterable[Dict[str, Any]]) -> None:
+        for row in rows:
+            if row.get("email"):
+                self._emails.add(normalize_email(row["email"]))
+            if row.get("username"):
+                self._usernames.add(normalize_username(row["username"]))
+
+    def _advance(self, rows: List[Dict[str, Any]]) -> None:
+        """Курсор тек SETTLE_SECONDS-тан ескі жолдарға дейін жылжиды."""
+        settled = datetime.now(timezone.utc) - timedelta(seconds=SETTLE_SECONDS)
+        for row in rows:
+            seq = int(row.get("change_seq") or 0)
+            if seq > self._last_seq and _changed_before(row.get("changed_at"), settled):
+                self._last_seq = seq
+
+    def rebuild(self) -> None:
+        """Толық құру; көлем бар қолданушы санының екі еселенуіне есептеледі."""
+        with self._loading:
+            rows = self.loader(0)
+            capacity = 2 * len(rows) + 10_000
+            emails = BloomFilter(capacity, self.error_rate)
+            usernames = BloomFilter(capacity, self.error_rate)
+            with self._lock:
+                self._emails, self._usernames, self._last_seq = emails, usernames, 0
+                self._add_rows(rows)
+                self._advance(rows)
+                self._built_at = self._refreshed_at = time.monotonic()
+
+    def refresh(self) -> None:
+        """change_seq > курсор жолдарын қосу (жаңа қолданушы не жаңа username)."""
+        with self._loading:
+            rows = self.loader(self._last_seq)
+            with self._lock:
+                self._add_rows(rows)
+                self._advance(rows)
+                self._refreshed_at = time.monotonic()
+
+    def _spawn(self, target: Callable[[], None], what: str) -> None:
+        def run():
+            try:
+                target()
+            except Exception as e:
+                print(f"[availability] {what} failed: {e}")
+
+        threading.Thread(target=run, name="easy-identity-filter", daemon=True).start()
+
+    def warm_async(self) -> None:
+        self._spawn(self.rebuild, "warm-up")
+
+    def _maybe_refresh(self) -> None:
+        # Сұраныс жолында тек уақытты тексереміз; оқу фондық ағында
+        now = time.monotonic()
+        if now - self._built_at >= self.rebuild_seconds:
+            self._built_at = now  # бір ғана фондық қайта құру
+            self.warm_async()
+        elif now - self._refreshed_at >= self.refresh_seconds:
+            self._refreshed_at = now  # бір ғана фондық refresh
+            self._spawn(self.refresh, "refresh")
+
+    def add(self, email: Optional[str] = None, username: Optional[str] = None) -> None:
+        if not self.ready:
+            return
+        with self._lock:
+            self._add_rows([{"email": email, "username": username}])
+
+    def may_contain_email(self, email: str) -> bool:
+        """False → нақты жоқ; True → дерекқордан тексеру керек (дайын емес болса да)."""
+        if not self.ready:
+            return True
+        self._maybe_refresh()
+        return normalize_email(email) in self._emails
+
+    def may_contain_username(self, username: str) -> bool:
+        if not self.ready:
+            return True
+        self._maybe_refresh()
+        return normalize_username(username) in self._usernames
+
+
+def _changed_before(value: Optional[str], settled: datetime) -> bool:
+    if not value:
+        return True  # триггерге дейінгі жол — қайта өзгермейді
+    at = datetime.fromisoformat(value)
+    if at.tzinfo is None:
+        at = at.replace(tzinfo=timezone.utc)
+    return at < settled
+
+
+def load_users_changed(last_seq: int) -> List[Dict[str, Any]]:
+    out: List[Dict[str, Any]] = []
+    while True:
+        page = supabase_exec(
+            get_supabase().table("users")
+            .select("email,username,change_seq,changed_at")
+            .gt("change_seq", last_seq)
+            .order("change_seq", desc=False)
+            .limit(PAGE_SIZE),
+            ctx="load_identity_filter",
+        )
+        out.extend(page)
+        if len(page) < PAGE_SIZE:
+            return out
+        last_seq = page[-1]["change_seq"]
+
+
+identity_filter = IdentityFilter()
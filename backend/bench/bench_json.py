@@ -0,0 +1,74 @@
+# bench/bench_json.py
+"""
+5k сұрақты тақырып үшін JSON сериализация құнын салыстыру:
+  fastapi  — jsonable_encoder + stdlib json (FastAPI JSONResponse әдепкі жолы)
+  fast     — fast_json.dumps (orjson болса orjson), encoder-сіз
+  snapshot — quiz_list_snapshots кэшіндегі дайын байттар
+
+Қолдану (backend/ ішінен):
+    python bench/bench_json.py --quizzes 5000 --repeat 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+import fast_json  # noqa: E402
+from fast_json import FastJSONResponse, RawJSONResponse  # noqa: E402
+
+
+def _make_topic(n: int) -> list:
+    return [
+        {
+            "id": i + 1,
+            "question": f"{i + 1}) Қазақстанның астанасы қай қала? ({i})",
+            "options": [f"{l}) Нұсқа {l} — {i}" for l in "ABCD"],
+            "correct_answer": f"A) Нұсқа A — {i}",
+            "created_at": "2026-01-01T00:00:00.000000+00:00",
+            "is_active": True,
+        }
+        for i in range(n)
+    ]
+
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--quizzes", type=int, default=5000)
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    rows = _make_topic(args.quizzes)
+    cached = fast_json.dumps(rows)
+
+    results = {
+        "fastapi (encoder + json)": _best(lambda: JSONResponse(jsonable_encoder(rows)), args.repeat),
+        "FastJSONResponse": _best(lambda: FastJSONResponse(rows), args.repeat),
+        "RawJSONResponse (snapshot)": _best(lambda: RawJSONResponse(cached), args.repeat),
+    }
+
+    backend = "orjson" if fast_json.orjson is not None else "stdlib json"
+    print(f"quizzes={args.quizzes} payload={len(cached) / 1024:.0f} KiB backend={backend}")
+    base = results["fastapi (encoder + json)"]
+    for name, t in results.items():
+        print(f"  {name:28s} {t * 1e3:9.3f} ms  x{base / t if t else float('inf'):.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+# bench/bench_line_scan.py
+"""
+DOCX жолдарын жіктеудің CPU құны (docx2python-сыз, тек мәтін жолдары):
+  multipass   — бұрынғы тәсіл: әр кезең жолдарды өз regex-терімен қайта сканерлейді
+                (ANSWER_PAIR_RE.findall, ANSWER_LINE_RE, QUESTION/OPTION_LINE_RE, тағы findall)
+  single      — parser_engine._scan_lines: әр жол бір рет белгіленіп, үш кезеңге ортақ;
+                жауап жұптары тек құйрықта (жауаптар блогында) қайта оқылады
+
+Екі тәсілдің нәтижесі бірдей екені әр өлшемде тексеріледі.
+
+Қолдану (backend/ ішінен):
+    python bench/bench_line_scan.py --lines 10000 --repeat 20
+    python bench/bench_line_scan.py --answers inline
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import parser_engine  # noqa: E402
+from docx_corpus import make_questions  # noqa: E402
+
+QUESTION_LINE_RE = parser_engine.QUESTION_LINE_RE
+OPTION_LINE_RE = parser_engine.OPTION_LINE_RE
+ANSWER_PAIR_RE = parser_engine.ANSWER_PAIR_RE
+ANSWER_LINE_RE = parser_engine.ANSWER_LINE_RE
+
+
+# ---- бұрынғы көп өтулі нұсқа (салыстыру үшін өзгертусіз) ----
+def _mp_detect_answer_start_index(lines: List[str]) -> int:
+    n = len(lines)
+    for i, line in enumerate(lines):
+        if len(ANSWER_PAIR_RE.findall(line)) >= 2:
+            return i
+    run_start = None
+    for i, line in enumerate(lines):
+        if ANSWER_LINE_RE.match(line):
+            if run_start is None:
+                run_start = i
+        else:
+            if run_start is not None:
+                if i - run_start >= 2:
+                    return run_start
+                run_start = None
+    if run_start is not None and n - run_start >= 2:
+        return run_start
+    return n
+
+
+def _mp_parse_questions(lines: List[str], end: int) -> List[Dict[str, Any]]:
+    questions: List[Dict[str, Any]] = []
+    current: Optional[Dict[str, Any]] = None
+    for line in lines[:end]:
+        mq = QUESTION_LINE_RE.match(line)
+        mo = OPTION_LINE_RE.match(line)
+        if mq:
+            num = int(mq.group(1))
+            rest = mq.group(2).strip()
+            if len(rest) == 1 and rest.upper() in "ABCD":
+                continue
+            if current:
+                questions.append(current)
+            current = {"number": num, "question": rest, "options": [], "answer_index": None}
+        elif current and mo:
+            letter, txt = mo.groups()
+            current["options"].append(f"{letter}) {txt.strip()}")
+        elif current:
+            extra = line.strip()
+            if not extra:
+                continue
+            if current["options"]:
+                current["options"][-1] += " " + extra
+            else:
+                current["question"] += " " + extra
+    if current:
+        questions.append(current)
+    cleaned = []
+    for q in questions:
+        opts = [o for o in q["options"] if o.strip()]
+        if q["question"] and len(opts) >= 2:
+            q["options"] = opts
+            cleaned.append(q)
+    return cleaned
+
+
+def _mp_parse_answers(lines: List[str], start: int, max_q: int) -> Dict[int, str]:
+    answers: Dict[int, str] = {}
+    for line in lines[start:]:
+        for num_str, letter in ANSWER_PAIR_RE.findall(line):
+            num = int(num_str)
+            if 1 <= num <= max_q:
+                answers[num] = letter.upper()
+    return answers
+
+
+def run_multipass(lines: List[str]):
+    start = _mp_detect_answer_start_index(lines)
+    questions = _mp_parse_questions(lines, start)
+    max_q = max((q["number"] for q in questions), default=0)
+    return questions, _mp_parse_answers(lines, start, max_q)
+
+
+def run_single(lines: List[str]):
+    content = parser_engine.DocxContent(lines=lines)
+    questions = parser_engine._parse_lines(content)
+    max_q = max((q["number"] for q in questions), default=0)
+    return questions, content.answers(max_q)
+
+
+# ---- деректер ----
+def make_lines(n_lines: int, answers: str) -> List[str]:
+    """_extract_lines_from_body шығаратындай жолдар: сұрақ + 4 нұсқа + жауаптар блогы."""
+    n_questions = max(1, n_lines // 5)
+    lines: List[str] = []
+    qs = make_questions(n_questions, seed=3)
+    for q in qs:
+        lines.append(f"{q['number']}) {q['question']}")
+        lines.extend(f"{l}) {o}" for l, o in zip(q["labels"], q["options"]))
+    pairs = [f"{q['number']}){q['labels'][q['answer_index']]}" for q in qs]
+    if answers == "inline":
+        lines.extend(" ".join(pairs[i:i + 10]) for i in range(0, len(pairs), 10))
+    else:
+        lines.extend(pairs)  # кесте ұяшықтары да жеке жол болып шығады
+    return lines
+
+
+def _best(fn, lines: List[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(lines)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main_cli() -> None:
+    ap = argparse.ArgumentParser(description="Жол жіктеуіш бенчмаркы")
+    ap.add_argument("--lines", type=int, default=10000)
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--answers", choices=("vertical", "inline"), default="vertical")
+    args = ap.parse_args()
+
+    lines = make_lines(args.lines, args.answers)
+    if run_multipass(lines) != run_single(lines):
+        raise SystemExit("нәтижелер сәйкес емес")
+
+    mp = _best(run_multipass, lines, args.repeat)
+    single = _best(run_single, lines, args.repeat)
+    print(f"lines={len(lines)} answers={args.answers} best of {args.repeat}")
+    print(f"{'multipass':10s} {mp * 1e3:9.2f} ms")
+    print(f"{'single':10s} {single * 1e3:9.2f} ms   x{mp / single:.2f}")
+
+
+if __name__ == "__main__":
+    main_cli()
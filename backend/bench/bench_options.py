@@ -0,0 +1,90 @@
+# bench/bench_options.py
+"""
+list_quizzes оқу жолының CPU құнын салыстыру:
+  legacy      — әр жолда json.loads / ";" бойынша бөлу (migrate_options-қа дейін)
+  passthrough — options онсыз да list, жолдар өзгертусіз қайтарылады
+
+Қолдану (backend/ ішінен):
+    python bench/bench_options.py --rows 5000 --repeat 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from migrate_options import decode_legacy_options  # noqa: E402
+
+
+def _make_rows(n: int, legacy: bool) -> list:
+    rows = []
+    for i in range(n):
+        opts = [f"{l}) Нұсқа {i}-{l}" for l in "ABCD"]
+        rows.append(
+            {
+                "id": i + 1,
+                "question": f"{i + 1}) Сұрақ мәтіні {i}",
+                "options": json.dumps(opts, ensure_ascii=False) if legacy else opts,
+                "correct_answer": opts[0],
+                "created_at": "2026-01-01T00:00:00+00:00",
+                "is_active": True,
+            }
+        )
+    return rows
+
+
+def _legacy_read(rows: list) -> list:
+    result = []
+    for q in rows:
+        opts = decode_legacy_options(q.get("options"))
+        result.append(
+            {
+                "id": q["id"],
+                "question": q["question"],
+                "options": q["options"] if opts is None else opts,
+                "correct_answer": q.get("correct_answer"),
+                "created_at": q.get("created_at"),
+                "is_active": q.get("is_active", True),
+            }
+        )
+    return result
+
+
+def _passthrough_read(rows: list) -> list:
+    return rows
+
+
+def _time(fn, rows, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(rows)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=5000)
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    legacy_rows = _make_rows(args.rows, legacy=True)
+    json_rows = _make_rows(args.rows, legacy=False)
+
+    t_legacy = _time(_legacy_read, legacy_rows, args.repeat)
+    t_pass = _time(_passthrough_read, json_rows, args.repeat)
+
+    print(f"rows={args.rows} (best of {args.repeat})")
+    print(f"  legacy decode : {t_legacy * 1e3:8.3f} ms  ({t_legacy / args.rows * 1e6:.3f} µs/row)")
+    print(f"  passthrough   : {t_pass * 1e3:8.3f} ms  ({t_pass / args.rows * 1e6:.3f} µs/row)")
+    print(f"  saved per row : {(t_legacy - t_pass) / args.rows * 1e6:.3f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# bench/bench_parsers.py
+"""
+DOCX парсерлерінің жылдамдығы, жады және дәлдігі — макет бойынша.
+
+Әр (парсер, макет) жұбы жаңа процесте өлшенеді, сондықтан peak RSS
+бір-біріне араласпайды.
+  pages/s   — бетке ~QUESTIONS_PER_PAGE сұрақ деп есептегенде
+  rss MiB   — процестің ең үлкен RSS-і (импорттан кейінгі өсімі жақшада)
+  found     — мәтіні дұрыс табылған сұрақтар үлесі
+  answers   — answer_index дұрыс анықталған сұрақтар үлесі
+
+Қолдану (backend/ ішінен):
+    python bench/bench_parsers.py --questions 500 --repeat 3
+    python bench/bench_parsers.py --parsers engine,blocks --layouts block,cyrillic
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from docx_corpus import LAYOUTS, write_layout_docx  # noqa: E402
+
+QUESTIONS_PER_PAGE = 8
+
+# атау → (модуль, функция, kwargs); функция (path, **kwargs) → [{"question", "options", "answer_index"}, ...]
+PARSERS: Dict[str, Tuple[str, str, Dict[str, str]]] = {
+    "engine": ("parser_engine", "parse_docx", {}),
+    "lines": ("parser_engine", "parse_docx", {"strategy": "lines"}),
+    "table": ("parser_engine", "parse_docx", {"strategy": "table"}),
+    "blocks": ("parser_engine", "parse_docx", {"strategy": "blocks"}),
+}
+
+
+def score(parsed: List[dict], truth: List[dict]) -> Tuple[float, float]:
+    """(found, answers) үлестері — нөмір реті бойынша салыстыру."""
+    if not truth:
+        return 0.0, 0.0
+    found = answers = 0
+    for got, expected in zip(parsed, truth):
+        if (got.get("question") or "").strip() == expected["question"]:
+            found += 1
+            if got.get("answer_index") == expected["answer_index"]:
+                answers += 1
+    return found / len(truth), answers / len(truth)
+
+
+def _worker(args: argparse.Namespace) -> None:
+    import importlib
+    import resource
+    import time
+
+    module_name, func_name, kwargs = PARSERS[args.worker_parser]
+    parse = getattr(importlib.import_module(module_name), func_name)
+    with open(args.worker_truth, encoding="utf-8") as fh:
+        truth = json.load(fh)
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    best = float("inf")
+    parsed: List[dict] = []
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        parsed = parse(args.worker_path, **kwargs)
+        best = min(best, time.perf_counter() - t0)
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    found, answers = score(parsed, truth)
+    print(
+        json.dumps(
+            {
+                "seconds": best,
+                "rss_kib": rss_after,
+                "rss_delta_kib": rss_after - rss_before,
+                "found": found,
+                "answers": answers,
+            }
+        )
+    )
+
+
+def _measure(parser: str, path: str, truth_path: str, repeat: int) -> dict:
+    env = dict(os.environ)
+    env.setdefault("EASY_SECRET_KEY", "bench-secret")
+    out = subprocess.run(
+        [
+            sys.executable, os.path.abspath(__file__),
+            "--worker-parser", parser,
+            "--worker-path", path,
+            "--worker-truth", truth_path,
+            "--repeat", str(repeat),
+        ],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="DOCX парсер бенчмаркы")
+    ap.add_argument("--questions", type=int, default=500)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--parsers", default=",".join(PARSERS))
+    ap.add_argument("--layouts", default="all")
+    ap.add_argument("--worker-parser", help=argparse.SUPPRESS)
+    ap.add_argument("--worker-path", help=argparse.SUPPRESS)
+    ap.add_argument("--worker-truth", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.worker_parser:
+        _worker(args)
+        return
+
+    layouts = list(LAYOUTS) if args.layouts == "all" else args.layouts.split(",")
+    parsers = args.parsers.split(",")
+    pages = args.questions / QUESTIONS_PER_PAGE
+    tmpdir = tempfile.mkdtemp(prefix="easy-parsers-")
+
+    print(f"questions={args.questions} (~{pages:.0f} pages), best of {args.repeat}")
+    header = f"{'parser':8s} {'layout':15s} {'ms':>9s} {'pages/s':>9s} {'rss MiB':>14s} {'found':>7s} {'answers':>8s}"
+    print(header)
+    print("-" * len(header))
+
+    for layout in layouts:
+        path = os.path.join(tmpdir, f"{layout}.docx")
+        truth = write_layout_docx(path, layout, args.questions, seed=42)
+        truth_path = path + ".json"
+        with open(truth_path, "w", encoding="utf-8") as fh:
+            json.dump(truth, fh, ensure_ascii=False)
+
+        for parser in parsers:
+            r = _measure(parser, path, truth_path, args.repeat)
+            rss = f"{r['rss_kib'] / 1024:.0f} (+{r['rss_delta_kib'] / 1024:.0f})"
+            print(
+                f"{parser:8s} {layout:15s} {r['seconds'] * 1e3:9.1f} {pages / r['seconds']:9.1f} "
+                f"{rss:>14s} {r['found']:7.0%} {r['answers']:8.0%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# bench/bench_startup.py
+"""
+Cold start өлшеу: әр қайталау жаңа Python процесінде жүреді.
+  import    — `import main` уақыты
+  first req — алғашқы GET / сұранысы (ASGI, желісіз)
+  modules   — импорттан кейін жүктелген ауыр модульдер
+
+Қолдану (backend/ ішінен):
+    python bench/bench_startup.py --runs 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ("supabase", "sqlalchemy", "docx2python", "jose")
+
+_CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+loaded = [m for m in %(heavy)r if m in sys.modules]
+
+from fastapi.testclient import TestClient
+client = TestClient(main.app)
+t2 = time.perf_counter()
+client.get("/")
+t3 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "first_request": t3 - t2, "loaded": loaded}))
+"""
+
+
+def _run_once() -> dict:
+    env = dict(os.environ)
+    # Кейбір айнымалылар импорт кезінде тексеріледі — бенчмарк үшін жалған мән жеткілікті
+    env.setdefault("EASY_SECRET_KEY", "bench-secret")
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    out = subprocess.run(
+        [sys.executable, "-c", _CHILD % {"heavy": HEAVY_MODULES}],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=5)
+    args = ap.parse_args()
+
+    results = [_run_once() for _ in range(args.runs)]
+    imports = [r["import"] * 1e3 for r in results]
+    firsts = [r["first_request"] * 1e3 for r in results]
+
+    print(f"runs={args.runs}")
+    print(f"  import main   : median {statistics.median(imports):8.1f} ms  (min {min(imports):.1f})")
+    print(f"  first request : median {statistics.median(firsts):8.1f} ms  (min {min(firsts):.1f})")
+    print(f"  heavy modules loaded at import: {results[-1]['loaded'] or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
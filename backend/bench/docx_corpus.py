@@ -0,0 +1,216 @@
+# bench/docx_corpus.py
+"""
+Бенчмарк үшін синтетикалық DOCX файлдарын жасау (тек stdlib: zipfile).
+
+Макеттер (LAYOUTS) — парсер regex-тері күтетін барлық пішімдер:
+  lines_table     "1) Сұрақ" / "A) нұсқа" абзацтары + соңында "1)A" кестесі
+  lines_inline    сол абзацтар + соңында "1)A 2)B 3)C ..." жолдары
+  lines_vertical  сол абзацтар + соңында әр жолда бір "1)A"
+  block           бір абзацта "1) Сұрақ A) .. B) .. C) .. D) .."
+  numbered_dot    "1. Сұрақ" нөмірлеуі, бір абзацта нұсқалар
+  cyrillic        "А) Ә) Б) В)" (кирилл/қазақ) белгілері, "1)А" кестесі
+  table           кесте: "№ | Сұрақ | A | B | C | D | Жауап" қатарлары
+
+write_layout_docx(path, layout, n) файлды жазып, ground truth қайтарады.
+
+CLI (backend/ ішінен):
+    python bench/docx_corpus.py --out /tmp/corpus --sizes 100,1000 --layouts all
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import zipfile
+from typing import Callable, Dict, List, Sequence, Tuple, Union
+from xml.sax.saxutils import escape
+
+Block = Union[Tuple[str, str], Tuple[str, List[List[str]]]]
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    "</Types>"
+)
+
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    "</Relationships>"
+)
+
+_DOC_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships"/>'
+)
+
+_W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+
+def _paragraph(text: str) -> str:
+    return f'<w:p><w:r><w:t xml:space="preserve">{escape(text)}</w:t></w:r></w:p>'
+
+
+def _table(rows: Sequence[Sequence[str]]) -> str:
+    out = ["<w:tbl>"]
+    for row in rows:
+        out.append("<w:tr>")
+        for cell in row:
+            out.append(f"<w:tc>{_paragraph(cell)}</w:tc>")
+        out.append("</w:tr>")
+    out.append("</w:tbl>")
+    return "".join(out)
+
+
+def write_docx(path: str, blocks: Sequence[Block]) -> None:
+    """blocks: ("p", мәтін) немесе ("table", [[ұяшық, ...], ...])."""
+    body = []
+    for kind, value in blocks:
+        if kind == "p":
+            body.append(_paragraph(value))  # type: ignore[arg-type]
+        elif kind == "table":
+            body.append(_table(value))  # type: ignore[arg-type]
+        else:
+            raise ValueError(f"unknown block kind: {kind}")
+
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        f'<w:document xmlns:w="{_W_NS}" xmlns:r="{_R_NS}"><w:body>{"".join(body)}</w:body></w:document>'
+    )
+
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        zf.writestr("_rels/.rels", _ROOT_RELS)
+        zf.writestr("word/_rels/document.xml.rels", _DOC_RELS)
+        zf.writestr("word/document.xml", document)
+
+
+def make_questions(n: int, seed: int = 0, labels: str = "ABCD") -> List[dict]:
+    """Сұрақтар мен дұрыс жауап белгілері (ground truth)."""
+    rng = random.Random(seed)
+    questions = []
+    for i in range(1, n + 1):
+        answer = rng.randrange(len(labels))
+        questions.append(
+            {
+                "number": i,
+                "question": f"Сұрақ №{i}: {rng.randint(10, 99)} санының қасиеті қандай?",
+                "options": [f"Нұсқа {l}{i} мәтіні" for l in labels],
+                "labels": labels,
+                "answer_index": answer,
+            }
+        )
+    return questions
+
+
+def _question_paragraphs(questions: List[dict]) -> List[Block]:
+    blocks: List[Block] = []
+    for q in questions:
+        blocks.append(("p", f"{q['number']}) {q['question']}"))
+        for label, opt in zip(q["labels"], q["options"]):
+            blocks.append(("p", f"{label}) {opt}"))
+    return blocks
+
+
+def _answer_pairs(questions: List[dict]) -> List[str]:
+    return [f"{q['number']}){q['labels'][q['answer_index']]}" for q in questions]
+
+
+def _layout_lines_table(questions: List[dict]) -> List[Block]:
+    pairs = _answer_pairs(questions)
+    return _question_paragraphs(questions) + [
+        ("table", [pairs[i:i + 5] for i in range(0, len(pairs), 5)])
+    ]
+
+
+def _layout_lines_inline(questions: List[dict]) -> List[Block]:
+    pairs = _answer_pairs(questions)
+    return _question_paragraphs(questions) + [
+        ("p", " ".join(pairs[i:i + 10])) for i in range(0, len(pairs), 10)
+    ]
+
+
+def _layout_lines_vertical(questions: List[dict]) -> List[Block]:
+    return _question_paragraphs(questions) + [("p", pair) for pair in _answer_pairs(questions)]
+
+
+def _inline_block(q: dict, sep: str) -> str:
+    opts = " ".join(f"{label}) {opt}" for label, opt in zip(q["labels"], q["options"]))
+    return f"{q['number']}{sep} {q['question']} {opts}"
+
+
+def _layout_block(questions: List[dict]) -> List[Block]:
+    pairs = _answer_pairs(questions)
+    return [("p", _inline_block(q, ")")) for q in questions] + [
+        ("table", [pairs[i:i + 5] for i in range(0, len(pairs), 5)])
+    ]
+
+
+def _layout_numbered_dot(questions: List[dict]) -> List[Block]:
+    pairs = _answer_pairs(questions)
+    return [("p", _inline_block(q, ".")) for q in questions] + [
+        ("table", [pairs[i:i + 5] for i in range(0, len(pairs), 5)])
+    ]
+
+
+def _layout_table(questions: List[dict]) -> List[Block]:
+    header = ["№", "Сұрақ", *questions[0]["labels"], "Жауап"] if questions else []
+    rows = [
+        [str(q["number"]), q["question"], *q["options"], q["labels"][q["answer_index"]]]
+        for q in questions
+    ]
+    return [("table", [header] + rows)]
+
+
+LAYOUTS: Dict[str, Tuple[str, Callable[[List[dict]], List[Block]]]] = {
+    "lines_table": ("ABCD", _layout_lines_table),
+    "lines_inline": ("ABCD", _layout_lines_inline),
+    "lines_vertical": ("ABCD", _layout_lines_vertical),
+    "block": ("ABCD", _layout_block),
+    "numbered_dot": ("ABCD", _layout_numbered_dot),
+    "cyrillic": ("АӘБВ", _layout_lines_table),
+    "table": ("ABCD", _layout_table),
+}
+
+
+def write_layout_docx(path: str, layout: str, n_questions: int, seed: int = 0) -> List[dict]:
+    """layout макетіндегі n_questions сұрақты файлды жазып, ground truth қайтарады."""
+    labels, build = LAYOUTS[layout]
+    questions = make_questions(n_questions, seed=seed, labels=labels)
+    write_docx(path, build(questions))
+    return questions
+
+
+def write_exam_docx(path: str, n_questions: int, seed: int = 0) -> List[dict]:
+    """Негізгі макет: сұрақ/нұсқа абзацтары + соңында жауап кестесі."""
+    return write_layout_docx(path, "lines_table", n_questions, seed=seed)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Синтетикалық DOCX корпусы")
+    ap.add_argument("--out", required=True)
+    ap.add_argument("--sizes", default="100,500,2000")
+    ap.add_argument("--layouts", default="all")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    layouts = list(LAYOUTS) if args.layouts == "all" else args.layouts.split(",")
+    os.makedirs(args.out, exist_ok=True)
+    for layout in layouts:
+        for size in (int(x) for x in args.sizes.split(",")):
+            path = os.path.join(args.out, f"{layout}_{size}.docx")
+            write_layout_docx(path, layout, size, seed=args.seed)
+            print(path)
+
+
+if __name__ == "__main__":
+    main()
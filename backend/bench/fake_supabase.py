@@ -0,0 +1,304 @@
+# bench/fake_supabase.py
+"""
+supabase-py клиентінің жадтағы (in-memory) жалған нұсқасы.
+
+Тек Easy API қолданатын query-builder бөлігі бар:
+  table().select/insert/upsert/update/delete
+         .eq/neq/gt/gte/lt/lte/in_/or_/order/limit/range
+  select("..., rel(count)") — embedded санау (PostgREST агрегаты)
+  rpc(name, params) — rpc_handlers ішіндегі жадтағы функциялар
+         .execute()
+execute() әр шақыруда `latency_ms` (+ `jitter_ms`) күтеді — желі мен
+PostgREST уақытын имитациялайды. `calls` барлық execute() санын жинайды.
+"""
+
+from __future__ import annotations
+
+import copy
+import itertools
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+
+class FakeResponse:
+    def __init__(self, data: List[Dict[str, Any]]):
+        self.data = data
+        self.error = None
+
+
+def _cmp_key(value: Any):
+    return (value is None, value)
+
+
+class FakeQuery:
+    def __init__(self, client: "FakeSupabase", table: str):
+        self._client = client
+        self._table = table
+        self._op = "select"
+        self._columns = "*"
+        self._payload: Any = None
+        self._on_conflict: Optional[str] = None
+        self._filters: List[Callable[[Dict[str, Any]], bool]] = []
+        self._orders: List[tuple] = []
+        self._limit: Optional[int] = None
+        self._range: Optional[tuple] = None
+        # Coalescing/кэш кілттері үшін (postgrest сияқты) параметрлер тізімі
+        self.params: List[tuple] = []
+
+    # ---- операциялар ----
+    def select(self, columns: str = "*", **_: Any) -> "FakeQuery":
+        self._columns = columns
+        self.params.append(("select", columns))
+        return self
+
+    def insert(self, payload: Any, **_: Any) -> "FakeQuery":
+        self._op, self._payload = "insert", payload
+        return self
+
+    def upsert(self, payload: Any, on_conflict: Optional[str] = None, **_: Any) -> "FakeQuery":
+        self._op, self._payload, self._on_conflict = "upsert", payload, on_conflict
+        return self
+
+    def update(self, payload: Dict[str, Any]) -> "FakeQuery":
+        self._op, self._payload = "update", payload
+        return self
+
+    def delete(self) -> "FakeQuery":
+        self._op = "delete"
+        return self
+
+    # ---- фильтрлер ----
+    def _add(self, name: str, column: str, value: Any, fn: Callable[[Any], bool]) -> "FakeQuery":
+        self.params.append((name, column, repr(value)))
+        self._filters.append(lambda row: fn(row.get(column)))
+        return self
+
+    def eq(self, column: str, value: Any) -> "FakeQuery":
+        return self._add("eq", column, value, lambda v: v == value)
+
+    def neq(self, column: str, value: Any) -> "FakeQuery":
+        return self._add("neq", column, value, lambda v: v != value)
+
+    def gt(self, column: str, value: Any) -> "FakeQuery":
+        return self._add("gt", column, value, lambda v: v is not None and v > value)
+
+    def gte(self, column: str, value: Any) -> "FakeQuery":
+        return self._add("gte", column, value, lambda v: v is not None and v >= value)
+
+    def lt(self, column: str, value: Any) -> "FakeQuery":
+        return self._add("lt", column, value, lambda v: v is not None and v < value)
+
+    def lte(self, column: str, value: Any) -> "FakeQuery":
+        return self._add("lte", column, value, lambda v: v is not None and v <= value)
+
+    def in_(self, column: str, values: List[Any]) -> "FakeQuery":
+        allowed = set(values)
+        return self._add("in", column, sorted(allowed, key=repr), lambda v: v in allowed)
+
+    def or_(self, expr: str) -> "FakeQuery":
+        # Тек "col.eq.value,col2.eq.value2" түрі
+        parts = [p.split(".eq.", 1) for p in expr.split(",")]
+        self.params.append(("or", expr))
+        self._filters.append(lambda row: any(str(row.get(c)) == v for c, v in parts))
+        return self
+
+    def order(self, column: str, desc: bool = False) -> "FakeQuery":
+        self.params.append(("order", column, desc))
+        self._orders.append((column, desc))
+        return self
+
+    def limit(self, n: int) -> "FakeQuery":
+        self.params.append(("limit", n))
+        self._limit = n
+        return self
+
+    def range(self, start: int, end: int) -> "FakeQuery":
+        self.params.append(("range", start, end))
+        self._range = (start, end)
+        return self
+
+    # ---- орындау ----
+    def _matching(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        out = [r for r in rows if all(f(r) for f in self._filters)]
+        for column, desc in reversed(self._orders):
+            out.sort(key=lambda r: _cmp_key(r.get(column)), reverse=desc)
+        if self._range is not None:
+            out = out[self._range[0]: self._range[1] + 1]
+        if self._limit is not None:
+            out = out[: self._limit]
+        return out
+
+    def _project(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        if self._columns.strip() == "*":
+            return copy.deepcopy(row)
+        out: Dict[str, Any] = {}
+        for c in (c.strip() for c in self._columns.split(",")):
+            if c.endswith("(count)"):
+                # PostgREST embedded агрегаты: topics → quizzes(count) (fk = topic_id)
+                rel = c[: -len("(count)")]
+                fk = self._table[:-1] + "_id"
+                n = sum(1 for r in self._client.tables.get(rel, []) if r.get(fk) == row.get("id"))
+                out[rel] = [{"count": n}]
+            else:
+                out[c] = copy.deepcopy(row.get(c))
+        return out
+
+    def coalesce_key(self) -> Optional[tuple]:
+        """singleflight.query_key үшін: тек select біріктіріледі."""
+        if self._op != "select":
+            return None
+        return ("select", self._table, tuple(self.params))
+
+    def execute(self) -> FakeResponse:
+        self._client._before_execute()
+        with self._client._lock:
+            rows = self._client.tables.setdefault(self._table, [])
+
+            if self._op == "select":
+                return FakeResponse([self._project(r) for r in self._matching(rows)])
+
+            if self._op in ("insert", "upsert"):
+                items = self._payload if isinstance(self._payload, list) else [self._payload]
+                keys = [k.strip() for k in (self._on_conflict or "").split(",") if k.strip()]
+                out = []
+                for item in items:
+                    item = dict(item)
+                    if self._op == "upsert" and keys:
+                        existing = next(
+                            (r for r in rows if all(r.get(k) == item.get(k) for k in keys)),
+                            None,
+                        )
+                        if existing is not None:
+                            existing.update(item)
+                            out.append(copy.deepcopy(existing))
+                            continue
+                    item.setdefault("id", next(self._client._ids))
+                    item.setdefault("created_at", datetime.now(timezone.utc).isoformat())
+                    rows.append(item)
+                    out.append(copy.deepcopy(item))
+                return FakeResponse(out)
+
+            if self._op == "update":
+                matched = self._matching(rows)
+                for r in matched:
+                    r.update(self._payload)
+                return FakeResponse([copy.deepcopy(r) for r in matched])
+
+            if self._op == "delete":
+                matched = self._matching(rows)
+                gone = {id(r) for r in matched}
+                self._client.tables[self._table] = [r for r in rows if id(r) not in gone]
+                return FakeResponse([copy.deepcopy(r) for r in matched])
+
+        raise ValueError(f"unknown op {self._op}")
+
+
+class FakeRpc:
+    """client.rpc(name, params) — FakeSupabase.rpc_handlers ішіндегі функцияны шақырады."""
+
+    def __init__(self, client: "FakeSupabase", name: str, params: Dict[str, Any]):
+        self._client = client
+        self._name = name
+        self._params = params
+
+    def execute(self) -> FakeResponse:
+        self._client._before_execute()
+        handler = self._client.rpc_handlers.get(self._name)
+        if handler is None:
+            raise ValueError(f"unknown rpc {self._name}")
+        with self._client._lock:
+            return FakeResponse(handler(self._client, self._params) or [])
+
+
+def _apply_quiz_stats(client: "FakeSupabase", params: Dict[str, Any]) -> None:
+    stats = client.tables.setdefault("quiz_stats", [])
+    by_quiz = {r["quiz_id"]: r for r in stats}
+    for r in params["rows"]:
+        row = by_quiz.get(r["quiz_id"])
+        if row is None:
+            row = by_quiz[r["quiz_id"]] = {
+                "quiz_id": r["quiz_id"], "topic_id": r["topic_id"], "user_id": r["user_id"],
+                "correct_count": 0, "wrong_count": 0, "wrong_options": {},
+            }
+            stats.append(row)
+        row["correct_count"] += r["correct"]
+        row["wrong_count"] += r["wrong"]
+        for k, n in (r.get("wrong_options") or {}).items():
+            row["wrong_options"][k] = row["wrong_options"].get(k, 0) + n
+
+
+def _increment_topic_attempts(client: "FakeSupabase", params: Dict[str, Any]) -> None:
+    by_id = {t["id"]: t for t in client.tables.get("topics", [])}
+    for r in params["rows"]:
+        topic = by_id.get(r["topic_id"])
+        if topic is not None:
+            topic["attempt_count"] = (topic.get("attempt_count") or 0) + r["count"]
+
+
+def _apply_review_items(client: "FakeSupabase", params: Dict[str, Any]) -> None:
+    quiz_ids = {q["id"] for q in client.tables.get("quizzes", [])}
+    items = client.tables.setdefault("review_items", [])
+    by_key = {(r["user_id"], r["quiz_id"]): r for r in items}
+    for r in params["rows"]:
+        if r["quiz_id"] not in quiz_ids:
+            continue  # where exists (...) — өшірілген сұрақ
+        row = by_key.get((r["user_id"], r["quiz_id"]))
+        if row is None:
+            items.append(dict(r))
+        else:
+            row.update(r)
+
+
+class FakeSupabase:
+    """get_supabase() орнына қойылатын клиент."""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}
+        self.calls = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.RLock()
+        self._rng = random.Random(seed)
+        # stats_buffer.py ішіндегі SQL функцияларының жадтағы баламалары
+        self.rpc_handlers: Dict[str, Callable[["FakeSupabase", Dict[str, Any]], Any]] = {
+            "apply_quiz_stats": _apply_quiz_stats,
+            "increment_topic_attempts": _increment_topic_attempts,
+            "apply_review_items": _apply_review_items,
+        }
+
+    def _before_execute(self) -> None:
+        with self._lock:
+            self.calls += 1
+            delay = self.latency_ms + (self._rng.random() * self.jitter_ms if self.jitter_ms else 0.0)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def rpc(self, name: str, params: Dict[str, Any]) -> FakeRpc:
+        return FakeRpc(self, name, params)
+
+    def insert_rows(self, table: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Бенчмарк деректерін latency-сіз енгізу."""
+        out = []
+        with self._lock:
+            target = self.tables.setdefault(table, [])
+            for row in rows:
+                row = dict(row)
+                row.setdefault("id", next(self._ids))
+                row.setdefault("created_at", datetime.now(timezone.utc).isoformat())
+                target.append(row)
+                out.append(row)
+        return out
+
+
+def install(client: FakeSupabase) -> None:
+    """database.get_supabase() осы клиентті қайтаратындай ету."""
+    import database
+
+    database._supabase_client = client
@@ -0,0 +1,396 @@
+# bench/run_bench.py
+"""
+Easy API жүктеме/латенттілік бенчмаркы.
+
+FastAPI app-ы жадтағы FakeSupabase-пен іске қосылады (желі жоқ),
+әр Supabase шақыруына --latency-ms кідіріс қосылады.
+
+Сценарийлер:
+  login            POST /api/login
+  list_topics      GET  /api/subjects/{id}/topics
+  list_quizzes_cold GET /api/topics/{id}/quizzes (әр сұраныс алдында snapshot кэші тазаланады)
+  list_quizzes_warm GET /api/topics/{id}/quizzes (snapshot кэшінен)
+  check_answer     50 × POST /api/quizzes/{id}/check
+  parse_docx_N     POST /api/parse-docx (N = 100/500/2000 сұрақ)
+  bulk_save        POST /api/topics/{id}/quizzes/bulk (100 сұрақ)
+
+Есеп: p50/p95/p99 (ms), throughput (req/s), DB-шақыру/сұраныс.
+
+--repo-check: FakeSupabase деректері SQLite-қа көшіріліп, PostgresRepository
+(SQLite engine) нәтижесі SupabaseRepository-мен салыстырылады — өрістер,
+типтер (уақыт ISO жолы) және мәндер; сосын екеуінің оқу уақыты
+repo_<backend>_<әдіс> сценарийлері ретінде өлшенеді.
+--repo-url postgresql://... қосылса, get_user / list_quizzes сол Postgres-те
+бірнеше рет орындалып, pg_prepared_statements ішінде бар-жоғы тексеріледі
+(кестелер бар болуы керек; тек оқу).
+
+Қолдану (backend/ ішінен):
+    python bench/run_bench.py --latency-ms 20 --iterations 20
+    python bench/run_bench.py --only check_answer,list_quizzes_cold --json out.json
+    python bench/run_bench.py --repo-check --only repo_sqlite_list_quizzes
+    python bench/run_bench.py --repo-check --repo-url "$SUPABASE_DB_URL" --only login
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+os.environ.setdefault("EASY_SECRET_KEY", "bench-secret")
+
+from fake_supabase import FakeSupabase, install  # noqa: E402
+from docx_corpus import make_questions, write_exam_docx  # noqa: E402
+
+BENCH_USER = {"username": "bench", "password": "bench-pass", "email": "bench@example.com"}
+DOCX_SIZES = (100, 500, 2000)
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+class Bench:
+    def __init__(self, latency_ms: float, jitter_ms: float, concurrency: int):
+        self.fake = FakeSupabase(latency_ms=latency_ms, jitter_ms=jitter_ms)
+        install(self.fake)
+
+        import auth
+        import main
+        from fastapi.testclient import TestClient
+
+        self.main = main
+        self.client = TestClient(main.app)
+        self.concurrency = concurrency
+        self.tmpdir = tempfile.mkdtemp(prefix="easy-bench-")
+        self._seed(auth)
+
+    # ---- деректер ----
+    def _seed(self, auth) -> None:
+        fake = self.fake
+        user = fake.insert_rows(
+            "users",
+            [
+                {
+                    "email": BENCH_USER["email"],
+                    "username": BENCH_USER["username"],
+                    "hashed_password": auth._hash_pw(BENCH_USER["password"]),
+                    "is_verified": True,
+                    "credit_balance": 10**9,
+                }
+            ],
+        )[0]
+        self.user_id = user["id"]
+        self.headers = {
+            "Authorization": "Bearer " + self.main.create_token({"sub": str(self.user_id)})
+        }
+
+        subject = fake.insert_rows("subjects", [{"name": "Bench", "user_id": self.user_id}])[0]
+        self.subject_id = subject["id"]
+        fake.insert_rows(
+            "topics",
+            [
+                {"name": f"Тақырып {i}", "subject_id": self.subject_id, "user_id": self.user_id, "attempt_count": 0}
+                for i in range(20)
+            ],
+        )
+        self.topic_id = self._new_topic("Негізгі")
+
+        quizzes = []
+        for q in make_questions(500, seed=1):
+            opts = [f"{l}) {o}" for l, o in zip(q["labels"], q["options"])]
+            quizzes.append(
+                {
+                    "question": q["question"],
+                    "options": opts,
+                    "correct_answer": opts[q["answer_index"]],
+                    "topic_id": self.topic_id,
+                    "user_id": self.user_id,
+                    "is_active": True,
+                }
+            )
+        self.quiz_ids = [r["id"] for r in fake.insert_rows("quizzes", quizzes)]
+
+        self.docx_paths: Dict[int, str] = {}
+        for n in DOCX_SIZES:
+            path = os.path.join(self.tmpdir, f"exam_{n}.docx")
+            write_exam_docx(path, n, seed=n)
+            self.docx_paths[n] = path
+
+    def _new_topic(self, name: str) -> int:
+        return self.fake.insert_rows(
+            "topics",
+            [{"name": name, "subject_id": self.subject_id, "user_id": self.user_id, "attempt_count": 0}],
+        )[0]["id"]
+
+    # ---- сценарийлер ----
+    def scenarios(self) -> Dict[str, Callable[[int], None]]:
+        c, h = self.client, self.headers
+
+        def login(i: int) -> None:
+            r = c.post("/api/login", json={"username": BENCH_USER["username"], "password": BENCH_USER["password"]})
+            r.raise_for_status()
+
+        def list_topics(i: int) -> None:
+            c.get(f"/api/subjects/{self.subject_id}/topics", headers=h).raise_for_status()
+
+        def list_quizzes_cold(i: int) -> None:
+            self.main.quiz_list_snapshots.pop((self.user_id, self.topic_id))
+            c.get(f"/api/topics/{self.topic_id}/quizzes", headers=h).raise_for_status()
+
+        def list_quizzes_warm(i: int) -> None:
+            c.get(f"/api/topics/{self.topic_id}/quizzes", headers=h).raise_for_status()
+
+        def check_answer(i: int) -> None:
+            qid = self.quiz_ids[i % len(self.quiz_ids)]
+            c.post(f"/api/quizzes/{qid}/check", json={"selected_answer": "A) x"}, headers=h).raise_for_status()
+
+        def parse_docx(n: int) -> Callable[[int], None]:
+            def run(i: int) -> None:
+                with open(self.docx_paths[n], "rb") as fh:
+                    r = c.post(
+                        "/api/parse-docx",
+                        files={"file": (f"exam_{n}.docx", fh, "application/octet-stream")},
+                        headers=h,
+                    )
+                r.raise_for_status()
+            return run
+
+        bulk_payload = {
+            "quizzes": [
+                {
+                    "question": q["question"],
+                    "options": [f"{l}) {o}" for l, o in zip(q["labels"], q["options"])],
+                    "answer_index": q["answer_index"],
+                }
+                for q in make_questions(100, seed=7)
+            ]
+        }
+
+        def bulk_save(i: int) -> None:
+            topic_id = self._new_topic(f"bulk-{i}-{time.perf_counter_ns()}")
+            c.post(f"/api/topics/{topic_id}/quizzes/bulk", json=bulk_payload, headers=h).raise_for_status()
+
+        out: Dict[str, Callable[[int], None]] = {
+            "login": login,
+            "list_topics": list_topics,
+            "list_quizzes_cold": list_quizzes_cold,
+            "list_quizzes_warm": list_quizzes_warm,
+            "check_answer": check_answer,
+        }
+        for n in DOCX_SIZES:
+            out[f"parse_docx_{n}"] = parse_docx(n)
+        out["bulk_save"] = bulk_save
+        return out
+
+    # ---- репозиторий: SQLite паритеті ----
+    def sqlite_repository(self):
+        """FakeSupabase кестелерін SQLite файлына көшіріп, PostgresRepository қайтару."""
+        from sqlalchemy import DateTime, create_engine
+
+        from database import Base
+        from models import Quiz, Subject, Topic, User
+        from repository import PostgresRepository
+
+        engine = create_engine(f"sqlite:///{os.path.join(self.tmpdir, 'repo.db')}")
+        plain = engine.execution_options(schema_translate_map={"public": None})
+        tables = [User.__table__, Subject.__table__, Topic.__table__, Quiz.__table__]
+        Base.metadata.create_all(plain, tables=tables)
+        with plain.begin() as conn:
+            for table in tables:
+                columns = set(table.c.keys())
+                timestamps = {c.name for c in table.c if isinstance(c.type, DateTime)}
+                payload = [
+                    {k: _parse_ts(v) if k in timestamps else v for k, v in row.items() if k in columns}
+                    for row in self.fake.tables.get(table.name, [])
+                ]
+                if payload:
+                    conn.execute(table.insert(), payload)
+        return PostgresRepository(engine)
+
+    def repository_check(self) -> List[str]:
+        """Екі backend бірдей жауап бере ме; айырмашылықтар тізімі (бос — сәйкес)."""
+        from repository import SupabaseRepository
+
+        rest, sql = SupabaseRepository(), self.sqlite_repository()
+        calls = {
+            "get_user": lambda r: [r.get_user(self.user_id)],
+            "list_quizzes": lambda r: r.list_quizzes(self.topic_id, self.user_id),
+            "dashboard_subjects": lambda r: r.dashboard(self.user_id)[0],
+            "dashboard_topics": lambda r: r.dashboard(self.user_id)[1],
+        }
+        problems: List[str] = []
+        for name, call in calls.items():
+            expected, got = call(rest), call(sql)
+            if len(expected) != len(got):
+                problems.append(f"{name}: {len(expected)} != {len(got)} жол")
+                continue
+            for a, b in zip(expected, got):
+                if set(a) != set(b):
+                    problems.append(f"{name}: өрістер {sorted(set(a) ^ set(b))}")
+                    break
+                diff = [
+                    k for k in a
+                    if type(a[k]) is not type(b[k])
+                    or (_parse_ts(a[k]) if k.endswith("_at") else a[k])
+                    != (_parse_ts(b[k]) if k.endswith("_at") else b[k])
+                ]
+                if diff:
+                    problems.append(f"{name} id={a.get('id')}: {diff}")
+                    break
+        self.repo_backends = {"supabase": rest, "sqlite": sql}
+        return problems
+
+    def prepared_check(self, url: str) -> List[str]:
+        """Ыстық оқулар Postgres-те server-side prepared statement ме."""
+        from database import create_db_engine
+        from repository import PostgresRepository
+
+        # Бір байланыс — PREPARE жасалған сол байланыстың өзін тексереміз
+        engine = create_db_engine(url, pool_size=1, max_overflow=0)
+        if engine.dialect.name != "postgresql":
+            return [f"--repo-url Postgres емес: {engine.dialect.name}"]
+        repo = PostgresRepository(engine)
+        for _ in range(3):
+            repo.get_user(self.user_id)
+            repo.list_quizzes(self.topic_id, self.user_id)
+        with engine.connect() as conn:
+            statements = [
+                row[0] for row in conn.exec_driver_sql("select statement from pg_prepared_statements")
+            ]
+        engine.dispose()
+        return [
+            f"{name}: pg_prepared_statements ішінде жоқ"
+            for name, table in (("get_user", "users"), ("list_quizzes", "quizzes"))
+            if not any(f"FROM public.{table}" in st for st in statements)
+        ]
+
+    def repository_scenarios(self) -> Dict[str, Callable[[int], None]]:
+        out: Dict[str, Callable[[int], None]] = {}
+        for backend, repo in self.repo_backends.items():
+            out[f"repo_{backend}_list_quizzes"] = lambda i, r=repo: r.list_quizzes(self.topic_id, self.user_id)
+            out[f"repo_{backend}_dashboard"] = lambda i, r=repo: r.dashboard(self.user_id)
+        return out
+
+    def run(self, name: str, fn: Callable[[int], None], iterations: int) -> dict:
+        fn(0)  # қыздыру (кэштер, жалқау импорттар)
+
+        durations: List[float] = []
+        calls_before = self.fake.calls
+
+        def timed(i: int) -> None:
+            t0 = time.perf_counter()
+            fn(i)
+            durations.append(time.perf_counter() - t0)
+
+        wall0 = time.perf_counter()
+        if self.concurrency > 1:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                list(pool.map(timed, range(1, iterations + 1)))
+        else:
+            for i in range(1, iterations + 1):
+                timed(i)
+        wall = time.perf_counter() - wall0
+
+        durations.sort()
+        return {
+            "scenario": name,
+            "requests": iterations,
+            "p50_ms": percentile(durations, 50) * 1e3,
+            "p95_ms": percentile(durations, 95) * 1e3,
+            "p99_ms": percentile(durations, 99) * 1e3,
+            "throughput_rps": iterations / wall if wall else 0.0,
+            "db_calls_per_request": (self.fake.calls - calls_before) / iterations,
+        }
+
+
+def _parse_ts(value):
+    """ISO жол → белдеусіз UTC datetime (SQLite DateTime белдеу сақтамайды)."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _print_table(results: List[dict]) -> None:
+    width = max([18] + [len(r["scenario"]) for r in results])
+    header = f"{'scenario':{width}s} {'n':>5s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s} {'req/s':>9s} {'db/req':>7s}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['scenario']:{width}s} {r['requests']:5d} {r['p50_ms']:9.2f} {r['p95_ms']:9.2f} "
+            f"{r['p99_ms']:9.2f} {r['throughput_rps']:9.1f} {r['db_calls_per_request']:7.2f}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Easy API бенчмаркы (FakeSupabase)")
+    ap.add_argument("--latency-ms", type=float, default=0.0, help="әр Supabase шақыруының кідірісі")
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--iterations", type=int, default=20)
+    ap.add_argument("--check-iterations", type=int, default=50, help="check_answer қайталау саны")
+    ap.add_argument("--concurrency", type=int, default=1)
+    ap.add_argument("--only", default="", help="үтірмен бөлінген сценарийлер")
+    ap.add_argument("--json", dest="json_path", default="", help="нәтижені JSON-ға жазу")
+    ap.add_argument("--repo-check", action="store_true", help="PostgresRepository-ді SQLite-пен тексеру")
+    ap.add_argument("--repo-url", default="", help="--repo-check: prepared statement тексерілетін Postgres URL")
+    args = ap.parse_args(argv)
+
+    bench = Bench(args.latency_ms, args.jitter_ms, args.concurrency)
+    only = {s.strip() for s in args.only.split(",") if s.strip()}
+
+    scenarios = bench.scenarios()
+    if args.repo_check:
+        problems = bench.repository_check()
+        print(f"[repo-check] sqlite vs supabase: {'OK' if not problems else 'MISMATCH'}")
+        if args.repo_url:
+            prepared = bench.prepared_check(args.repo_url)
+            print(f"[repo-check] postgres prepared statements: {'OK' if not prepared else 'MISSING'}")
+            problems += prepared
+        for line in problems:
+            print(f"[repo-check] {line}")
+        if problems:
+            sys.exit(1)
+        scenarios.update(bench.repository_scenarios())
+
+    results = []
+    for name, fn in scenarios.items():
+        if only and name not in only:
+            continue
+        iterations = args.check_iterations if name == "check_answer" else args.iterations
+        if name == "parse_docx_2000":
+            iterations = max(1, iterations // 4)
+        results.append(bench.run(name, fn, iterations))
+
+    print(f"latency={args.latency_ms}ms jitter={args.jitter_ms}ms concurrency={args.concurrency}")
+    _print_table(results)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as fh:
+            json.dump(
+                {"args": vars(args), "results": results},
+                fh,
+                ensure_ascii=False,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,115 @@
 # database.py
+#
+# Клиенттер жалқау (lazy) құрылады: модульді импорттау арзан,
+# Supabase/SQLAlchemy алғаш қажет болғанда ғана жасалады.
+#   get_supabase() → supabase Client
+#   get_engine()   → SQLAlchemy Engine (SUPABASE_DB_URL қажет, Postgres үшін psycopg 3)
+#   get_db()       → FastAPI dependency, Session береді
+
+from __future__ import annotations
 
 import os
+import threading
+from typing import TYPE_CHECKING
+
 from dotenv import load_dotenv
-from supabase import create_client, Client
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
 DATABASE_URL = os.getenv("SUPABASE_DB_URL")
+# psycopg 3: сұраныс осынша рет орындалғаннан кейін байланыста server-side
+# prepared statement болады (0 — бірден). Supavisor/pgbouncer transaction
+# режимі prepared statement-ті көтермейді — онда "off" (немесе session
+# режимі / тікелей 5432 порт).
+PG_PREPARE_THRESHOLD = os.getenv("EASY_PG_PREPARE_THRESHOLD", "0").strip().lower()
+
+__all__ = ["get_supabase", "get_engine", "create_db_engine", "get_db", "Base"]
+
+_lock = threading.Lock()
+_supabase_client = None
+_engine = None
+_session_factory = None
+_base = None
+
+
+def get_supabase() -> "Client":
+    """Supabase клиентін бірінші шақыруда жасап, кейін соны қайтарады."""
+    global _supabase_client
+    if _supabase_client is None:
+        with _lock:
+            if _supabase_client is None:
+                if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
+                    raise RuntimeError(
+                        "Supabase URL немесе SERVICE KEY табылмады. "
+                        ".env файлын тексер: SUPABASE_URL, SUPABASE_SERVICE_KEY."
+                    )
+                from supabase import create_client
+
+                _supabase_client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+    return _supabase_client
 
-if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
-    raise RuntimeError(
-        "Supabase URL немесе SERVICE KEY табылмады. "
-        ".env файлын тексер: SUPABASE_URL, SUPABASE_SERVICE_KEY."
-    )
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+def create_db_engine(url: str, **kwargs):
+    """
+    postgres:// / postgresql:// → postgresql+psycopg:// (psycopg 3) және
+    prepare_threshold; басқа URL-дер (мыс. sqlite) өзгеріссіз.
+    """
+    from sqlalchemy import create_engine
+    from sqlalchemy.engine import make_url
 
-__all__ = ["supabase"]
+    parsed = make_url(url.replace("postgres://", "postgresql://", 1) if url.startswith("postgres://") else url)
+    if parsed.get_backend_name() == "postgresql":
+        parsed = parsed.set(drivername="postgresql+psycopg")
+        threshold = None if PG_PREPARE_THRESHOLD in ("", "off", "none") else int(PG_PREPARE_THRESHOLD)
+        connect_args = dict(kwargs.pop("connect_args", {}))
+        connect_args.setdefault("prepare_threshold", threshold)
+        kwargs["connect_args"] = connect_args
+    return create_engine(parsed, **kwargs)
 
-Base = declarative_base()
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+def get_engine():
+    """SQLAlchemy engine (тек SUPABASE_DB_URL берілгенде)."""
+    global _engine
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                if not DATABASE_URL:
+                    raise RuntimeError(
+                        "SUPABASE_DB_URL табылмады. .env файлын тексер."
+                    )
+                _engine = create_db_engine(DATABASE_URL, pool_pre_ping=True)
+    return _engine
+
+
+def _get_session_factory():
+    global _session_factory
+    if _session_factory is None:
+        from sqlalchemy.orm import sessionmaker
+
+        _session_factory = sessionmaker(bind=get_engine(), autocommit=False, autoflush=False)
+    return _session_factory
+
 
 def get_db():
-    db = SessionLocal()
+    db = _get_session_factory()()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def __getattr__(name: str):
+    # `from database import Base` (models.py) — SQLAlchemy тек осы кезде импортталады
+    global _base
+    if name == "Base":
+        if _base is None:
+            from sqlalchemy.orm import declarative_base
+
+            _base = declarative_base()
+        return _base
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,151 @@
+# delta_sync.py
+# Офлайн клиенттерге арналған өзгерістер ағыны (GET /api/sync?since=).
+#
+# subjects / topics / quizzes жолдары қосылғанда ғана емес, орнында да
+# өзгереді (мыс. increment_topic_attempts → topics.attempt_count,
+# migrate_options → quizzes.options), сондықтан курсор id емес — триггер
+# әр insert/update сайын беретін ортақ change_seq:
+#
+#   create sequence public.sync_change_seq;
+#   create function public.bump_sync_change() returns trigger as $$
+#   begin
+#     new.change_seq := nextval('public.sync_change_seq');
+#     new.changed_at := clock_timestamp();
+#     return new;
+#   end $$ language plpgsql;
+#
+#   -- subjects, topics, quizzes үшін:
+#   alter table public.quizzes add column change_seq bigint, add column changed_at timestamptz;
+#   create trigger quizzes_sync_change before insert or update on public.quizzes
+#     for each row execute function public.bump_sync_change();
+#   create index on public.quizzes (user_id, change_seq);
+#   update public.quizzes set id = id;  -- бар жолдарды толтыру
+#
+# Өшірулер sync_tombstones кестесіне жазылады (models.SyncTombstone):
+#
+#   create table public.sync_tombstones (
+#     id bigserial primary key,
+#     user_id bigint references public.users(id) on delete cascade,
+#     entity text not null,          -- subject | topic | quiz
+#     entity_id bigint not null,
+#     deleted_at timestamptz not null default clock_timestamp()
+#   );
+#   create index on public.sync_tombstones (user_id, id);
+#
+# Курсор — "s.t.q.d": әр кестеде клиент көрген соңғы change_seq (d — tombstone id).
+# Sequence мәні commit ретімен емес, жазу сәтінде беріледі: кіші мәнді
+# транзакция үлкенінен кейін commit болуы мүмкін. Сондықтан соңғы
+# SYNC_SETTLE_SECONDS ішінде өзгерген жолдар келесі сұранысқа қалдырылады;
+# бұл терезе ең ұзақ жазу транзакциясынан (statement_timeout) ұзын болуы керек.
+#
+# Пән өшірілсе, оның тақырыптары мен сұрақтары каскадпен кетеді —
+# клиент бір subject tombstone бойынша бәрін тазалайды (topic үшін де солай).
+
+from __future__ import annotations
+
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from database import get_supabase
+from repository import supabase_exec
+
+SYNC_PAGE_SIZE = 1000  # PostgREST max-rows әдепкі шегі
+SYNC_SETTLE_SECONDS = float(os.getenv("EASY_SYNC_SETTLE_SECONDS", "30"))
+
+# tombstone entity → жауаптағы deleted кілті
+TOMBSTONE_ENTITIES = {"subject": "subjects", "topic": "topics", "quiz": "quizzes"}
+
+_TABLES = (
+    ("subjects", "subject", "id,name,created_at,change_seq"),
+    ("topics", "topic", "id,subject_id,name,attempt_count,created_at,change_seq"),
+    ("quizzes", "quiz", "id,topic_id,question,options,correct_answer,created_at,is_active,change_seq"),
+)
+
+
+class SyncCursor(NamedTuple):
+    subject: int = 0
+    topic: int = 0
+    quiz: int = 0
+    tombstone: int = 0
+
+    def encode(self) -> str:
+        return ".".join(str(v) for v in self)
+
+
+def parse_cursor(raw: Optional[str]) -> Optional[SyncCursor]:
+    """None/бос → толық синхрондау (нөлдік курсор); қате пішім → None."""
+    if not raw:
+        return SyncCursor()
+    parts = raw.split(".")
+    if len(parts) != len(SyncCursor._fields) or not all(p.isdigit() for p in parts):
+        return None
+    return SyncCursor(*(int(p) for p in parts))
+
+
+def record_tombstones(user_id: int, entity: str, entity_ids: Iterable[int]) -> None:
+    """
+    Өшірілген жазбалардың іздері. Өшіру сәтті болғаннан КЕЙІН шақырылады:
+    өшіру сәтсіз болса, клиент бар жолды "өшірілді" деп алмайды.
+    """
+    rows = [
+        {"user_id": user_id, "entity": entity, "entity_id": entity_id}
+        for entity_id in entity_ids
+    ]
+    for start in range(0, len(rows), 500):
+        supabase_exec(
+            get_supabase().table("sync_tombstones").insert(rows[start:start + 500]),
+            ctx=f"record_tombstones({entity})",
+        )
+
+
+def fetch_changes(user_id: int, cursor: SyncCursor, limit: int = SYNC_PAGE_SIZE) -> Dict[str, Any]:
+    """
+    Курсордан кейінгі қосылған/өзгерген жолдар (толық жол — клиент id
+    бойынша алмастырады) және өшірілгендер. Әр кесте limit-пен шектеледі;
+    қайсыбірі толса has_more=True — клиент жаңа курсормен қайта сұрайды.
+    """
+    out: Dict[str, Any] = {}
+    next_cursor = cursor._asdict()
+    has_more = False
+    settled = (datetime.now(timezone.utc) - timedelta(seconds=SYNC_SETTLE_SECONDS)).isoformat()
+
+    for table, field, columns in _TABLES:
+        rows = supabase_exec(
+            get_supabase().table(table)
+            .select(columns)
+            .eq("user_id", user_id)
+            .gt("change_seq", next_cursor[field])
+            .lt("changed_at", settled)
+            .order("change_seq", desc=False)
+            .limit(limit),
+            ctx=f"sync_{table}",
+        )
+        if rows:
+            next_cursor[field] = rows[-1]["change_seq"]
+        has_more = has_more or len(rows) >= limit
+        out[table] = [{k: v for k, v in r.items() if k != "change_seq"} for r in rows]
+
+    tombstones = supabase_exec(
+        get_supabase().table("sync_tombstones")
+        .select("id,entity,entity_id")
+        .eq("user_id", user_id)
+        .gt("id", cursor.tombstone)
+        .lt("deleted_at", settled)
+        .order("id", desc=False)
+        .limit(limit),
+        ctx="sync_tombstones",
+    )
+    deleted: Dict[str, List[int]] = {key: [] for key in TOMBSTONE_ENTITIES.values()}
+    for t in tombstones:
+        bucket = deleted.get(TOMBSTONE_ENTITIES.get(t.get("entity"), ""))
+        if bucket is not None:
+            bucket.append(t["entity_id"])
+    if tombstones:
+        next_cursor["tombstone"] = tombstones[-1]["id"]
+    has_more = has_more or len(tombstones) >= limit
+
+    out["deleted"] = deleted
+    out["cursor"] = SyncCursor(**next_cursor).encode()
+    out["has_more"] = has_more
+    return out
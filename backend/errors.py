@@ -1,6 +1,8 @@
 # errors.py
 # Easy жобасының барлық қателерін бір жерден басқару
 
+import re
+
 ERROR_MESSAGES = {
     # ---- AUTH ----
     "invalid_credentials": "Қолданушы аты немесе құпиясөз қате.",
@@ -23,10 +25,13 @@ ERROR_MESSAGES = {
     # ---- DOCX / FILE PARSER ----
     "file_missing": "Файл таңдалмаған.",
     "file_too_large": "Файл көлемі тым үлкен. 20MB-тан аспау керек.",
+    "batch_too_large": "Импорттағы файлдардың жалпы көлемі тым үлкен.",
     "file_type_not_allowed": "Тек .docx файл қабылданады.",
     "docx_invalid_format": "DOCX файлы дұрыс емес.",
     "docx_parse_error": "Файлды өңдеу кезінде қате шықты.",
     "docx_no_questions": "Сұрақ табылмады. Форматты тексеріңіз.",
+    "docx_worker_crashed": "Файлды өңдеу процесі тоқтап қалды (файл тым ауыр немесе бүлінген).",
+    "preview_not_found": "Алдын ала қарау табылмады немесе мерзімі өтті. Файлды қайта жүктеңіз.",
 
     # ---- SUBJECT / TOPIC / QUIZ ----
     "subject_exists": "Бұл пән сізде бұрыннан бар.",
@@ -35,6 +40,11 @@ ERROR_MESSAGES = {
     "topic_not_found": "Тақырып табылмады.",
     "quiz_not_found": "Сұрақ табылмады.",
     "quiz_invalid": "Сұрақ немесе нұсқалар дұрыс емес.",
+    "quiz_duplicate": "Бұл сұрақ осы тақырыпта бұрыннан бар.",
+    "sync_cursor_invalid": "Синхрондау курсоры дұрыс емес. Толық синхрондауды қайта бастаңыз.",
+
+    # ---- RATE LIMIT ----
+    "rate_limited": "Сұраныстар тым жиі жіберілді. Біраз күтіп, қайталап көріңіз.",
 
     # ---- NETWORK ----
     "network_error": "Желіде ақау пайда болды. Интернет байланысын тексеріңіз.",
@@ -45,33 +55,48 @@ ERROR_MESSAGES = {
 }
 
 
-def map_error(detail: str) -> str:
-    """
-    detail ішіндегі мәтіннен жалпы қате кодын анықтайды.
-    """
-    d = detail.lower()
-
-    # SSL / Network
-    if "sslv3" in d or "ssl" in d:
-        return ERROR_MESSAGES["ssl_error"]
+# Жүйелік қате мәтінін кодқа айналдыратын ережелер (басымдық ретімен).
+# Әр ереже — кілт сөз топтары: әр топтан кемінде біреуі кездессе, ереже
+# орындалады. Мәтін барлық кілт сөздерден құралған бір regex-пен бір рет
+# сканерленеді, сосын ережелер табылған сөздер жиыны бойынша ретімен
+# тексеріледі — бірінші сәйкес келген ереже жеңеді.
+_ERROR_RULES = (
+    ("ssl_error", (("ssl",),)),
+    ("supabase_error", (("supabase", "connection"),)),
+    ("database_error", (("database error",),)),
+    ("token_expired", (("token", "jwt"),)),
+    ("no_credits", (("credit",), ("жеткіліксіз",))),
+    ("docx_no_questions", (("docx",), ("сұрақ",))),
+    ("docx_parse_error", (("docx",),)),
+)
 
-    # Supabase
-    if "supabase" in d or "connection" in d:
-        return ERROR_MESSAGES["supabase_error"]
+_ERROR_KEYWORDS = re.compile(
+    "|".join(
+        re.escape(word)
+        for word in sorted(
+            {w for _, groups in _ERROR_RULES for group in groups for w in group},
+            key=len,
+            reverse=True,
+        )
+    )
+)
 
-    # Token issues
-    if "token" in d or "jwt" in d:
-        return ERROR_MESSAGES["token_expired"]
 
-    # Credits
-    if "credit" in d and "жеткіліксіз" in d:
-        return ERROR_MESSAGES["no_credits"]
+def error_code(detail: str) -> str:
+    """
+    detail ішіндегі мәтіннен жалпы қате кодын анықтайды.
+    """
+    found = set(_ERROR_KEYWORDS.findall((detail or "").lower()))
+    if not found:
+        return "unknown_error"
+    for code, groups in _ERROR_RULES:
+        if all(found.intersection(group) for group in groups):
+            return code
+    return "unknown_error"
 
-    # DOCX
-    if "docx" in d:
-        if "сұрақ" in d:
-            return ERROR_MESSAGES["docx_no_questions"]
-        return ERROR_MESSAGES["docx_parse_error"]
 
-    # Default
-    return ERROR_MESSAGES["unknown_error"]
+def map_error(detail: str) -> str:
+    """
+    detail → қазақша қате хабары (ERROR_MESSAGES ішінен).
+    """
+    return ERROR_MESSAGES[error_code(detail)]
@@ -0,0 +1,47 @@
+# fast_json.py
+# Жылдам JSON жауаптары.
+#
+# orjson орнатылған болса — соны қолданамыз, болмаса stdlib json.
+# Эндпоинт FastJSONResponse(...) қайтарса, FastAPI jsonable_encoder-ді
+# өткізіп жібереді: Supabase-тен келген dict/list онсыз да "таза".
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:  # орнатылмаса stdlib-ке түсеміз
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """content → UTF-8 JSON байттары."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+        default=str,
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """App-тың әдепкі жауап класы."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class RawJSONResponse(Response):
+    """Алдын ала сериализацияланған JSON байттарын қайтару (кэштен)."""
+
+    media_type = "application/json"
+
+    def __init__(self, body: bytes, status_code: int = 200, **kwargs: Any):
+        super().__init__(content=body, status_code=status_code, **kwargs)
@@ -1,22 +1,29 @@
 from __future__ import annotations
 
 import os
-import re
-import json
 import shutil
+import asyncio
+import threading
+import zipfile
 import tempfile
-from typing import Optional, List, Any, Dict
+import uuid
+import random
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Optional, List, Any, Dict, BinaryIO, Tuple, Union
 from datetime import datetime, timedelta, timezone
 
-from fastapi import FastAPI, Depends, HTTPException, UploadFile, File
+from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.formparsers import MultiPartParser
 from pydantic import BaseModel, Field
-from jose import jwt, JWTError
-from docx2python import docx2python
+from starlette.exceptions import HTTPException as StarletteHTTPException
 
-from database import supabase
+from database import get_supabase
 from auth import (
     register_user,
     verify_user,
@@ -32,13 +39,24 @@ from schemas import (
     TopicCreate,
     QuizCreate,
 )
-from errors import map_error
-
-# Опционалды ескі парсер (болса қолданамыз, болмаса елемейміз)
-try:
-    from quiz_parser import process_docx as legacy_process_docx
-except ImportError:
-    legacy_process_docx = None
+from errors import ERROR_MESSAGES, error_code
+from quiz_dedupe import quiz_fingerprint, find_duplicate_ids, topic_fingerprints
+from fast_json import FastJSONResponse, RawJSONResponse, dumps
+from cache import TTLCache
+from metrics import MetricsMiddleware, render_prometheus
+from repository import get_repository, supabase_exec
+from singleflight import CoalesceMiddleware
+from parse_jobs import ParseJob, ParseJobQueue
+from practice import practice_misses, sample_ids, shuffle_options
+from quiz_search import quiz_search
+from delta_sync import fetch_changes, parse_cursor, record_tombstones
+from stats_buffer import stats_buffer
+from topic_analytics import build_topic_analytics
+from review_queue import review_queue
+from upload_limit import BodySizeLimitMiddleware
+from availability import identity_filter
+from rate_limit import RateLimitMiddleware, RateRule, make_store, merge_rules, parse_rules
+from parser_engine import parse_docx
 
 
 # ───────────────────────────────────────────────────────────
@@ -57,47 +75,21 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/login")
 
 def create_token(data: dict, minutes: int = ACCESS_TOKEN_EXPIRE_MINUTES) -> str:
     """JWT токен жасау."""
+    from jose import jwt
+
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(minutes=minutes)
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def supabase_exec(query, ctx: str):
-    """
-    Барлық Supabase сұраныстарын орындайтын көмекші.
-    query.execute() шақырып, data / error өңдейді.
-    Еш жерде .insert().select() сияқты Python-ға тән емес тізбектер жоқ.
-    """
-    try:
-        res = query.execute()
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Supabase error ({ctx}): {e}",
-        )
-
-    data = getattr(res, "data", None)
-    error = getattr(res, "error", None)
-
-    if error:
-        msg = getattr(error, "message", str(error))
-        raise HTTPException(
-            status_code=500,
-            detail=f"Supabase error ({ctx}): {msg}",
-        )
-
-    if data is None and isinstance(res, dict):
-        data = res.get("data")
-
-    return data or []
-
-
 def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
     """
     JWT ішіндегі sub → users.id.
     users: id, email, username, hashed_password, is_verified, created_at, credit_balance
     """
+    from jose import jwt, JWTError
+
     credentials_exception = HTTPException(
         status_code=401,
         detail="Токен жарамсыз немесе ескірген.",
@@ -112,26 +104,98 @@ def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
     except (JWTError, ValueError):
         raise credentials_exception
 
-    rows = supabase_exec(
-        supabase.table("users")
-        .select("id,email,username,is_verified,created_at,credit_balance")
-        .eq("id", user_id)
-        .limit(1),
-        ctx="get_current_user",
-    )
-
-    if not rows:
+    user = get_repository().get_user(user_id)
+    if not user:
         raise HTTPException(status_code=404, detail="Қолданушы табылмады.")
 
-    return rows[0]
+    return user
+
+
+def _load_topic_quizzes_for_index(topic_id: int) -> List[dict]:
+    """Fingerprint индексін құру үшін тақырыптың барлық сұрақтарын оқу."""
+    rows = supabase_exec(
+        get_supabase().table("quizzes")
+        .select("id,question,options")
+        .eq("topic_id", topic_id)
+        .order("created_at", desc=False)
+        .order("id", desc=False),
+        ctx="load_topic_fingerprints",
+    )
+    return rows
 
 
 # ───────────────────────────────────────────────────────────
 # APP & CORS
 # ───────────────────────────────────────────────────────────
 
-app = FastAPI(title="Easy API (Supabase)")
+app = FastAPI(title="Easy API (Supabase)", default_response_class=FastJSONResponse)
+
+app.add_middleware(CoalesceMiddleware)
+app.add_middleware(MetricsMiddleware)
+
+# Жүктеу шектері: көлем ағын кезінде саналады, 20MB-тан асқан файл
+# толық оқылмай-ақ 413 алады. Шектен кіші файлдар жадта (spool) қалады,
+# UPLOAD_SPOOL_BYTES-тан үлкендері ғана дискке төгіледі.
+MAX_DOCX_BYTES = 20 * 1024 * 1024  # errors.py: "file_too_large"
+MAX_BATCH_BYTES = int(os.getenv("EASY_BATCH_MAX_BYTES", str(200 * 1024 * 1024)))
+MULTIPART_OVERHEAD_BYTES = 64 * 1024  # boundary + part headers
+UPLOAD_SPOOL_BYTES = int(os.getenv("EASY_UPLOAD_SPOOL_BYTES", str(8 * 1024 * 1024)))
+
+MultiPartParser.spool_max_size = UPLOAD_SPOOL_BYTES
+
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    limits={
+        "/api/parse-docx": MAX_DOCX_BYTES + MULTIPART_OVERHEAD_BYTES,
+        "/api/parse-docx/batch": MAX_BATCH_BYTES,
+    },
+)
+
+# Жиілік шектері (token bucket): SMTP / хэштеу / CPU-ға ауыр эндпоинттер.
+# EASY_RATE_LIMITS="/api/login:ip=10/60;/api/parse-docx:user=20/60" — әдепкіні алмастыру.
+# EASY_RATE_LIMIT_REDIS_URL — бірнеше worker-ге ортақ bucket-тер (redis пакеті керек).
+DEFAULT_RATE_LIMITS = {
+    "/api/register": [RateRule(5, 600, "ip")],
+    "/api/resend-code": [RateRule(3, 600, "ip")],
+    "/api/login": [RateRule(10, 60, "ip")],
+    "/api/parse-docx": [RateRule(20, 60, "user"), RateRule(40, 60, "ip")],
+    "/api/parse-docx/batch": [RateRule(5, 60, "user"), RateRule(10, 60, "ip")],
+    "/api/register/available": [RateRule(60, 60, "ip")],
+}
+
+
+def _rate_limit_user(scope) -> Optional[str]:
+    """Bearer токендегі sub (дерекқорсыз); жарамсыз болса None — тек ip ережесі."""
+    from jose import jwt, JWTError
+
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return None
+            try:
+                sub = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+            except JWTError:
+                return None
+            return str(sub) if sub is not None else None
+    return None
+
+
+app.add_middleware(
+    RateLimitMiddleware,
+    rules=merge_rules(DEFAULT_RATE_LIMITS, parse_rules(os.getenv("EASY_RATE_LIMITS", ""))),
+    store=make_store(
+        os.getenv("EASY_RATE_LIMIT_REDIS_URL"),
+        max_keys=int(os.getenv("EASY_RATE_LIMIT_MAX_KEYS", "100000")),
+    ),
+    user_key=_rate_limit_user,
+    # Алдымыздағы сенімді proxy саны (X-Forwarded-For оң жағынан); 0 — тікелей қосылым
+    trusted_hops=int(os.getenv("EASY_TRUSTED_PROXY_HOPS", "0")),
+    methods=("GET", "POST"),
+)
 
+# CORS ең соңында қосылады (ең сыртқы қабат): 413 / 429 жауаптары да
+# CORS тақырыптарын алады, әйтпесе браузер оларды желі қатесі деп көрсетеді.
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -142,6 +206,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After"],
 )
 
 
@@ -155,8 +220,23 @@ class ParsedBlock(BaseModel):
     answer_index: Optional[int] = None
 
 
+class PreviewEdit(BaseModel):
+    """Алдын ала қараудағы бір сұрақтың өзгерісі; берілмеген өрістер өзгермейді."""
+    index: int = Field(..., ge=0)
+    question: Optional[str] = None
+    options: Optional[List[str]] = None
+    answer_index: Optional[int] = None
+    removed: bool = False
+
+
 class BulkSaveRequest(BaseModel):
-    quizzes: List[ParsedBlock]
+    # Не толық тізім (quizzes), не /api/parse-docx берген preview_id + edits
+    quizzes: List[ParsedBlock] = []
+    preview_id: Optional[str] = None
+    edits: List[PreviewEdit] = []
+    # True → тақырыпта бар сұрақтар өткізіліп жіберіледі,
+    # False → бәрі сақталады, қайталанғандары тек "duplicates"-та белгіленеді
+    skip_duplicates: bool = True
 
 
 class AnswerCheck(BaseModel):
@@ -176,155 +256,40 @@ class FeedbackCreate(BaseModel):
 # DOCX PARSER HELPERS
 # ───────────────────────────────────────────────────────────
 
-QUESTION_LINE_RE = re.compile(r"^\s*(\d+)\)\s*(.+)$")
-OPTION_LINE_RE = re.compile(r"^\s*([A-D])\)\s*(.+)$")
-ANSWER_PAIR_RE = re.compile(r"(\d{1,3})\)\s*([A-D])", re.I)
-ANSWER_LINE_RE = re.compile(r"^\s*(\d{1,3})\)\s*([A-D])\s*$")
-
-
-def _extract_lines_from_body(doc) -> List[str]:
-    lines: List[str] = []
-    for first in doc.body:
-        for second in first:
-            for third in second:
-                for cell in third:
-                    if cell is None:
-                        continue
-                    text = str(cell)
-                    parts = re.split(r"[\n\r\t]+", text)
-                    for p in parts:
-                        s = p.strip()
-                        if s:
-                            lines.append(s)
-    return lines
-
-
-def _detect_answer_start_index(lines: List[str]) -> int:
-    n = len(lines)
-
-    # Бір жолда бірнеше "1)A 2)B" бар болса
-    for i, line in enumerate(lines):
-        if len(ANSWER_PAIR_RE.findall(line)) >= 2:
-            return i
-
-    # Қатарынан бірнеше "1)A" т.с.с.
-    run_start = None
-    for i, line in enumerate(lines):
-        if ANSWER_LINE_RE.match(line):
-            if run_start is None:
-                run_start = i
-        else:
-            if run_start is not None:
-                if i - run_start >= 2:
-                    return run_start
-                run_start = None
-
-    if run_start is not None and n - run_start >= 2:
-        return run_start
-
-    return n  # жауаптар блогы табылмаса
-
-
-def _parse_questions_from_lines(lines: List[str], end: int) -> List[Dict[str, Any]]:
-    questions: List[Dict[str, Any]] = []
-    current: Optional[Dict[str, Any]] = None
-
-    for line in lines[:end]:
-        mq = QUESTION_LINE_RE.match(line)
-        mo = OPTION_LINE_RE.match(line)
-
-        if mq:
-            num = int(mq.group(1))
-            rest = mq.group(2).strip()
-
-            # "1) A" сияқты шумды өткізіп жібереміз
-            if len(rest) == 1 and rest.upper() in "ABCD":
-                continue
-
-            if current:
-                questions.append(current)
-
-            current = {
-                "number": num,
-                "question": rest,
-                "options": [],
-                "answer_index": None,
-            }
-
-        elif current and mo:
-            letter, txt = mo.groups()
-            current["options"].append(f"{letter}) {txt.strip()}")
-
-        elif current:
-            extra = line.strip()
-            if not extra:
-                continue
-            if current["options"]:
-                current["options"][-1] += " " + extra
-            else:
-                current["question"] += " " + extra
-
-    if current:
-        questions.append(current)
-
-    cleaned: List[Dict[str, Any]] = []
-    for q in questions:
-        opts = [o for o in q["options"] if o.strip()]
-        if q["question"] and len(opts) >= 2:
-            q["options"] = opts
-            cleaned.append(q)
-
-    return cleaned
-
-
-def _parse_answers_from_lines(lines: List[str], start: int, max_q: int) -> Dict[int, str]:
-    answers: Dict[int, str] = {}
-    for line in lines[start:]:
-        for num_str, letter in ANSWER_PAIR_RE.findall(line):
-            num = int(num_str)
-            if 1 <= num <= max_q:
-                answers[num] = letter.upper()
-    return answers
-
+def _upload_buffer(upload: UploadFile) -> BinaryIO:
+    """
+    Жүктелген файлды көшірмей парсерге беру: SpooledTemporaryFile-дың өзі
+    (кіші файл жадта, үлкені дискте) — басына қайтарып береміз.
+    """
+    upload.file.seek(0)
+    return upload.file
 
-def parse_docx_with_answers(path: str, debug: bool = False) -> List[Dict[str, Any]]:
-    doc = docx2python(path)
-    lines = _extract_lines_from_body(doc)
 
-    ans_start = _detect_answer_start_index(lines)
-    questions = _parse_questions_from_lines(lines, ans_start)
+def parse_docx_questions(source: Union[str, BinaryIO], debug: bool = False) -> List[Dict[str, Any]]:
+    """
+    DOCX → алдын ала қарауға дайын сұрақтар:
+      [{"text": str, "options": [...], "answer_index"?: int}, ...]
+    Файл бір рет оқылады; стратегиясын parser_engine таңдайды.
+    """
+    blocks = parse_docx(source, debug=debug)
 
-    if not questions:
-        if debug:
-            print("[parse_docx_with_answers] No questions parsed.")
-        return []
+    questions: List[dict] = []
+    for b in (blocks or []):
+        q_text = (b.get("question") or b.get("text") or "").strip()
+        raw_opts = b.get("options") or []
+        opts = [str(o).strip() for o in raw_opts if str(o).strip()]
 
-    max_q = max(q["number"] for q in questions)
-    answers = (
-        _parse_answers_from_lines(lines, ans_start, max_q)
-        if ans_start < len(lines)
-        else {}
-    )
+        if not q_text or len(opts) < 2:
+            continue
 
-    out: List[Dict[str, Any]] = []
-    for q in questions:
-        letter = answers.get(q["number"])
-        answer_index = None
-        if letter:
-            for i, opt in enumerate(q["options"]):
-                if opt.lstrip().upper().startswith(f"{letter})"):
-                    answer_index = i
-                    break
+        item: Dict[str, Any] = {"text": q_text, "options": opts}
+        ai = b.get("answer_index")
+        if isinstance(ai, int) and 0 <= ai < len(opts):
+            item["answer_index"] = ai
 
-        out.append(
-            {
-                "question": q["question"],
-                "options": q["options"],
-                "answer_index": answer_index,
-            }
-        )
+        questions.append(item)
 
-    return out
+    return questions
 
 
 # ───────────────────────────────────────────────────────────
@@ -336,6 +301,15 @@ def root():
     return {"status": "ok", "app": "Easy", "version": "1.0.0"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus text форматындағы метрикалар."""
+    return PlainTextResponse(
+        render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 # ───────────────────────────────────────────────────────────
 # AUTH ENDPOINTS
 # ───────────────────────────────────────────────────────────
@@ -356,6 +330,7 @@ def api_register(payload: RegisterIn):
 
         if user_id is not None:
             add_credit_log(user_id, amount=3, reason=CreditReason.REGISTRATION)
+            identity_filter.add(user_obj.get("email"), user_obj.get("username"))
     except Exception:
         # Лог жазуда қате болса да, тіркелу сәтті болуы керек
         pass
@@ -363,6 +338,45 @@ def api_register(payload: RegisterIn):
     return res
 
 
+@app.on_event("startup")
+def _warm_identity_filter() -> None:
+    identity_filter.warm_async()
+
+
+@app.get("/api/register/available")
+def register_available(
+    email: Optional[str] = Query(None, max_length=320),
+    username: Optional[str] = Query(None, max_length=64),
+):
+    """
+    Тіркелу формасы үшін: email / username бос па.
+    Bloom filter "жоқ" десе, дерекқорға бармаймыз; "мүмкін бар" десе ғана тексереміз.
+    """
+    email = (email or "").strip().lower()
+    username = (username or "").strip()
+    if not email and not username:
+        raise HTTPException(status_code=400, detail="Email немесе username беріңіз.")
+
+    out: Dict[str, bool] = {}
+    if email:
+        out["email"] = not (
+            identity_filter.may_contain_email(email)
+            and supabase_exec(
+                get_supabase().table("users").select("id").eq("email", email).limit(1),
+                ctx="check_email_available",
+            )
+        )
+    if username:
+        out["username"] = not (
+            identity_filter.may_contain_username(username)
+            and supabase_exec(
+                get_supabase().table("users").select("id").eq("username", username).limit(1),
+                ctx="check_username_available",
+            )
+        )
+    return out
+
+
 
 @app.post("/api/verify")
 def api_verify(payload: VerifyIn):
@@ -418,11 +432,13 @@ def update_profile(
         return current_user
 
     rows = supabase_exec(
-        supabase.table("users")
+        get_supabase().table("users")
         .update(updates)
         .eq("id", current_user["id"]),
         ctx="update_profile",
     )
+    if "username" in updates:
+        identity_filter.add(username=updates["username"])
 
     return rows[0] if rows else {**current_user, **updates}
 
@@ -435,7 +451,7 @@ def update_profile(
 @app.get("/api/subjects")
 def list_subjects(current_user: dict = Depends(get_current_user)):
     rows = supabase_exec(
-        supabase.table("subjects")
+        get_supabase().table("subjects")
         .select("id,name,created_at")
         .eq("user_id", current_user["id"])
         .order("created_at", desc=False)
@@ -455,7 +471,7 @@ def create_subject(
         raise HTTPException(status_code=400, detail="Пән атауы бос болмауы керек.")
 
     existing = supabase_exec(
-        supabase.table("subjects")
+        get_supabase().table("subjects")
         .select("id")
         .eq("user_id", current_user["id"])
         .eq("name", name),
@@ -466,7 +482,7 @@ def create_subject(
 
     # insert → execute (supabase-py default returning='representation')
     rows = supabase_exec(
-        supabase.table("subjects")
+        get_supabase().table("subjects")
         .insert({"name": name, "user_id": current_user["id"]}),
         ctx="insert_subject",
     )
@@ -474,7 +490,7 @@ def create_subject(
     # Егер жоба returning=minimal болса — fallback: қайта оқимыз
     if not rows:
         rows = supabase_exec(
-            supabase.table("subjects")
+            get_supabase().table("subjects")
             .select("id,name,created_at")
             .eq("user_id", current_user["id"])
             .eq("name", name)
@@ -486,6 +502,8 @@ def create_subject(
     if not rows:
         raise HTTPException(status_code=500, detail="Пән қосу сәтсіз аяқталды.")
 
+    dashboard_snapshots.pop(current_user["id"])
+
     return rows[0]
 
 
@@ -495,7 +513,7 @@ def delete_subject(
     current_user: dict = Depends(get_current_user),
 ):
     exists = supabase_exec(
-        supabase.table("subjects")
+        get_supabase().table("subjects")
         .select("id")
         .eq("id", subject_id)
         .eq("user_id", current_user["id"])
@@ -508,13 +526,27 @@ def delete_subject(
             detail="Пән табылмады немесе сізге тиесілі емес.",
         )
 
+    # Каскадпен кететін тақырыптар — жадтағы қайталау күйлерін тазалау үшін
+    topic_ids = [
+        t["id"]
+        for t in supabase_exec(
+            get_supabase().table("topics")
+            .select("id")
+            .eq("subject_id", subject_id)
+            .eq("user_id", current_user["id"]),
+            ctx="list_topics(delete_subject)",
+        )
+    ]
     supabase_exec(
-        supabase.table("subjects")
+        get_supabase().table("subjects")
         .delete()
         .eq("id", subject_id)
         .eq("user_id", current_user["id"]),
         ctx="delete_subject",
     )
+    record_tombstones(current_user["id"], "subject", [subject_id])
+    _invalidate_quiz_snapshots(current_user["id"])
+    review_queue.forget_topics(current_user["id"], topic_ids)
 
     return {"deleted": True}
 
@@ -531,7 +563,7 @@ def list_topics(
 ):
     # Пән user-ге тиесілі ме?
     subject = supabase_exec(
-        supabase.table("subjects")
+        get_supabase().table("subjects")
         .select("id")
         .eq("id", subject_id)
         .eq("user_id", current_user["id"])
@@ -545,7 +577,7 @@ def list_topics(
         )
 
     topics = supabase_exec(
-        supabase.table("topics")
+        get_supabase().table("topics")
         .select("id,name,attempt_count,created_at")
         .eq("subject_id", subject_id)
         .eq("user_id", current_user["id"])
@@ -567,7 +599,7 @@ def create_topic(
         raise HTTPException(status_code=400, detail="Тақырып атауы бос болмауы керек.")
 
     subject = supabase_exec(
-        supabase.table("subjects")
+        get_supabase().table("subjects")
         .select("id")
         .eq("id", subject_id)
         .eq("user_id", current_user["id"])
@@ -581,7 +613,7 @@ def create_topic(
         )
 
     existing = supabase_exec(
-        supabase.table("topics")
+        get_supabase().table("topics")
         .select("id")
         .eq("subject_id", subject_id)
         .eq("user_id", current_user["id"])
@@ -595,7 +627,7 @@ def create_topic(
         )
 
     rows = supabase_exec(
-        supabase.table("topics").insert(
+        get_supabase().table("topics").insert(
             {
                 "name": name,
                 "subject_id": subject_id,
@@ -608,7 +640,7 @@ def create_topic(
 
     if not rows:
         rows = supabase_exec(
-            supabase.table("topics")
+            get_supabase().table("topics")
             .select("id,name,attempt_count,created_at")
             .eq("subject_id", subject_id)
             .eq("user_id", current_user["id"])
@@ -621,6 +653,8 @@ def create_topic(
     if not rows:
         raise HTTPException(status_code=500, detail="Тақырып қосу сәтсіз аяқталды.")
 
+    dashboard_snapshots.pop(current_user["id"])
+
     return rows[0]
 
 
@@ -630,7 +664,7 @@ def delete_topic(
     current_user: dict = Depends(get_current_user),
 ):
     exists = supabase_exec(
-        supabase.table("topics")
+        get_supabase().table("topics")
         .select("id")
         .eq("id", topic_id)
         .eq("user_id", current_user["id"])
@@ -644,74 +678,139 @@ def delete_topic(
         )
 
     supabase_exec(
-        supabase.table("topics")
+        get_supabase().table("topics")
         .delete()
         .eq("id", topic_id)
         .eq("user_id", current_user["id"]),
         ctx="delete_topic",
     )
+    record_tombstones(current_user["id"], "topic", [topic_id])
+    topic_fingerprints.invalidate(topic_id)
+    _invalidate_quiz_snapshots(current_user["id"], topic_id)
+    quiz_search.invalidate(current_user["id"])
+    review_queue.forget_topics(current_user["id"], [topic_id])
 
     return {"deleted": True}
 
 
+# ───────────────────────────────────────────────────────────
+# DASHBOARD
+# Басты бет үшін пәндер + тақырыптар + сұрақ/әрекет сандары бір сұраныспен
+# ───────────────────────────────────────────────────────────
+
+# user_id → dashboard жауабының дайын JSON байттары.
+# Пән/тақырып/сұрақ өзгергенде тазаланады; TTL басқа worker-лер үшін.
+dashboard_snapshots: TTLCache[bytes] = TTLCache(ttl_seconds=60, max_items=1024)
+
+
+@app.get("/api/dashboard")
+def get_dashboard(current_user: dict = Depends(get_current_user)):
+    cached = dashboard_snapshots.get(current_user["id"])
+    if cached is not None:
+        return RawJSONResponse(cached)
+
+    subjects, topics = get_repository().dashboard(current_user["id"])
+
+    by_subject: Dict[int, List[Dict[str, Any]]] = {s["id"]: [] for s in subjects}
+    for t in topics:
+        bucket = by_subject.get(t.pop("subject_id", None))
+        if bucket is not None:
+            bucket.append(t)
+
+    out = []
+    for s in subjects:
+        subject_topics = by_subject[s["id"]]
+        out.append(
+            {
+                **s,
+                "topics": subject_topics,
+                "topic_count": len(subject_topics),
+                "quiz_count": sum(t["quiz_count"] for t in subject_topics),
+                "attempt_count": sum(t.get("attempt_count") or 0 for t in subject_topics),
+            }
+        )
+
+    body = dumps({"subjects": out})
+    dashboard_snapshots.set(current_user["id"], body)
+    return RawJSONResponse(body)
+
+
+# ───────────────────────────────────────────────────────────
+# DELTA SYNC
+# Офлайн клиенттер: курсордан кейінгі қосылған/өзгерген/өшірілген жазбалар
+# ───────────────────────────────────────────────────────────
+
+@app.get("/api/sync")
+def sync_changes(
+    since: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=1000),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    since берілмесе — толық көшірме. Жауаптағы cursor келесі сұранысқа
+    беріледі; has_more=true болса, бірден қайта сұрау керек.
+    Клиент алдымен subjects/topics/quizzes жолдарын id бойынша қосады
+    немесе алмастырады, сосын deleted өшіреді.
+    """
+    cursor = parse_cursor(since)
+    if cursor is None:
+        raise HTTPException(status_code=400, detail=ERROR_MESSAGES["sync_cursor_invalid"])
+    return FastJSONResponse(fetch_changes(current_user["id"], cursor, limit))
+
+
 # ───────────────────────────────────────────────────────────
 # QUIZZES
 # quizzes(id,question,options,correct_answer,topic_id,user_id,created_at,is_active)
 # ───────────────────────────────────────────────────────────
 
+# (user_id, topic_id) → list_quizzes жауабының дайын JSON байттары.
+# Сұрақ қосылғанда/өшірілгенде тазаланады; TTL басқа worker-лер үшін.
+quiz_list_snapshots: TTLCache[bytes] = TTLCache(ttl_seconds=30, max_items=512)
+
+# (user_id, topic_id) → тақырыптағы белсенді quiz id-лері (practice үшін)
+practice_id_index: TTLCache[List[int]] = TTLCache(ttl_seconds=300, max_items=2048)
+
+# (topic_id, min_attempts) → analytics жауабының JSON байттары.
+# Статистика фондық ағынмен жазылады, сондықтан қысқа TTL жеткілікті.
+analytics_snapshots: TTLCache[bytes] = TTLCache(ttl_seconds=30, max_items=512)
+
+
+def _invalidate_quiz_snapshots(user_id: int, topic_id: Optional[int] = None) -> None:
+    dashboard_snapshots.pop(user_id)
+    if topic_id is None:
+        quiz_list_snapshots.discard_where(lambda key: key[0] == user_id)
+        practice_id_index.discard_where(lambda key: key[0] == user_id)
+        quiz_search.invalidate(user_id)
+    else:
+        quiz_list_snapshots.pop((user_id, topic_id))
+        practice_id_index.pop((user_id, topic_id))
+        analytics_snapshots.discard_where(lambda key: key[0] == topic_id)
+
+
 @app.get("/api/topics/{topic_id}/quizzes")
 def list_quizzes(
     topic_id: int,
     current_user: dict = Depends(get_current_user),
 ):
-    topic = supabase_exec(
-        supabase.table("topics")
-        .select("id")
-        .eq("id", topic_id)
-        .eq("user_id", current_user["id"])
-        .limit(1),
-        ctx="check_topic_owner(list_quizzes)",
-    )
-    if not topic:
+    cache_key = (current_user["id"], topic_id)
+    cached = quiz_list_snapshots.get(cache_key)
+    if cached is not None:
+        return RawJSONResponse(cached)
+
+    repo = get_repository()
+    if not repo.topic_owned(topic_id, current_user["id"], ctx="check_topic_owner(list_quizzes)"):
         raise HTTPException(
             status_code=404,
             detail="Тақырып табылмады немесе сізге тиесілі емес.",
         )
 
-    rows = supabase_exec(
-        supabase.table("quizzes")
-        .select("id,question,options,correct_answer,created_at,is_active")
-        .eq("topic_id", topic_id)
-        .eq("user_id", current_user["id"])
-        .order("created_at", desc=False)
-        .order("id", desc=False),
-        ctx="list_quizzes",
-    )
-
-    result: List[dict] = []
-    for q in rows:
-        opts = q.get("options") or []
-        if isinstance(opts, str):
-            try:
-                parsed = json.loads(opts)
-                if isinstance(parsed, list):
-                    opts = parsed
-                else:
-                    opts = [str(parsed)]
-            except Exception:
-                opts = [x.strip() for x in opts.split(";") if x.strip()]
-        result.append(
-            {
-                "id": q["id"],
-                "question": q["question"],
-                "options": opts,
-                "correct_answer": q.get("correct_answer"),
-                "created_at": q.get("created_at"),
-                "is_active": q.get("is_active", True),
-            }
-        )
+    rows = repo.list_quizzes(topic_id, current_user["id"])
 
-    return result
+    # options migrate_options.py арқылы JSON-массивке көшірілген,
+    # сондықтан жолдарды өзгертпей сериализациялаймыз
+    body = dumps(rows)
+    quiz_list_snapshots.set(cache_key, body)
+    return RawJSONResponse(body)
 
 
 @app.post("/api/topics/{topic_id}/quizzes")
@@ -721,7 +820,7 @@ def add_quiz(
     current_user: dict = Depends(get_current_user),
 ):
     topic = supabase_exec(
-        supabase.table("topics")
+        get_supabase().table("topics")
         .select("id")
         .eq("id", topic_id)
         .eq("user_id", current_user["id"])
@@ -756,6 +855,13 @@ def add_quiz(
             detail="Дұрыс жауап нұсқалар тізімінде болуы керек.",
         )
 
+    fingerprint = quiz_fingerprint(question, options)
+    if fingerprint in topic_fingerprints.get(topic_id, _load_topic_quizzes_for_index):
+        raise HTTPException(
+            status_code=409,
+            detail=ERROR_MESSAGES["quiz_duplicate"],
+        )
+
     row = {
         "question": question,
         "options": options,
@@ -767,14 +873,14 @@ def add_quiz(
     }
 
     rows = supabase_exec(
-        supabase.table("quizzes").insert(row),
+        get_supabase().table("quizzes").insert(row),
         ctx="insert_quiz",
     )
 
     if not rows:
         # returning=minimal болса, жуырдағы дәл осы сұрақты қайта оқимыз
         rows = supabase_exec(
-            supabase.table("quizzes")
+            get_supabase().table("quizzes")
             .select("id,question,options,correct_answer,topic_id,user_id,created_at,is_active")
             .eq("topic_id", topic_id)
             .eq("user_id", current_user["id"])
@@ -788,17 +894,9 @@ def add_quiz(
         raise HTTPException(status_code=500, detail="Quiz қосу сәтсіз аяқталды.")
 
     q = rows[0]
-    opts = q.get("options") or []
-    if isinstance(opts, str):
-        try:
-            parsed = json.loads(opts)
-            if isinstance(parsed, list):
-                opts = parsed
-            else:
-                opts = [str(parsed)]
-        except Exception:
-            opts = [x.strip() for x in opts.split(";") if x.strip()]
-    q["options"] = opts
+    topic_fingerprints.add(topic_id, fingerprint, q.get("id"))
+    _invalidate_quiz_snapshots(current_user["id"], topic_id)
+    quiz_search.add(current_user["id"], [q])
 
     return q
 
@@ -810,8 +908,8 @@ def check_answer(
     current_user: dict = Depends(get_current_user),
 ):
     rows = supabase_exec(
-        supabase.table("quizzes")
-        .select("id,correct_answer,user_id")
+        get_supabase().table("quizzes")
+        .select("id,correct_answer,options,user_id,topic_id")
         .eq("id", quiz_id)
         .limit(1),
         ctx="get_quiz_for_check",
@@ -827,6 +925,15 @@ def check_answer(
     correct_answer = (quiz.get("correct_answer") or "").strip()
     selected = (payload.selected_answer or "").strip()
     is_correct = bool(correct_answer) and (correct_answer == selected)
+    if correct_answer:
+        practice_misses.record(current_user["id"], quiz_id, is_correct)
+        # Статистика жадта жинақталады, дерекқорға фондық ағын жазады
+        options = quiz.get("options") or []
+        choice = options.index(selected) if selected in options else None
+        stats_buffer.record_answer(
+            current_user["id"], quiz.get("topic_id"), quiz_id, is_correct, choice
+        )
+        review_queue.record(current_user["id"], quiz_id, quiz.get("topic_id"), is_correct)
 
     return {
         "correct": is_correct,
@@ -834,64 +941,243 @@ def check_answer(
     }
 
 
+# SM-2 күйлері статистикамен бір фондық ағында жазылады
+stats_buffer.flush_hooks.append(review_queue.flush)
+
+
+@app.on_event("shutdown")
+def _flush_stats_buffer() -> None:
+    stats_buffer.close()
+
+
+def _practice_ids(topic_id: int, user_id: int) -> List[int]:
+    cache_key = (user_id, topic_id)
+    ids = practice_id_index.get(cache_key)
+    if ids is not None:
+        return ids
+
+    repo = get_repository()
+    if not repo.topic_owned(topic_id, user_id, ctx="check_topic_owner(practice)"):
+        raise HTTPException(
+            status_code=404,
+            detail="Тақырып табылмады немесе сізге тиесілі емес.",
+        )
+
+    rows = supabase_exec(
+        get_supabase().table("quizzes")
+        .select("id,is_active")
+        .eq("topic_id", topic_id)
+        .eq("user_id", user_id)
+        .order("id", desc=False),
+        ctx="practice_index",
+    )
+    ids = [r["id"] for r in rows if r.get("is_active") is not False]
+    practice_id_index.set(cache_key, ids)
+    return ids
+
+
+@app.get("/api/topics/{topic_id}/practice")
+def practice_set(
+    topic_id: int,
+    n: int = Query(20, ge=1, le=100),
+    seed: Optional[int] = None,
+    weighted: bool = True,
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Тақырыптан n кездейсоқ сұрақ (қайталаусыз), нұсқалары араластырылған.
+    weighted=true болса, бұрын қате жауап берілгендері жиірек түседі.
+    Бірдей seed бірдей жиынтық береді; seed берілмесе, жауапта қайтарылады.
+    """
+    if seed is None:
+        seed = random.SystemRandom().randrange(2**31)
+    rng = random.Random(seed)
+
+    ids = _practice_ids(topic_id, current_user["id"])
+    stats_buffer.record_attempt(topic_id)
+    weights = practice_misses.weights(current_user["id"], ids) if weighted else None
+    chosen = sample_ids(ids, n, rng, weights)
+
+    rows: List[Dict[str, Any]] = []
+    if chosen:
+        rows = supabase_exec(
+            get_supabase().table("quizzes")
+            .select("id,question,options,correct_answer,created_at,is_active")
+            .in_("id", chosen)
+            .eq("user_id", current_user["id"]),
+            ctx="practice_fetch",
+        )
+    by_id = {r["id"]: r for r in rows}
+
+    quizzes = [shuffle_options(by_id[qid], rng) for qid in chosen if qid in by_id]
+    return FastJSONResponse(
+        {
+            "seed": seed,
+            "total": len(ids),
+            "count": len(quizzes),
+            "quizzes": quizzes,
+        }
+    )
+
+
+SEARCH_PAGE_SIZE = 1000  # PostgREST max-rows әдепкі шегі
+
+
+def _load_user_quizzes_for_search(user_id: int) -> List[Dict[str, Any]]:
+    """Іздеу индексі үшін қолданушының барлық сұрақтары (id бойынша беттеп)."""
+    out: List[Dict[str, Any]] = []
+    last_id = 0
+    while True:
+        page = supabase_exec(
+            get_supabase().table("quizzes")
+            .select("id,topic_id,question,options,correct_answer,is_active")
+            .eq("user_id", user_id)
+            .gt("id", last_id)
+            .order("id", desc=False)
+            .limit(SEARCH_PAGE_SIZE),
+            ctx="search_index_load",
+        )
+        out.extend(page)
+        if len(page) < SEARCH_PAGE_SIZE:
+            return out
+        last_id = page[-1]["id"]
+
+
+@app.get("/api/quizzes/search")
+def search_quizzes(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Қолданушының барлық тақырыптарындағы сұрақтар мен нұсқалар бойынша іздеу.
+    Әр сөз префикс ретінде сәйкестенеді (регистр мен ё/е айырмашылығынсыз),
+    нәтижеде барлық сөз кездесуі керек.
+    """
+    results = quiz_search.search(
+        current_user["id"], q, _load_user_quizzes_for_search, limit=limit
+    )
+    return FastJSONResponse({"query": q, "count": len(results), "quizzes": results})
+
+
+@app.get("/api/topics/{topic_id}/analytics")
+def topic_analytics(
+    topic_id: int,
+    min_attempts: int = Query(0, ge=0),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Сұрақтар қиындығы: әр сұраққа жауап саны, дұрыс жауап үлесі және
+    ең жиі таңдалған қате нұсқа. Ең қиындары бірінші.
+    """
+    repo = get_repository()
+    if not repo.topic_owned(topic_id, current_user["id"], ctx="check_topic_owner(analytics)"):
+        raise HTTPException(
+            status_code=404,
+            detail="Тақырып табылмады немесе сізге тиесілі емес.",
+        )
+
+    cache_key = (topic_id, min_attempts)
+    cached = analytics_snapshots.get(cache_key)
+    if cached is not None:
+        return RawJSONResponse(cached)
+
+    body = dumps(build_topic_analytics(topic_id, min_attempts))
+    analytics_snapshots.set(cache_key, body)
+    return RawJSONResponse(body)
+
+
+@app.get("/api/review/next")
+def review_next(
+    n: int = Query(20, ge=1, le=100),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Қайталау уақыты жеткен сұрақтар (SM-2), ең ертеректегісі бірінші.
+    Жауап берілмейінше сұрақ кезекте қалады.
+    """
+    due = review_queue.next_due(current_user["id"], n)
+    if not due:
+        return FastJSONResponse({"count": 0, "quizzes": []})
+
+    rows = supabase_exec(
+        get_supabase().table("quizzes")
+        .select("id,topic_id,question,options,correct_answer,created_at,is_active")
+        .in_("id", [s.quiz_id for s in due])
+        .eq("user_id", current_user["id"]),
+        ctx="review_fetch",
+    )
+    by_id = {r["id"]: r for r in rows}
+    # Өшірілген сұрақтар кезектен алынады
+    missing = [s.quiz_id for s in due if s.quiz_id not in by_id]
+    if missing:
+        review_queue.forget(current_user["id"], missing)
+
+    quizzes = [
+        {
+            **by_id[s.quiz_id],
+            "review": {
+                "repetitions": s.repetitions,
+                "interval_days": s.interval_days,
+                "due_at": datetime.fromtimestamp(s.due_at, timezone.utc).isoformat(),
+            },
+        }
+        for s in due
+        if s.quiz_id in by_id and by_id[s.quiz_id].get("is_active") is not False
+    ]
+    return FastJSONResponse({"count": len(quizzes), "quizzes": quizzes})
+
+
 # ───────────────────────────────────────────────────────────
 # DOCX → QUIZ PREVIEW
 # ───────────────────────────────────────────────────────────
 
+# preview_id → {"user_id", "filename", "questions"}.
+# Bulk save сұрақтарды қайта жібермей, тек preview_id + түзетулерді береді.
+parse_previews: TTLCache[Dict[str, Any]] = TTLCache(
+    ttl_seconds=float(os.getenv("EASY_PREVIEW_TTL", "1800")),
+    max_items=int(os.getenv("EASY_PREVIEW_MAX", "256")),
+)
+
+
+def _store_preview(user_id: int, filename: str, questions: List[Dict[str, Any]]) -> str:
+    preview_id = uuid.uuid4().hex
+    parse_previews.set(preview_id, {"user_id": user_id, "filename": filename, "questions": questions})
+    return preview_id
+
+
 @app.post("/api/parse-docx")
 async def parse_docx_endpoint(
     file: UploadFile = File(...),
     debug: bool = False,
+    background: bool = False,
     current_user: dict = Depends(get_current_user),
 ):
     """
     .docx файлын оқып, frontend-ке алдын ала қарау үшін сұрақтарды қайтарады.
     DOCX-парсерді сәтті қолдану әр жолы 1 кредит жұмсайды.
+    background=true болса, файл фондық кезекке қойылып, бірден
+    202 + job_id қайтарылады; нәтиже GET /api/parse-jobs/{job_id} арқылы.
     """
     ext = os.path.splitext(file.filename or "")[1].lower()
     if ext != ".docx":
         raise HTTPException(status_code=400, detail="Тек .docx файл қабылданады.")
 
     # Алдымен кредит жеткілікті ме, соны тексереміз
-    require_credits(current_user["id"], 1)
+    await run_in_threadpool(require_credits, current_user["id"], 1)
 
     tmp_path = None
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".docx") as tmp:
-            shutil.copyfileobj(file.file, tmp)
-            tmp_path = tmp.name
-
-        blocks = parse_docx_with_answers(tmp_path, debug=debug)
-
-        if (not blocks) and legacy_process_docx:
-            try:
-                legacy = legacy_process_docx(tmp_path, debug=debug)
-            except TypeError:
-                legacy = legacy_process_docx(tmp_path)
-            blocks = [
-                {
-                    "question": (b.get("question") or "").strip(),
-                    "options": b.get("options") or [],
-                    "answer_index": b.get("answer_index"),
-                }
-                for b in (legacy or [])
-            ]
-
-        questions: List[dict] = []
-        for b in (blocks or []):
-            q_text = (b.get("question") or b.get("text") or "").strip()
-            raw_opts = b.get("options") or []
-            opts = [str(o).strip() for o in raw_opts if str(o).strip()]
+        if background:
+            # Жұмыс сұраныстан ұзақ жасайды — буферді дискке көшіреміз
+            with tempfile.NamedTemporaryFile(delete=False, suffix=".docx") as tmp:
+                shutil.copyfileobj(_upload_buffer(file), tmp)
+                tmp_path = tmp.name
+            job = parse_jobs.submit(current_user["id"], file.filename or "", tmp_path, debug=debug)
+            tmp_path = None  # файлды енді worker өшіреді
+            return JSONResponse(status_code=202, content=job.to_dict())
 
-            if not q_text or len(opts) < 2:
-                continue
-
-            item: Dict[str, Any] = {"text": q_text, "options": opts}
-            ai = b.get("answer_index")
-            if isinstance(ai, int) and 0 <= ai < len(opts):
-                item["answer_index"] = ai
-
-            questions.append(item)
+        questions = await run_in_threadpool(parse_docx_questions, _upload_buffer(file), debug)
 
         if not questions:
             raise HTTPException(
@@ -900,14 +1186,16 @@ async def parse_docx_endpoint(
             )
 
         # Сәтті парс жасалғаннан кейін ғана 1 кредит шегереміз
-        new_balance = change_credit_balance(
+        new_balance = await run_in_threadpool(
+            change_credit_balance,
             current_user["id"],
             delta=-1,
             reason=CreditReason.DOCX_PARSE,
             meta={"filename": file.filename, "questions": len(questions)},
         )
 
-        return {"questions": questions, "credit_balance": new_balance}
+        preview_id = _store_preview(current_user["id"], file.filename or "", questions)
+        return {"questions": questions, "preview_id": preview_id, "credit_balance": new_balance}
 
     except HTTPException:
         raise
@@ -923,10 +1211,382 @@ async def parse_docx_endpoint(
         except Exception:
             pass
 
+# ───────────────────────────────────────────────────────────
+# DOCX BATCH (ZIP / бірнеше файл) → NDJSON ағыны
+# ───────────────────────────────────────────────────────────
+
+MAX_BATCH_FILES = int(os.getenv("EASY_BATCH_MAX_FILES", "50"))
+# ZIP ішіндегі файлдардың ашылғандағы жалпы көлемі (zip bomb-тан қорғау)
+MAX_BATCH_UNCOMPRESSED_BYTES = int(os.getenv("EASY_BATCH_MAX_UNCOMPRESSED_BYTES", str(MAX_BATCH_BYTES)))
+PARSE_WORKERS = int(os.getenv("EASY_PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+
+@lru_cache(maxsize=1)
+def _parse_pool() -> ProcessPoolExecutor:
+    """DOCX парсингі CPU-ға ауыр — GIL-ден тыс, бөлек процестерде жүреді."""
+    return ProcessPoolExecutor(max_workers=PARSE_WORKERS)
+
+
+_parse_pool_lock = threading.Lock()
+
+
+def _reset_parse_pool(broken: ProcessPoolExecutor) -> None:
+    """
+    Worker процесі өлсе (мыс. OOM), pool біржола сынады — жаңасымен ауыстырамыз.
+    Бірнеше шақырушы бір уақытта байқауы мүмкін: тек сол сынған pool алынады.
+    """
+    with _parse_pool_lock:
+        if _parse_pool.cache_info().currsize and _parse_pool() is broken:
+            _parse_pool.cache_clear()
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _parse_isolated(path: str, debug: bool) -> List[Dict[str, Any]]:
+    """
+    Pool сынғаннан кейінгі бір қайталау — жеке процесте, басқа файлдармен
+    бөліспей: қайта құласа, BrokenProcessPool тек осы файлға қайтады.
+    """
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        return pool.submit(parse_docx_questions, path, debug).result()
+
+
+def _parse_docx_in_pool(path: str, debug: bool) -> List[Dict[str, Any]]:
+    """Синхронды (worker ағындарынан)."""
+    pool = _parse_pool()
+    try:
+        return pool.submit(parse_docx_questions, path, debug).result()
+    except BrokenProcessPool:
+        _reset_parse_pool(pool)
+    return _parse_isolated(path, debug)
+
+
+async def _parse_docx_in_pool_async(path: str, debug: bool) -> List[Dict[str, Any]]:
+    loop = asyncio.get_running_loop()
+    pool = _parse_pool()
+    try:
+        return await loop.run_in_executor(pool, parse_docx_questions, path, debug)
+    except BrokenProcessPool:
+        _reset_parse_pool(pool)
+    return await loop.run_in_executor(None, _parse_isolated, path, debug)
+
+
+@app.on_event("shutdown")
+def _shutdown_parse_pool() -> None:
+    if _parse_pool.cache_info().currsize:
+        _parse_pool().shutdown(wait=False, cancel_futures=True)
+
+
+def _is_docx_member(name: str) -> bool:
+    base = os.path.basename(name)
+    return (
+        name.lower().endswith(".docx")
+        and not name.startswith("__MACOSX/")
+        and not base.startswith(("~$", "."))
+    )
+
+
+class _TooLarge(Exception):
+    pass
+
+
+def _copy_limited(src: BinaryIO, out: BinaryIO, limit: int) -> int:
+    """src → out, limit байттан асса _TooLarge; ZIP-тегі file_size-қа сенбейміз."""
+    written = 0
+    while True:
+        chunk = src.read(64 * 1024)
+        if not chunk:
+            return written
+        written += len(chunk)
+        if written > limit:
+            raise _TooLarge()
+        out.write(chunk)
+
+
+def _collect_batch_files(files: List[UploadFile], workdir: str) -> List[Dict[str, Any]]:
+    """
+    Жүктелген .docx / .zip файлдарын workdir-ге шығарады.
+    Алдымен файл саны тексеріледі (дискке ештеңе жазылмай тұрып), сосын
+    әр файл нақты оқылған байт бойынша шектеледі (MAX_DOCX_BYTES), ал
+    бүкіл пакеттің ашылған көлемі — MAX_BATCH_UNCOMPRESSED_BYTES.
+    Қайтарады: [{"file": атау, "path": жол | None, "error": хабар | None}, ...]
+    """
+    # 1) Жоспар: (атау, declared өлшем, ашу функциясы) — әлі ештеңе жазылмайды
+    plan: List[Tuple[str, int, Any]] = []
+    archives: List[zipfile.ZipFile] = []
+    try:
+        for upload in files:
+            name = upload.filename or ""
+            ext = os.path.splitext(name)[1].lower()
+
+            if ext == ".docx":
+                upload.file.seek(0, os.SEEK_END)
+                size = upload.file.tell()
+                upload.file.seek(0)
+                plan.append((name, size, lambda f=upload.file: f))
+
+            elif ext == ".zip":
+                try:
+                    archive = zipfile.ZipFile(upload.file)
+                except zipfile.BadZipFile:
+                    raise HTTPException(status_code=400, detail=f"ZIP файлы дұрыс емес: {name}")
+                archives.append(archive)
+                for info in archive.infolist():
+                    if info.is_dir() or not _is_docx_member(info.filename):
+                        continue
+                    plan.append(
+                        (f"{name}/{info.filename}", info.file_size, lambda a=archive, i=info: a.open(i))
+                    )
+
+            else:
+                raise HTTPException(status_code=400, detail="Тек .docx немесе .zip файл қабылданады.")
+
+            if len(plan) > MAX_BATCH_FILES:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Бір реттік импортта {MAX_BATCH_FILES} файлдан аспау керек.",
+                )
+
+        if not plan:
+            raise HTTPException(status_code=400, detail="Файл таңдалмаған.")
+
+        # 2) Шығару: нақты байттар саналады
+        entries: List[Dict[str, Any]] = []
+        total = 0
+        for name, declared, open_src in plan:
+            if declared > MAX_DOCX_BYTES:
+                entries.append({"file": name, "path": None, "error": ERROR_MESSAGES["file_too_large"]})
+                continue
+            path = os.path.join(workdir, f"{len(entries):04d}.docx")
+            limit = min(MAX_DOCX_BYTES, MAX_BATCH_UNCOMPRESSED_BYTES - total)
+            try:
+                with open(path, "wb") as out:
+                    total += _copy_limited(open_src(), out, limit)
+            except _TooLarge:
+                os.unlink(path)
+                if limit < MAX_DOCX_BYTES:
+                    raise HTTPException(status_code=400, detail=ERROR_MESSAGES["batch_too_large"])
+                entries.append({"file": name, "path": None, "error": ERROR_MESSAGES["file_too_large"]})
+                continue
+            entries.append({"file": name, "path": path, "error": None})
+        return entries
+    finally:
+        for archive in archives:
+            archive.close()
+
+
+@app.post("/api/parse-docx/batch")
+async def parse_docx_batch_endpoint(
+    files: List[UploadFile] = File(...),
+    debug: bool = False,
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Бірнеше .docx немесе .docx-тері бар .zip қабылдайды.
+    Файлдар процестер пулында параллель оқылады, нәтиже әр файл
+    дайын болған сайын NDJSON жолы ретінде жіберіледі:
+      {"file": ..., "status": "ok", "questions": [...], "preview_id": ...}
+      {"file": ..., "status": "error", "detail": ...}
+      {"status": "done", "files": N, "parsed": K, "questions": Q, "credit_balance": B}
+    Кредит ағын басталмай тұрып оқылатын әр файлға 1-ден алдын ала шегеріледі
+    (жеткіліксіз болса — ағынсыз 403); сәтсіз немесе жіберілмей қалған
+    файлдардың кредиті соңында қайтарылады.
+    """
+    workdir = tempfile.mkdtemp(prefix="easy-batch-")
+    try:
+        entries = await run_in_threadpool(_collect_batch_files, files, workdir)
+        parseable = [e for e in entries if e["path"]]
+        reserved = len(parseable)
+        balance = await run_in_threadpool(get_credit_balance, current_user["id"])
+        if reserved:
+            balance = await run_in_threadpool(
+                change_credit_balance,
+                current_user["id"],
+                -reserved,
+                CreditReason.DOCX_PARSE,
+                {"batch": True, "reserved": reserved},
+            )
+    except BaseException:
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise
+
+    async def _parse_one(entry: Dict[str, Any]) -> Dict[str, Any]:
+        if entry["error"]:
+            return {"file": entry["file"], "status": "error", "detail": entry["error"]}
+        try:
+            questions = await _parse_docx_in_pool_async(entry["path"], debug)
+        except BrokenProcessPool:
+            # Жеке процестегі қайталау да құлады — кінәлі осы файл
+            return {"file": entry["file"], "status": "error", "detail": ERROR_MESSAGES["docx_worker_crashed"]}
+        except Exception as e:
+            return {
+                "file": entry["file"],
+                "status": "error",
+                "detail": f"Құжатты оқу мүмкін болмады: {e}",
+            }
+        if not questions:
+            return {"file": entry["file"], "status": "error", "detail": ERROR_MESSAGES["docx_no_questions"]}
+        preview_id = _store_preview(current_user["id"], entry["file"], questions)
+        return {"file": entry["file"], "status": "ok", "questions": questions, "preview_id": preview_id}
+
+    def _refund(count: int, parsed_files: List[str]) -> int:
+        return change_credit_balance(
+            current_user["id"],
+            count,
+            CreditReason.DOCX_PARSE,
+            {"batch": True, "refund": count, "files": parsed_files},
+        )
+
+    async def _stream():
+        parsed_files: List[str] = []
+        total_questions = 0
+        settled = False
+        tasks = [asyncio.ensure_future(_parse_one(e)) for e in entries]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                line = await next_done
+                if line["status"] == "ok":
+                    # Жол жіберілген сәттен бастап кредит қайтарылмайды
+                    parsed_files.append(line["file"])
+                    total_questions += len(line["questions"])
+                yield dumps(line) + b"\n"
+
+            final_balance = balance
+            unused = reserved - len(parsed_files)
+            if unused:
+                final_balance = await run_in_threadpool(_refund, unused, parsed_files)
+            settled = True
+
+            yield dumps(
+                {
+                    "status": "done",
+                    "files": len(entries),
+                    "parsed": len(parsed_files),
+                    "questions": total_questions,
+                    "credit_balance": final_balance,
+                }
+            ) + b"\n"
+        finally:
+            for t in tasks:
+                t.cancel()
+            shutil.rmtree(workdir, ignore_errors=True)
+            unused = reserved - len(parsed_files)
+            if not settled and unused:
+                # Клиент ортада үзілді: жіберілмеген файлдардың кредиті қайтарылады.
+                # Генератор жабылып жатқанда await сенімсіз — фонда орындаймыз.
+                asyncio.get_running_loop().run_in_executor(None, _refund, unused, list(parsed_files))
+
+    return StreamingResponse(_stream(), media_type="application/x-ndjson")
+
+
+# ───────────────────────────────────────────────────────────
+# DOCX → ФОНДЫҚ PARSE JOBS
+# ───────────────────────────────────────────────────────────
+
+def _remove_file(path: Optional[str]) -> None:
+    try:
+        if path and os.path.exists(path):
+            os.unlink(path)
+    except Exception:
+        pass
+
+
+def _run_parse_job(job: ParseJob) -> Dict[str, Any]:
+    """Worker ағынында: оқу → (сәтті болса ғана) 1 кредит шегеру."""
+    try:
+        try:
+            questions = _parse_docx_in_pool(job.path, job.debug)
+        except BrokenProcessPool:
+            raise HTTPException(status_code=400, detail=ERROR_MESSAGES["docx_worker_crashed"])
+        if not questions:
+            raise HTTPException(
+                status_code=400,
+                detail="Сұрақ табылмады. DOCX форматты тексер.",
+            )
+
+        job.set_stage("charging")
+        new_balance = change_credit_balance(
+            job.user_id,
+            delta=-1,
+            reason=CreditReason.DOCX_PARSE,
+            meta={"filename": job.filename, "questions": len(questions), "job_id": job.id},
+        )
+        preview_id = _store_preview(job.user_id, job.filename, questions)
+        return {"questions": questions, "preview_id": preview_id, "credit_balance": new_balance}
+    finally:
+        _remove_file(job.path)
+
+
+parse_jobs = ParseJobQueue(
+    _run_parse_job,
+    workers=int(os.getenv("EASY_PARSE_JOB_WORKERS", "2")),
+    max_pending=int(os.getenv("EASY_PARSE_JOB_QUEUE", "32")),
+    result_ttl=float(os.getenv("EASY_PARSE_JOB_TTL", "900")),
+    on_discard=lambda job: _remove_file(job.path),
+)
+
+
+@app.on_event("shutdown")
+def _shutdown_parse_jobs() -> None:
+    parse_jobs.shutdown()
+
+
+@app.get("/api/parse-jobs/{job_id}")
+def get_parse_job(
+    job_id: str,
+    current_user: dict = Depends(get_current_user),
+):
+    """Фондық parse жұмысының күйі, прогресі және (дайын болса) нәтижесі."""
+    job = parse_jobs.get(job_id, current_user["id"])
+    if job is None:
+        raise HTTPException(status_code=404, detail="Жұмыс табылмады немесе мерзімі өтті.")
+    return job.to_dict()
+
+
 # ───────────────────────────────────────────────────────────
 # DOCX/BULK → QUIZZES SAVE
 # ───────────────────────────────────────────────────────────
 
+BulkItem = Optional[Tuple[str, List[str], Optional[int]]]
+
+
+def _bulk_items(payload: BulkSaveRequest, user_id: int) -> List[BulkItem]:
+    """
+    Сақталатын сұрақтар: (question, options, answer_index).
+    preview_id берілсе — серверде сақталған нәтиже + edits (индекстер
+    алдын ала қараудағы ретпен; өшірілгені None болып қалады).
+    """
+    if payload.preview_id is None:
+        return [(q.question, q.options, q.answer_index) for q in payload.quizzes]
+
+    if payload.quizzes:
+        raise HTTPException(status_code=400, detail="quizzes пен preview_id бірге жіберілмейді.")
+
+    preview = parse_previews.get(payload.preview_id)
+    if preview is None or preview["user_id"] != user_id:
+        raise HTTPException(status_code=404, detail=ERROR_MESSAGES["preview_not_found"])
+
+    items: List[BulkItem] = [
+        (q["text"], q["options"], q.get("answer_index")) for q in preview["questions"]
+    ]
+    for edit in payload.edits:
+        if edit.index >= len(items):
+            raise HTTPException(status_code=400, detail=f"Түзету индексі дұрыс емес: {edit.index}")
+        current = items[edit.index]
+        if edit.removed or current is None:
+            items[edit.index] = None
+            continue
+        question, options, answer_index = current
+        changed = edit.model_fields_set
+        if "question" in changed:
+            question = edit.question or ""
+        if "options" in changed:
+            options = edit.options or []
+        if "answer_index" in changed:
+            answer_index = edit.answer_index
+        items[edit.index] = (question, options, answer_index)
+    return items
+
+
 @app.post("/api/topics/{topic_id}/quizzes/bulk")
 def save_quizzes_bulk(
     topic_id: int,
@@ -935,9 +1595,10 @@ def save_quizzes_bulk(
 ):
     """
     DOCX-тен алынған бірнеше сұрақты бірден берілген topic-ке сақтау.
+    Сұрақтарды қайта жібермеу үшін preview_id (+ edits) беруге болады.
     """
     topic = supabase_exec(
-        supabase.table("topics")
+        get_supabase().table("topics")
         .select("id")
         .eq("id", topic_id)
         .eq("user_id", current_user["id"])
@@ -950,28 +1611,44 @@ def save_quizzes_bulk(
             detail="Тақырып табылмады немесе сізге тиесілі емес.",
         )
 
-    if not payload.quizzes:
+    items = _bulk_items(payload, current_user["id"])
+    if not items:
         raise HTTPException(status_code=400, detail="Сақтайтын сұрақтар тізімі бос.")
 
     rows_to_insert: List[dict] = []
+    fingerprints: List[str] = []
+    duplicates: List[int] = []
+    existing_fps = topic_fingerprints.get(topic_id, _load_topic_quizzes_for_index)
+    batch_fps: set = set()
 
-    for item in payload.quizzes:
-        question = (item.question or "").strip()
+    for pos, item in enumerate(items):
+        if item is None:  # түзетуде өшірілген
+            continue
+        raw_question, raw_options, answer_index = item
+        question = (raw_question or "").strip()
         options = [
             (o or "").strip()
-            for o in (item.options or [])
+            for o in (raw_options or [])
             if (o or "").strip()
         ]
         if not question or len(options) < 2:
             continue
 
+        # Тақырыпта бар немесе осы пакетте қайталанған сұрақ
+        fingerprint = quiz_fingerprint(question, options)
+        if fingerprint in existing_fps or fingerprint in batch_fps:
+            duplicates.append(pos)
+            if payload.skip_duplicates:
+                continue
+        batch_fps.add(fingerprint)
+
         correct_answer: Optional[str] = None
         if (
-            item.answer_index is not None
-            and isinstance(item.answer_index, int)
-            and 0 <= item.answer_index < len(options)
+            answer_index is not None
+            and isinstance(answer_index, int)
+            and 0 <= answer_index < len(options)
         ):
-            correct_answer = options[item.answer_index]
+            correct_answer = options[answer_index]
 
         rows_to_insert.append(
             {
@@ -984,22 +1661,31 @@ def save_quizzes_bulk(
                 "created_at": datetime.now(timezone.utc).isoformat(),
             }
         )
+        fingerprints.append(fingerprint)
 
     if not rows_to_insert:
+        if duplicates:
+            # Барлық сұрақ тақырыпта бұрыннан бар — сақтайтын ештеңе жоқ
+            return {
+                "count": 0,
+                "ids": [],
+                "quizzes": [],
+                "duplicates": duplicates,
+            }
         raise HTTPException(
             status_code=400,
             detail="Жарамды сұрақ табылмады.",
         )
 
     rows = supabase_exec(
-        supabase.table("quizzes").insert(rows_to_insert),
+        get_supabase().table("quizzes").insert(rows_to_insert),
         ctx="bulk_insert_quizzes",
     )
 
     # Егер returning=minimal болса — жуырда қосылғандарды оқып аламыз
     if not rows:
         rows = supabase_exec(
-            supabase.table("quizzes")
+            get_supabase().table("quizzes")
             .select("id,question,options,correct_answer,topic_id,user_id,created_at,is_active")
             .eq("topic_id", topic_id)
             .eq("user_id", current_user["id"])
@@ -1007,31 +1693,76 @@ def save_quizzes_bulk(
             .limit(len(rows_to_insert)),
             ctx="select_bulk_quizzes_after_insert",
         )
+        rows.reverse()  # соңғы N жол, қосылу ретімен (id өсуі бойынша)
+
+    ids: List[int] = [q["id"] for q in rows if "id" in q]
+
+    if len(ids) == len(fingerprints):
+        # Индекс жолдың өз мазмұнынан — қайта оқылған жолдардың реті маңызды емес
+        for q in rows:
+            topic_fingerprints.add(topic_id, quiz_fingerprint(q["question"], q["options"] or []), q["id"])
+    else:
+        topic_fingerprints.invalidate(topic_id)
+    _invalidate_quiz_snapshots(current_user["id"], topic_id)
+    quiz_search.add(current_user["id"], rows)
+    if payload.preview_id:
+        parse_previews.pop(payload.preview_id)
+
+    return FastJSONResponse(
+        {
+            "count": len(rows_to_insert),
+            "ids": ids,
+            "quizzes": rows,
+            "duplicates": duplicates,  # quizzes / preview ішіндегі қайталанған индекстер
+        }
+    )
 
-    cleaned: List[dict] = []
-    ids: List[int] = []
 
-    for q in rows or []:
-        opts = q.get("options") or []
-        if isinstance(opts, str):
-            try:
-                parsed = json.loads(opts)
-                if isinstance(parsed, list):
-                    opts = parsed
-                else:
-                    opts = [str(parsed)]
-            except Exception:
-                opts = [x.strip() for x in opts.split(";") if x.strip()]
-        q["options"] = opts
-        cleaned.append(q)
-        if "id" in q:
-            ids.append(q["id"])
+@app.post("/api/topics/{topic_id}/quizzes/dedupe")
+def dedupe_topic_quizzes(
+    topic_id: int,
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Тақырыптағы қайталанған сұрақтарды өшіру.
+    Әр сұрақтың ең алғаш қосылған нұсқасы қалады.
+    """
+    topic = supabase_exec(
+        get_supabase().table("topics")
+        .select("id")
+        .eq("id", topic_id)
+        .eq("user_id", current_user["id"])
+        .limit(1),
+        ctx="check_topic_owner(dedupe)",
+    )
+    if not topic:
+        raise HTTPException(
+            status_code=404,
+            detail="Тақырып табылмады немесе сізге тиесілі емес.",
+        )
 
-    return {
-        "count": len(rows_to_insert),
-        "ids": ids,
-        "quizzes": cleaned,
-    }
+    rows = _load_topic_quizzes_for_index(topic_id)
+    dup_ids = find_duplicate_ids(rows)
+
+    # PostgREST URL ұзындығына сыю үшін бөліп өшіреміз;
+    # tombstone әр бөлік сәтті өшірілгеннен кейін ғана жазылады
+    for start in range(0, len(dup_ids), 200):
+        chunk = dup_ids[start:start + 200]
+        supabase_exec(
+            get_supabase().table("quizzes")
+            .delete()
+            .in_("id", chunk)
+            .eq("user_id", current_user["id"]),
+            ctx="delete_duplicate_quizzes",
+        )
+        record_tombstones(current_user["id"], "quiz", chunk)
+
+    topic_fingerprints.invalidate(topic_id)
+    _invalidate_quiz_snapshots(current_user["id"], topic_id)
+    quiz_search.remove(current_user["id"], dup_ids)
+    review_queue.forget(current_user["id"], dup_ids)
+
+    return {"removed": len(dup_ids), "kept": len(rows) - len(dup_ids)}
 
 # =================================================
 # FeedBack
@@ -1056,14 +1787,14 @@ def add_feedback(
     }
 
     rows = supabase_exec(
-        supabase.table("feedback").insert(row),
+        get_supabase().table("feedback").insert(row),
         ctx="insert_feedback",
     )
 
     if not rows:
         # returning=minimal болса, соңғы feedback-ті оқимыз
         rows = supabase_exec(
-            supabase.table("feedback")
+            get_supabase().table("feedback")
             .select("id,user_id,text,page,rating,created_at")
             .eq("user_id", current_user["id"])
             .order("id", desc=True)
@@ -1096,7 +1827,7 @@ def add_feedback(
 def list_feedback(current_user: dict = Depends(get_current_user)):
     """Тек осы қолданушы қалдырған пікірлер тізімін қайтарады."""
     rows = supabase_exec(
-        supabase.table("feedback")
+        get_supabase().table("feedback")
         .select("id,text,page,rating,created_at")
         .eq("user_id", current_user["id"])
         .order("created_at", desc=True)
@@ -1118,12 +1849,15 @@ class CreditReason:
 
 def get_credit_balance(user_id: int) -> int:
     """users.credit_balance өрісін қауіпсіз оқу."""
+    # Баланс оқу → жазу тізбегінде қолданылады: бөтен шақырудың
+    # (жазудан бұрын басталған) нәтижесін алмауы үшін біріктірмейміз
     rows = supabase_exec(
-        supabase.table("users")
+        get_supabase().table("users")
         .select("credit_balance")
         .eq("id", user_id)
         .limit(1),
         ctx="get_credit_balance",
+        coalesce=False,
     )
     if not rows:
         return 0
@@ -1151,7 +1885,7 @@ def add_credit_log(
     # Журналдағы қате негізгі логиканы тоқтатпауы үшін soft-fail логикасы:
     try:
         supabase_exec(
-            supabase.table("credit_logs").insert(payload),
+            get_supabase().table("credit_logs").insert(payload),
             ctx="add_credit_log",
         )
     except HTTPException:
@@ -1175,7 +1909,7 @@ def change_credit_balance(
         )
 
     supabase_exec(
-        supabase.table("users")
+        get_supabase().table("users")
         .update({"credit_balance": new_balance})
         .eq("id", user_id),
         ctx="change_credit_balance",
@@ -1212,7 +1946,7 @@ def get_credits(current_user: dict = Depends(get_current_user)):
     balance = get_credit_balance(user_id)
 
     rows = supabase_exec(
-        supabase.table("credit_logs")
+        get_supabase().table("credit_logs")
         .select("id,amount,reason,meta,created_at")
         .eq("user_id", user_id)
         .order("created_at", desc=True)
@@ -1234,41 +1968,52 @@ def get_credits(current_user: dict = Depends(get_current_user)):
         elif amount < 0:
             total_spent += amount
 
-    return {
-        "balance": balance,
-        "summary": summary,        # мысалы: {"registration": 3, "feedback": 2, "docx_parse": -4}
-        "total_earned": total_earned,
-        "total_spent": total_spent,
-        "logs": rows,              # соңғы 200 жазба
-    }
+    return FastJSONResponse(
+        {
+            "balance": balance,
+            "summary": summary,        # мысалы: {"registration": 3, "feedback": 2, "docx_parse": -4}
+            "total_earned": total_earned,
+            "total_spent": total_spent,
+            "logs": rows,              # соңғы 200 жазба
+        }
+    )
 
 
 # ───────────────────────────────────────────────────────────
 # GLOBAL ERROR HANDLER (қазақша аударма)
+# Middleware емес, exception handler: сәтті сұраныстарға ешқандай
+# қосымша құн жоқ, StreamingResponse те бұзылмайды.
 # ───────────────────────────────────────────────────────────
 
-@app.middleware("http")
-async def global_error_mapper(request, call_next):
-    try:
-        return await call_next(request)
-
-    except HTTPException as e:
-        # Егер detail — жүйелік қате, оны қазақшаға аударамыз
-        detail = e.detail
-        if isinstance(detail, str):
-            translated = map_error(detail)
-        else:
-            translated = "Күтпеген қате пайда болды."
+@app.exception_handler(StarletteHTTPException)
+async def http_error_translator(request: Request, exc: StarletteHTTPException):
+    """
+    4xx detail-дар қолданушыға арналған (қазақша) — өзгертпей қайтарамыз.
+    5xx detail-дар жүйелік мәтін ("Supabase error (...)") — кодқа аударамыз.
+    """
+    headers = getattr(exc, "headers", None)
+    detail = exc.detail
 
+    if exc.status_code < 500:
         return JSONResponse(
-            status_code=e.status_code,
-            content={"detail": translated}
+            status_code=exc.status_code,
+            content={"detail": detail},
+            headers=headers,
         )
 
-    except Exception as e:
-        # Кез келген күтпеген қате → қазақша стандарт хабар
-        translated = map_error(str(e))
-        return JSONResponse(
-            status_code=500,
-            content={"detail": translated}
-        )
+    code = error_code(detail) if isinstance(detail, str) else "unknown_error"
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": ERROR_MESSAGES[code], "code": code},
+        headers=headers,
+    )
+
+
+@app.exception_handler(Exception)
+async def unhandled_error_translator(request: Request, exc: Exception):
+    # Кез келген күтпеген қате → қазақша стандарт хабар
+    code = error_code(str(exc))
+    return JSONResponse(
+        status_code=500,
+        content={"detail": ERROR_MESSAGES[code], "code": code},
+    )
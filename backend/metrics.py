@@ -0,0 +1,204 @@
+# metrics.py
+# Сұраныс латенттілігі және Supabase шақырулары бойынша метрикалар.
+#
+# - easy_http_request_duration_seconds{method,route,status} — гистограмма
+# - easy_db_call_duration_seconds{ctx,outcome}              — гистограмма
+# - easy_db_calls_per_request{route}                        — гистограмма (N+1 іздеу үшін)
+# - easy_db_coalesced_total{ctx}                            — басқа шақырудың нәтижесін
+#                                                             бөліскен оқулар саны
+#
+# /metrics эндпоинті бәрін Prometheus text форматында қайтарады.
+
+from __future__ import annotations
+
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+COUNT_BUCKETS: Tuple[float, ...] = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+
+class Histogram:
+    """Prometheus стиліндегі жинақталған (cumulative) гистограмма."""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # labels → [bucket_counts..., sum, count]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        out = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        for labels, series in items:
+            base = _format_labels(self.label_names, labels)
+            for bound, count in zip(self.buckets, series):
+                out.append(f"{self.name}_bucket{_with_le(base, _fmt(bound))} {_fmt(count)}")
+            out.append(f"{self.name}_bucket{_with_le(base, '+Inf')} {_fmt(series[-1])}")
+            out.append(f"{self.name}_sum{base} {series[-2]!r}")
+            out.append(f"{self.name}_count{base} {_fmt(series[-1])}")
+        return out
+
+
+class Counter:
+    """Prometheus counter (тек өседі)."""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._series: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple[str, ...], amount: float = 1.0) -> None:
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        out = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._series.items())
+        for labels, value in items:
+            out.append(f"{self.name}{_format_labels(self.label_names, labels)} {_fmt(value)}")
+        return out
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _with_le(base: str, le: str) -> str:
+    if not base:
+        return f'{{le="{le}"}}'
+    return base[:-1] + f',le="{le}"}}'
+
+
+def _fmt(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+HTTP_LATENCY = Histogram(
+    "easy_http_request_duration_seconds",
+    "HTTP request latency by route.",
+    ("method", "route", "status"),
+    LATENCY_BUCKETS,
+)
+DB_LATENCY = Histogram(
+    "easy_db_call_duration_seconds",
+    "Supabase call latency by ctx.",
+    ("ctx", "outcome"),
+    LATENCY_BUCKETS,
+)
+DB_CALLS_PER_REQUEST = Histogram(
+    "easy_db_calls_per_request",
+    "Number of Supabase calls made while serving one request.",
+    ("route",),
+    COUNT_BUCKETS,
+)
+
+DB_COALESCED = Counter(
+    "easy_db_coalesced_total",
+    "Supabase reads served from a concurrent identical in-flight call.",
+    ("ctx",),
+)
+
+RATE_LIMITED = Counter(
+    "easy_rate_limited_total",
+    "Requests rejected with 429 by the token-bucket rate limiter.",
+    ("route", "scope"),
+)
+
+ALL_METRICS: List[Any] = [HTTP_LATENCY, DB_LATENCY, DB_CALLS_PER_REQUEST, DB_COALESCED, RATE_LIMITED]
+
+# Ағымдағы сұраныстың DB-шақыру санауышы.
+# Sync эндпоинттер threadpool-да жүреді, контекст көшіріледі —
+# сондықтан int емес, өзгермелі list ұстаймыз.
+_request_db_calls: ContextVar[Optional[List[int]]] = ContextVar("easy_request_db_calls", default=None)
+
+
+def observe_db_call(ctx: str, duration: float, ok: bool) -> None:
+    DB_LATENCY.observe((ctx or "unknown", "ok" if ok else "error"), duration)
+    counter = _request_db_calls.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+def observe_coalesced(ctx: str) -> None:
+    DB_COALESCED.inc((ctx or "unknown",))
+
+
+def observe_rate_limited(route: str, scope: str) -> None:
+    RATE_LIMITED.inc((route, scope))
+
+
+def render_prometheus() -> str:
+    lines: List[str] = []
+    for metric in ALL_METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    Таза ASGI middleware: әр HTTP сұраныстың уақытын және
+    оның ішіндегі Supabase шақыруларының санын жазады.
+    """
+
+    def __init__(self, app, skip_paths: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.skip_paths = set(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path") in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        counter = [0]
+        token = _request_db_calls.set(counter)
+        status_holder = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            _request_db_calls.reset(token)
+            route = scope.get("route")
+            # Маршрут үлгісі ("/api/topics/{topic_id}/quizzes") — кардиналдылық төмен
+            route_path = getattr(route, "path", None) or "unmatched"
+            HTTP_LATENCY.observe(
+                (scope.get("method", ""), route_path, str(status_holder[0])),
+                duration,
+            )
+            DB_CALLS_PER_REQUEST.observe((route_path,), counter[0])
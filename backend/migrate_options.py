@@ -0,0 +1,104 @@
+# migrate_options.py
+"""
+quizzes.options өрісін бір рет канондық JSON-массивке көшіру.
+
+Ескі жазбаларда options JSON-мәтін ('["A) ..", "B) .."]') немесе
+"A) ..;B) .." түрінде сақталған. Көшіруден кейін API оқу кезінде
+ешқандай түрлендіру жасамайды — options әрқашан list[str].
+
+Қолдану (backend/ ішінен):
+    python migrate_options.py --dry-run
+    python migrate_options.py --batch-size 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from typing import Any, List, Optional
+
+UPSERT_CHUNK = 500  # бір upsert сұранысындағы жол саны
+
+
+def decode_legacy_options(opts: Any) -> Optional[List[str]]:
+    """
+    Ескі форматтағы options-ты тізімге айналдыру.
+    Өзгертуді қажет етпейтін (онсыз да list) мән үшін None қайтарады.
+    """
+    if isinstance(opts, list):
+        return None
+    if opts is None:
+        return []
+    if isinstance(opts, str):
+        try:
+            parsed = json.loads(opts)
+            if isinstance(parsed, list):
+                return [str(x) for x in parsed]
+            return [str(parsed)]
+        except Exception:
+            return [x.strip() for x in opts.split(";") if x.strip()]
+    return [str(opts)]
+
+
+def migrate_options(client, batch_size: int = 500, dry_run: bool = False) -> dict:
+    """
+    quizzes кестесін id бойынша беттеп оқып, ескі options-ты қайта жазады —
+    әр бет бір (немесе бірнеше бөлік) upsert-пен, жол сайын update емес.
+    Қайтарады: {"scanned": N, "migrated": M}
+    """
+    scanned = 0
+    migrated = 0
+    last_id = 0
+
+    while True:
+        res = (
+            client.table("quizzes")
+            .select("id,question,options")
+            .gt("id", last_id)
+            .order("id", desc=False)
+            .limit(batch_size)
+            .execute()
+        )
+        rows = getattr(res, "data", None) or []
+        if not rows:
+            break
+
+        # question NOT NULL: upsert-тің insert бөлігі тексерілетіндіктен бірге жібереміз
+        changed = []
+        for row in rows:
+            new_opts = decode_legacy_options(row.get("options"))
+            if new_opts is not None:
+                changed.append({"id": row["id"], "question": row["question"], "options": new_opts})
+        migrated += len(changed)
+        if not dry_run:
+            for start in range(0, len(changed), UPSERT_CHUNK):
+                (
+                    client.table("quizzes")
+                    .upsert(changed[start:start + UPSERT_CHUNK], on_conflict="id")
+                    .execute()
+                )
+
+        scanned += len(rows)
+        last_id = rows[-1]["id"]
+        print(f"[migrate_options] scanned={scanned} migrated={migrated} last_id={last_id}")
+
+        if len(rows) < batch_size:
+            break
+
+    return {"scanned": scanned, "migrated": migrated}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="quizzes.options → JSON массив")
+    ap.add_argument("--batch-size", type=int, default=500)
+    ap.add_argument("--dry-run", action="store_true", help="тек санау, жазбау")
+    args = ap.parse_args()
+
+    from database import get_supabase
+
+    result = migrate_options(get_supabase(), batch_size=args.batch_size, dry_run=args.dry_run)
+    print(f"[migrate_options] done: {result}")
+
+
+if __name__ == "__main__":
+    main()
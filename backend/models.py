@@ -1,6 +1,6 @@
 # models.py
 from datetime import datetime, timedelta
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, JSON, Float, Index, BigInteger
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from database import Base
@@ -19,6 +19,10 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
     is_verified = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    credit_balance = Column(Integer, default=3, nullable=False)
+    # availability.py курсоры: bump_sync_change триггері (username ауысуы да)
+    change_seq = Column(BigInteger, index=True)
+    changed_at = Column(DateTime)
 
     codes = relationship("VerificationCode", back_populates="user", cascade="all, delete-orphan")
     activities = relationship("UserActivity", back_populates="user", cascade="all, delete-orphan")
@@ -56,7 +60,12 @@ class Subject(Base):
     __table_args__ = {"schema": "public"}
 
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, nullable=False, unique=True)
+    name = Column(String, nullable=False)  # атау бір қолданушы ішінде ғана бірегей
+    user_id = Column(Integer, ForeignKey("public.users.id", ondelete="CASCADE"), index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # delta sync курсоры: Postgres триггері әр insert/update сайын толтырады
+    change_seq = Column(BigInteger, index=True)
+    changed_at = Column(DateTime)
     topics = relationship("Topic", back_populates="subject", cascade="all, delete-orphan")
 
 
@@ -67,6 +76,11 @@ class Topic(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
     subject_id = Column(Integer, ForeignKey("public.subjects.id", ondelete="CASCADE"))
+    user_id = Column(Integer, ForeignKey("public.users.id", ondelete="CASCADE"), index=True)
+    attempt_count = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    change_seq = Column(BigInteger, index=True)
+    changed_at = Column(DateTime)
     subject = relationship("Subject", back_populates="topics")
     quizzes = relationship("Quiz", back_populates="topic", cascade="all, delete-orphan")
 
@@ -77,7 +91,65 @@ class Quiz(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     question = Column(Text, nullable=False)  # ұзын сұрақтарға
-    options = Column(JSONB, nullable=False)  # PostgreSQL JSONB – жылдам, индекстеледі
+    # PostgreSQL JSONB – жылдам, индекстеледі (SQLite-та қарапайым JSON)
+    options = Column(JSON().with_variant(JSONB, "postgresql"), nullable=False)
     correct_answer = Column(String, nullable=True)
-    topic_id = Column(Integer, ForeignKey("public.topics.id", ondelete="CASCADE"))
+    topic_id = Column(Integer, ForeignKey("public.topics.id", ondelete="CASCADE"), index=True)
+    user_id = Column(Integer, ForeignKey("public.users.id", ondelete="CASCADE"), index=True)
+    is_active = Column(Boolean, default=True, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    change_seq = Column(BigInteger, index=True)
+    changed_at = Column(DateTime)
     topic = relationship("Topic", back_populates="quizzes")
+
+
+class SyncTombstone(Base):
+    """
+    /api/sync үшін өшірілген жазбалардың іздері (delta sync).
+    Клиент курсоры id бойынша жылжиды (соңғы settle терезесінен ескілері ғана).
+    """
+    __tablename__ = "sync_tombstones"
+    __table_args__ = {"schema": "public"}
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("public.users.id", ondelete="CASCADE"), index=True)
+    entity = Column(String, nullable=False)  # subject | topic | quiz
+    entity_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class QuizStat(Base):
+    """
+    Сұрақ бойынша дұрыс/қате жауаптар саны (stats_buffer.py жинақтап жазады).
+    """
+    __tablename__ = "quiz_stats"
+    __table_args__ = {"schema": "public"}
+
+    quiz_id = Column(Integer, ForeignKey("public.quizzes.id", ondelete="CASCADE"), primary_key=True)
+    topic_id = Column(Integer, ForeignKey("public.topics.id", ondelete="CASCADE"), index=True)
+    user_id = Column(Integer, ForeignKey("public.users.id", ondelete="CASCADE"), index=True)
+    correct_count = Column(Integer, default=0, nullable=False)
+    wrong_count = Column(Integer, default=0, nullable=False)
+    # {"нұсқа индексі": қате таңдалу саны}
+    wrong_options = Column(JSON().with_variant(JSONB, "postgresql"), default=dict, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class ReviewItem(Base):
+    """
+    Аралықты қайталау (SM-2) күйі, (user, quiz) жұбына бір жол.
+    (user_id, due_at) индексі — келесі қайталанатын сұрақтар үшін.
+    """
+    __tablename__ = "review_items"
+    __table_args__ = (
+        Index("ix_review_items_user_due", "user_id", "due_at"),
+        {"schema": "public"},
+    )
+
+    user_id = Column(Integer, ForeignKey("public.users.id", ondelete="CASCADE"), primary_key=True)
+    quiz_id = Column(Integer, ForeignKey("public.quizzes.id", ondelete="CASCADE"), primary_key=True)
+    topic_id = Column(Integer, nullable=True)
+    repetitions = Column(Integer, default=0, nullable=False)
+    interval_days = Column(Float, default=0.0, nullable=False)
+    ease = Column(Float, default=2.5, nullable=False)
+    due_at = Column(DateTime, nullable=False)
@@ -0,0 +1,150 @@
+# parse_jobs.py
+# Үлкен DOCX файлдарын фондық режимде оқу.
+#
+# submit() жұмысты шектеулі кезекке қояды да, бірден job id қайтарады.
+# Worker ағындары кезектен алып, handler(job) шақырады. Нәтиже
+# result_ttl секунд сақталады, кейін тазаланады.
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException
+
+# Кезеңдер және олардың шамамен прогресі
+STAGE_PROGRESS = {
+    "queued": 0.0,
+    "parsing": 0.1,
+    "charging": 0.9,
+    "done": 1.0,
+    "failed": 1.0,
+}
+
+
+@dataclass
+class ParseJob:
+    id: str
+    user_id: int
+    filename: str
+    path: str
+    debug: bool = False
+    status: str = "queued"
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    def set_stage(self, status: str) -> None:
+        self.status = status
+
+    def to_dict(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {
+            "job_id": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "progress": STAGE_PROGRESS.get(self.status, 0.0),
+        }
+        if self.result is not None:
+            out["result"] = self.result
+        if self.error is not None:
+            out["detail"] = self.error
+        return out
+
+
+class ParseJobQueue:
+    """Процесс ішіндегі шектеулі кезек + worker ағындары."""
+
+    def __init__(
+        self,
+        handler: Callable[[ParseJob], Dict[str, Any]],
+        workers: int = 2,
+        max_pending: int = 32,
+        result_ttl: float = 900.0,
+        on_discard: Optional[Callable[[ParseJob], None]] = None,
+    ):
+        self.handler = handler
+        self.workers = workers
+        self.result_ttl = result_ttl
+        self.on_discard = on_discard
+        self._queue: "queue.Queue[Optional[ParseJob]]" = queue.Queue(maxsize=max_pending)
+        self._jobs: Dict[str, ParseJob] = {}
+        self._lock = threading.Lock()
+        self._threads: list[threading.Thread] = []
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                t = threading.Thread(target=self._run, name=f"parse-job-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            try:
+                job.set_stage("parsing")
+                job.result = self.handler(job)
+                job.set_stage("done")
+            except HTTPException as e:
+                job.error = e.detail if isinstance(e.detail, str) else str(e.detail)
+                job.set_stage("failed")
+            except Exception as e:
+                job.error = f"Құжатты оқу мүмкін болмады: {e}"
+                job.set_stage("failed")
+            finally:
+                job.finished_at = time.time()
+                self._queue.task_done()
+
+    def _sweep(self) -> None:
+        now = time.time()
+        with self._lock:
+            expired = [
+                jid for jid, j in self._jobs.items()
+                if j.finished_at is not None and now - j.finished_at > self.result_ttl
+            ]
+            for jid in expired:
+                del self._jobs[jid]
+
+    def submit(self, user_id: int, filename: str, path: str, debug: bool = False) -> ParseJob:
+        self._ensure_started()
+        self._sweep()
+        job = ParseJob(id=uuid.uuid4().hex, user_id=user_id, filename=filename, path=path, debug=debug)
+        with self._lock:
+            self._jobs[job.id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self._jobs.pop(job.id, None)
+            if self.on_discard:
+                self.on_discard(job)
+            raise HTTPException(
+                status_code=503,
+                detail="Сервер қазір бос емес. Біраз уақыттан соң қайталап көріңіз.",
+                headers={"Retry-After": "10"},
+            )
+        return job
+
+    def get(self, job_id: str, user_id: int) -> Optional[ParseJob]:
+        self._sweep()
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or job.user_id != user_id:
+            return None
+        return job
+
+    def shutdown(self) -> None:
+        for _ in self._threads:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break  # daemon ағындар процеспен бірге тоқтайды
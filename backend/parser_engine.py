@@ -0,0 +1,474 @@
+# parser_engine.py
+# DOCX → сұрақтар: бір рет оқу, бірнеше стратегия.
+#
+# load_docx() файлды docx2python арқылы бір-ақ рет ашып, body-ден жолдар
+# мен кесте қатарларын шығарады (DocxContent). Стратегиялар (lines, table,
+# blocks) сол ортақ көріністі қолданады: әрқайсысының жылдам құрылымдық
+# бағасы (score) бар, толық парсинг тек ең үміттісінде жүреді. Ол ештеңе
+# таппаса ғана келесісі — бірақ файл қайта оқылмайды.
+#
+# Нәтиже: [{"number", "question", "options": ["A) ...", ...], "answer_index"}, ...]
+
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any, BinaryIO, Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+# Барлық әліпби (латын + кирилл, қазақ әріптері)
+_LABEL_CLASS = r"A-Za-zА-Яа-яЁёӘәІіҢңҒғҮүҰұҚқҺһӨө"
+
+# ──────────────────────────────────────────────
+# Жол деңгейіндегі regex-тер
+# ──────────────────────────────────────────────
+
+QUESTION_LINE_RE = re.compile(r"^\s*(\d+)\)\s*(.+)$")
+OPTION_LINE_RE = re.compile(r"^\s*([A-D])\)\s*(.+)$")
+
+# "1)A", "10) B" т.б. (бір жолда бірнешеу болуы мүмкін)
+ANSWER_PAIR_RE = re.compile(r"(\d{1,3})\)\s*([A-D])", re.I)
+
+# Таза "1)A" тұрған жол
+ANSWER_LINE_RE = re.compile(r"^\s*(\d{1,3})\)\s*([A-D])\s*$")
+
+# QUESTION_LINE_RE | OPTION_LINE_RE бір regex-те: әр жол бір рет қана
+# анкерленген match-тен өтеді. "1)A" жауап жолы — сұрақ тармағының
+# ерекше жағдайы (мәтіні бір әріп), сондықтан бөлек тексерілмейді.
+LINE_RE = re.compile(
+    r"^\s*(?:(?P<num>\d+)\)\s*(?P<qtext>.+)|(?P<label>[A-D])\)\s*(?P<otext>.+))$"
+)
+
+# Жол түрлері
+LINE_TEXT, LINE_NOISE, LINE_QUESTION, LINE_OPTION = range(4)
+
+# ──────────────────────────────────────────────
+# Блок деңгейіндегі regex-тер (бір абзацта сұрақ + нұсқалар)
+# ──────────────────────────────────────────────
+
+# "1.", "1)" сияқты нөмір
+_QUESTION_BLOCK_RE = re.compile(r"(\d+[).])\s*(.+?)(?=(\d+[).])|$)", re.DOTALL)
+
+# "A) Мәтін", "Б) Мәтін" т.б. бір блок ішіндегі опциялар
+_OPTION_BLOCK_RE = re.compile(
+    rf"(?:^|\s)([{_LABEL_CLASS}])\)\s*(.*?)(?=(?:\s[{_LABEL_CLASS}]\))|$)",
+    re.DOTALL,
+)
+_OPTION_SPLIT_RE = re.compile(rf"\s[{_LABEL_CLASS}]\)")
+
+# Бағалау үшін: сұрақ нөмірлері ("1)" / "1."), бірақ "1)A" жауап жұбы емес
+_BLOCK_NUMBER_RE = re.compile(r"(?<!\S)\d+[).](?!\s*[A-Da-d](?:\s|$))")
+_BLOCK_LABEL_RE = re.compile(rf"(?:^|\s)[{_LABEL_CLASS}]\)")
+
+# ──────────────────────────────────────────────
+# Кесте деңгейі (қатар = нөмір | сұрақ | нұсқалар... | жауап)
+# ──────────────────────────────────────────────
+
+_NUMBER_CELL_RE = re.compile(r"^\s*(\d+)\s*[).]?\s*$")
+_PAIR_CELL_RE = re.compile(rf"^\s*\d{{1,3}}\s*[).]\s*[{_LABEL_CLASS}]\s*$")
+_ANSWER_CELL_RE = re.compile(rf"^\s*([{_LABEL_CLASS}])\s*\)?\s*$")
+_LABELED_CELL_RE = re.compile(rf"^\s*([{_LABEL_CLASS}])\)\s*(.+)$", re.DOTALL)
+_DEFAULT_LABELS = "ABCDEFGH"
+
+
+# ──────────────────────────────────────────────
+# Ортақ көрініс
+# ──────────────────────────────────────────────
+
+class _ScannedLines(NamedTuple):
+    lines: List[str]
+    tags: List[Tuple[int, int, str, bool]]  # (түрі, нөмірі, мәтіні, "12)B" жауап жолы ма)
+    first_pair_line: int  # бірнеше "1)A 2)B" бар алғашқы жол, болмаса -1
+
+
+def _clean_text(text: str) -> str:
+    text = (text or "").replace("\xa0", " ")
+    text = re.sub(r"\r\n?", "\n", text)
+    text = re.sub(r"\n{2,}", "\n", text)
+    text = re.sub(r"[ \t]+", " ", text)
+    return text.strip()
+
+
+def _extract_body(body) -> Tuple[List[str], List[List[str]]]:
+    """
+    docx2python.body: [кесте][қатар][ұяшық][абзац] → (жолдар, кесте қатарлары).
+    Абзацтар да 1×1 "кесте" болып келеді, сондықтан қатарларға тек
+    3+ ұяшықтылар алынады.
+    """
+    lines: List[str] = []
+    rows: List[List[str]] = []
+    split = re.compile(r"[\n\r\t]+").split
+
+    for table in body:
+        for row in table:
+            if len(row) >= 3:
+                rows.append(["\n".join(str(p) for p in cell if p is not None).strip() for cell in row])
+            for cell in row:
+                for par in cell:
+                    if par is None:
+                        continue
+                    for p in split(str(par)):
+                        s = p.strip()
+                        if s:
+                            lines.append(s)
+
+    return lines, rows
+
+
+def _extract_lines_from_body(doc) -> List[str]:
+    return _extract_body(doc.body)[0]
+
+
+def _scan_lines(lines: List[str]) -> _ScannedLines:
+    """
+    Әр жолды бір рет белгілейді; жауап блогын іздеу мен сұрақтарды
+    оқу кезеңдері осы нәтижені ортақ қолданады.
+    """
+    line_match = LINE_RE.match
+    find_pairs = ANSWER_PAIR_RE.findall
+    tags: List[Tuple[int, int, str, bool]] = []
+    append = tags.append
+    first_pair_line = -1
+
+    for i, line in enumerate(lines):
+        # ")" жоқ жолда белгі де, "1)A" жұбы да болмайды
+        if ")" not in line:
+            append((LINE_TEXT, 0, line, False))
+            continue
+
+        if first_pair_line < 0 and line.count(")") >= 2 and len(find_pairs(line)) >= 2:
+            first_pair_line = i
+
+        m = line_match(line)
+        if m is None:
+            append((LINE_TEXT, 0, line, False))
+            continue
+
+        num = m.group("num")
+        if num is None:
+            append((LINE_OPTION, 0, f"{m.group('label')}) {m.group('otext').strip()}", False))
+            continue
+
+        rest = m.group("qtext").strip()
+        if len(rest) == 1 and rest.upper() in "ABCD":
+            # "1) A" сияқты шу — сұрақ емес, бірақ жауап жолы болуы мүмкін
+            append((LINE_NOISE, int(num), line, len(num) <= 3 and rest in "ABCD"))
+        else:
+            append((LINE_QUESTION, int(num), rest, False))
+
+    return _ScannedLines(lines, tags, first_pair_line)
+
+
+def _detect_answer_start_index(scan: _ScannedLines) -> int:
+    # Бір жолда бірнеше "1)A 2)B" бар болса
+    if scan.first_pair_line >= 0:
+        return scan.first_pair_line
+
+    tags = scan.tags
+    n = len(tags)
+
+    # Қатарынан бірнеше "1)A" т.с.с.
+    run_start = None
+    for i, tag in enumerate(tags):
+        if tag[3]:
+            if run_start is None:
+                run_start = i
+        else:
+            if run_start is not None:
+                if i - run_start >= 2:
+                    return run_start
+                run_start = None
+
+    if run_start is not None and n - run_start >= 2:
+        return run_start
+
+    return n  # жауаптар блогы табылмаса
+
+
+def _parse_answers_from_lines(scan: _ScannedLines, start: int, max_q: int) -> Dict[int, str]:
+    # Тек жауаптар блогы (құжаттың құйрығы) сканерленеді
+    answers: Dict[int, str] = {}
+    for line in scan.lines[start:]:
+        for num_str, letter in ANSWER_PAIR_RE.findall(line):
+            num = int(num_str)
+            if 1 <= num <= max_q:
+                answers[num] = letter.upper()
+    return answers
+
+
+@dataclass
+class DocxContent:
+    """Бір рет шығарылған құжат мазмұны; туынды көріністер жалқау есептеледі."""
+
+    lines: List[str]
+    rows: List[List[str]] = field(default_factory=list)
+
+    @cached_property
+    def scan(self) -> _ScannedLines:
+        return _scan_lines(self.lines)
+
+    @cached_property
+    def answer_start(self) -> int:
+        return _detect_answer_start_index(self.scan)
+
+    @cached_property
+    def text(self) -> str:
+        # Блок стратегиясы үшін: body жолдарынан жиналған таза мәтін
+        return _clean_text("\n".join(self.lines))
+
+    def answers(self, max_q: int) -> Dict[int, str]:
+        if self.answer_start >= len(self.lines):
+            return {}
+        return _parse_answers_from_lines(self.scan, self.answer_start, max_q)
+
+
+def load_docx(source: Union[str, os.PathLike, BinaryIO]) -> DocxContent:
+    """source — файл жолы немесе seek() жасалатын бинарлы буфер."""
+    from docx2python import docx2python
+
+    if not isinstance(source, (str, os.PathLike)):
+        source.seek(0)
+    with docx2python(source) as doc:
+        lines, rows = _extract_body(doc.body)
+    return DocxContent(lines=lines, rows=rows)
+
+
+def _attach_answers(questions: List[Dict[str, Any]], content: DocxContent) -> List[Dict[str, Any]]:
+    """answer_index бос сұрақтарға жауап блогынан ("1)A ...") әріп байлайды."""
+    pending = [q for q in questions if q.get("answer_index") is None]
+    if not pending:
+        return questions
+
+    answers = content.answers(max(q["number"] for q in questions))
+    for q in pending:
+        letter = answers.get(q["number"])
+        if not letter:
+            continue
+        for i, opt in enumerate(q["options"]):
+            if opt.lstrip().upper().startswith(f"{letter})"):
+                q["answer_index"] = i
+                break
+    return questions
+
+
+# ──────────────────────────────────────────────
+# Стратегиялар
+# ──────────────────────────────────────────────
+
+def _score_lines(content: DocxContent) -> float:
+    """Сұрақ жолына кемінде 2 нұсқа жолы келсе — 1.0."""
+    questions = options = 0
+    for kind, _, _, _ in content.scan.tags[:content.answer_start]:
+        if kind == LINE_QUESTION:
+            questions += 1
+        elif kind == LINE_OPTION:
+            options += 1
+    if not questions:
+        return 0.0
+    return min(1.0, options / (2 * questions))
+
+
+def _parse_lines(content: DocxContent) -> List[Dict[str, Any]]:
+    """Әр сұрақ пен нұсқа жеке жолда: "1) Сұрақ" / "A) нұсқа"."""
+    questions: List[Dict[str, Any]] = []
+    current: Optional[Dict[str, Any]] = None
+
+    for kind, number, text, _ in content.scan.tags[:content.answer_start]:
+        if kind == LINE_QUESTION:
+            if current:
+                questions.append(current)
+
+            current = {
+                "number": number,
+                "question": text,
+                "options": [],
+                "answer_index": None,
+            }
+
+        elif kind == LINE_NOISE:
+            continue
+
+        elif current and kind == LINE_OPTION:
+            current["options"].append(text)
+
+        elif current:
+            extra = text.strip()
+            if not extra:
+                continue
+            if current["options"]:
+                current["options"][-1] += " " + extra
+            else:
+                current["question"] += " " + extra
+
+    if current:
+        questions.append(current)
+
+    cleaned: List[Dict[str, Any]] = []
+    for q in questions:
+        opts = [o for o in q["options"] if o.strip()]
+        if q["question"] and len(opts) >= 2:
+            q["options"] = opts
+            cleaned.append(q)
+
+    return cleaned
+
+
+def _table_row_question(cells: List[str], fallback_number: int) -> Optional[Dict[str, Any]]:
+    cells = [re.sub(r"\s+", " ", c).strip() for c in cells]
+    cells = [c for c in cells if c]
+    # "1)A | 2)B | ..." — жауаптар кестесі
+    if len(cells) < 3 or all(_PAIR_CELL_RE.match(c) for c in cells):
+        return None
+
+    number = fallback_number
+    m = _NUMBER_CELL_RE.match(cells[0])
+    if m:
+        number = int(m.group(1))
+        cells = cells[1:]
+
+    letter = None
+    if len(cells) >= 4:
+        m = _ANSWER_CELL_RE.match(cells[-1])
+        if m:
+            letter = m.group(1).upper()
+            cells = cells[:-1]
+
+    question, raw_opts = cells[0], cells[1:]
+    # "№ | Сұрақ | A | B | C" сияқты тақырып қатары: нұсқалар орнында жалаң әріптер
+    if len(raw_opts) < 2 or sum(1 for o in raw_opts if len(o) == 1 and o.isalpha()) >= 2:
+        return None
+
+    options: List[str] = []
+    answer_index = None
+    for i, opt in enumerate(raw_opts[:len(_DEFAULT_LABELS)]):
+        lm = _LABELED_CELL_RE.match(opt)
+        label, body = (lm.group(1), lm.group(2).strip()) if lm else (_DEFAULT_LABELS[i], opt)
+        options.append(f"{label}) {body}")
+        if letter and label.upper() == letter:
+            answer_index = i
+
+    return {"number": number, "question": question, "options": options, "answer_index": answer_index}
+
+
+def _score_table(content: DocxContent) -> float:
+    """Кесте қатарларының қаншасы "сұрақ | нұсқалар" пішінінде."""
+    if not content.rows:
+        return 0.0
+    fits = sum(1 for row in content.rows if _table_row_question(row, 0) is not None)
+    return fits / len(content.rows) if fits >= 2 else 0.0
+
+
+def _parse_table(content: DocxContent) -> List[Dict[str, Any]]:
+    """Әр сұрақ — кестенің бір қатары, жауап соңғы бағанда болуы мүмкін."""
+    questions: List[Dict[str, Any]] = []
+    for row in content.rows:
+        q = _table_row_question(row, len(questions) + 1)
+        if q is not None:
+            questions.append(q)
+    return questions
+
+
+def _score_blocks(content: DocxContent) -> float:
+    """Әр нөмірленген блокқа кемінде 2 "X)" белгісі келсе — 1.0."""
+    text = content.text
+    numbers = len(_BLOCK_NUMBER_RE.findall(text))
+    if not numbers:
+        return 0.0
+    return min(1.0, len(_BLOCK_LABEL_RE.findall(text)) / (2 * numbers))
+
+
+def _parse_blocks(content: DocxContent) -> List[Dict[str, Any]]:
+    """Бір абзацта "1) Сұрақ A) .. B) .." / "1. ..." және кирилл белгілері."""
+    questions: List[Dict[str, Any]] = []
+
+    for num_str, block, _ in _QUESTION_BLOCK_RE.findall(content.text):
+        block = (block or "").strip()
+        if not block:
+            continue
+
+        # Сұрақ нөмірін алу ("1)" → 1)
+        num_digits = re.findall(r"\d+", num_str)
+        q_number = int(num_digits[0]) if num_digits else len(questions) + 1
+
+        # Сұрақ мәтіні: бірінші опция басталғанға дейінгі бөлік
+        question_text = _OPTION_SPLIT_RE.split(block, maxsplit=1)[0].strip()
+
+        formatted_options: List[str] = []
+        for label, opt in _OPTION_BLOCK_RE.findall(block):
+            clean_opt = re.sub(r"\s+", " ", opt).strip()
+            if clean_opt:
+                formatted_options.append(f"{label}) {clean_opt}")
+
+        if not question_text or len(formatted_options) < 2:
+            # Қоқысты өткізіп жібереміз
+            continue
+
+        questions.append(
+            {
+                "number": q_number,
+                "question": question_text,
+                "options": formatted_options,
+                "answer_index": None,
+            }
+        )
+
+    return questions
+
+
+class Strategy(NamedTuple):
+    name: str
+    score: Callable[[DocxContent], float]
+    parse: Callable[[DocxContent], List[Dict[str, Any]]]
+
+
+# Тең баға болса, тізімдегі реті шешеді (арзаны/дәлі алдымен)
+STRATEGIES: List[Strategy] = [
+    Strategy("lines", _score_lines, _parse_lines),
+    Strategy("table", _score_table, _parse_table),
+    Strategy("blocks", _score_blocks, _parse_blocks),
+]
+
+
+def rank_strategies(content: DocxContent) -> List[Tuple[float, Strategy]]:
+    scored = [(s.score(content), i, s) for i, s in enumerate(STRATEGIES)]
+    scored.sort(key=lambda t: (-t[0], t[1]))
+    return [(score, s) for score, _, s in scored]
+
+
+def parse_content(
+    content: DocxContent,
+    strategy: Optional[str] = None,
+    debug: bool = False,
+) -> List[Dict[str, Any]]:
+    """Ең жоғары бағалы стратегияны іске қосады; бос болса — келесісін."""
+    if strategy is not None:
+        chosen = [(1.0, s) for s in STRATEGIES if s.name == strategy]
+        if not chosen:
+            raise ValueError(f"unknown strategy: {strategy}")
+    else:
+        chosen = rank_strategies(content)
+
+    if debug:
+        print("[parser_engine] " + ", ".join(f"{s.name}={score:.2f}" for score, s in chosen))
+
+    for score, s in chosen:
+        if score <= 0:
+            break
+        questions = s.parse(content)
+        if questions:
+            if debug:
+                print(f"[parser_engine] {s.name}: {len(questions)} questions")
+            return _attach_answers(questions, content)
+
+    if debug:
+        print("[parser_engine] No questions parsed.")
+    return []
+
+
+def parse_docx(
+    source: Union[str, os.PathLike, BinaryIO],
+    strategy: Optional[str] = None,
+    debug: bool = False,
+) -> List[Dict[str, Any]]:
+    return parse_content(load_docx(source), strategy=strategy, debug=debug)
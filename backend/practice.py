@@ -0,0 +1,96 @@
+# practice.py
+# Жаттығуға арналған кездейсоқ сұрақтар жиынтығы.
+#
+# Тақырыптың бүкіл сұрақтарын клиентке жібермей, серверде:
+#   1) тақырыптың quiz id массивінен (кэште) n id таңдаймыз (қайталаусыз),
+#      бұрын қате жауап берілген сұрақтардың салмағы үлкенірек;
+#   2) тек таңдалғандарын бір in_ сұранысымен оқимыз;
+#   3) нұсқаларды seed бойынша детерминді араластырамыз.
+# Бір seed → бір жиынтық және бір ретпен (id массиві өзгермесе).
+
+from __future__ import annotations
+
+import heapq
+import random
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+# Бір қате жауап сұрақтың салмағын қаншаға арттырады (1 + k·misses)
+MISS_WEIGHT = 2.0
+MAX_MISSES = 5
+
+
+def sample_ids(
+    ids: Sequence[int],
+    n: int,
+    rng: random.Random,
+    weights: Optional[Mapping[int, float]] = None,
+) -> List[int]:
+    """
+    ids ішінен n id-ті қайталаусыз таңдау.
+    weights берілсе — Efraimidis–Spirakis: кілт u^(1/w), ең үлкен n кілт.
+    """
+    n = min(n, len(ids))
+    if not weights:
+        return rng.sample(list(ids), n)
+
+    def key(quiz_id: int) -> float:
+        return rng.random() ** (1.0 / weights.get(quiz_id, 1.0))
+
+    keyed = [(key(qid), qid) for qid in ids]
+    return [qid for _, qid in heapq.nlargest(n, keyed)]
+
+
+def shuffle_options(row: Dict[str, Any], rng: random.Random) -> Dict[str, Any]:
+    """Нұсқаларды араластыру; correct_answer мәтін болғандықтан өзгермейді."""
+    options = list(row.get("options") or [])
+    rng.shuffle(options)
+    return {**row, "options": options}
+
+
+class MissTracker:
+    """
+    user_id → {quiz_id: қате жауаптар саны}, процесс ішінде.
+    Дұрыс жауап санды азайтады; max_users-тен асса, ең ескі қолданушы
+    шығарылады (LRU). Бұл тек салмақ үшін кеңес — дәл статистика емес.
+    """
+
+    def __init__(self, max_users: int = 5000, max_per_user: int = 2000):
+        self.max_users = max_users
+        self.max_per_user = max_per_user
+        self._users: "OrderedDict[int, Dict[int, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, user_id: int, quiz_id: int, correct: bool) -> None:
+        with self._lock:
+            misses = self._users.get(user_id)
+            if misses is None:
+                if correct:
+                    return
+                misses = self._users[user_id] = {}
+            self._users.move_to_end(user_id)
+
+            if correct:
+                left = misses.get(quiz_id, 0) - 1
+                if left > 0:
+                    misses[quiz_id] = left
+                else:
+                    misses.pop(quiz_id, None)
+            else:
+                misses[quiz_id] = min(MAX_MISSES, misses.get(quiz_id, 0) + 1)
+                if len(misses) > self.max_per_user:
+                    misses.pop(next(iter(misses)))
+
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+
+    def weights(self, user_id: int, ids: Sequence[int]) -> Dict[int, float]:
+        with self._lock:
+            misses = dict(self._users.get(user_id) or {})
+        if not misses:
+            return {}
+        return {qid: 1.0 + MISS_WEIGHT * misses[qid] for qid in ids if qid in misses}
+
+
+practice_misses = MissTracker()
@@ -0,0 +1,119 @@
+# quiz_dedupe.py
+# Тақырып ішіндегі қайталанатын сұрақтарды анықтау.
+#
+# Әр сұраққа "fingerprint" есептейміз:
+#   casefold(сұрақ мәтіні) + сұрыпталған casefold(нұсқалар, "A)" белгісіз)
+# Бір тақырыптың барлық fingerprint-тері жадта dict ретінде сақталады,
+# сондықтан импорт кезінде әр сұрақты тексеру O(1).
+
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from parser_engine import _LABEL_CLASS
+
+# "A) ", "б) " сияқты нұсқа белгісі — fingerprint-ке кірмейді
+_OPTION_LABEL_RE = re.compile(rf"^\s*[{_LABEL_CLASS}]\)\s*")
+
+
+def _normalize_text(text: str) -> str:
+    return " ".join((text or "").split()).casefold()
+
+
+def quiz_fingerprint(question: str, options: Iterable[str]) -> str:
+    """
+    Сұрақтың тұрақты хэші.
+    Нұсқалардың реті мен белгісі ("A)", "B)") маңызды емес.
+    """
+    norm_opts = sorted(
+        _normalize_text(_OPTION_LABEL_RE.sub("", str(o)))
+        for o in (options or [])
+        if str(o).strip()
+    )
+
+    h = hashlib.blake2b(digest_size=16)
+    h.update(_normalize_text(question).encode("utf-8"))
+    for opt in norm_opts:
+        h.update(b"\x1f")
+        h.update(opt.encode("utf-8"))
+    return h.hexdigest()
+
+
+def find_duplicate_ids(rows: List[Dict[str, Any]]) -> List[int]:
+    """
+    rows — created_at/id бойынша сұрыпталған сұрақтар.
+    Әр fingerprint-тің алғашқы сұрағы қалады, қалғандарының id-лері қайтарылады.
+    """
+    seen: set[str] = set()
+    dup_ids: List[int] = []
+    for row in rows:
+        fp = quiz_fingerprint(row.get("question") or "", row.get("options") or [])
+        if fp in seen:
+            dup_ids.append(row["id"])
+        else:
+            seen.add(fp)
+    return dup_ids
+
+
+class TopicFingerprintIndex:
+    """
+    topic_id → {fingerprint: quiz_id} индексі.
+
+    - Бірінші сұраныс кезінде loader(topic_id) арқылы жалқау құрылады.
+    - ttl_seconds өткен соң қайта құрылады (басқа worker-лердің
+      жазбаларын ескеру үшін).
+    - max_topics-тен асса, ең ескі тақырып шығарылады (LRU).
+    """
+
+    def __init__(self, ttl_seconds: float = 300.0, max_topics: int = 2000):
+        self.ttl_seconds = ttl_seconds
+        self.max_topics = max_topics
+        self._topics: "OrderedDict[int, tuple[float, Dict[str, int]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        topic_id: int,
+        loader: Callable[[int], List[Dict[str, Any]]],
+    ) -> Dict[str, int]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._topics.get(topic_id)
+            if entry and now - entry[0] < self.ttl_seconds:
+                self._topics.move_to_end(topic_id)
+                return entry[1]
+
+        fps: Dict[str, int] = {}
+        for row in loader(topic_id):
+            fp = quiz_fingerprint(row.get("question") or "", row.get("options") or [])
+            fps.setdefault(fp, row["id"])
+
+        with self._lock:
+            self._topics[topic_id] = (now, fps)
+            self._topics.move_to_end(topic_id)
+            while len(self._topics) > self.max_topics:
+                self._topics.popitem(last=False)
+        return fps
+
+    def add(self, topic_id: int, fingerprint: str, quiz_id: Optional[int]) -> None:
+        """Жаңа сұрақ қосылғанда индексті жаңарту (тақырып жадта болса ғана)."""
+        with self._lock:
+            entry = self._topics.get(topic_id)
+            if entry is not None and quiz_id is not None:
+                entry[1].setdefault(fingerprint, quiz_id)
+
+    def invalidate(self, topic_id: int) -> None:
+        with self._lock:
+            self._topics.pop(topic_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._topics.clear()
+
+
+topic_fingerprints = TopicFingerprintIndex()
@@ -0,0 +1,197 @@
+# quiz_search.py
+# Қолданушының сұрақтар банкі бойынша толық мәтінді іздеу.
+#
+# Әр қолданушыға жадта inverted index: token → {quiz_id}.
+#   - Токендер: NFKC + casefold (қазақ/орыс әріптері: Ә→ә, Ң→ң, Ё→е т.б.),
+#     нұсқа белгілері ("A)", "Б)") алынып тасталады.
+#   - Іздеу: сұраныстағы әр сөз префикс ретінде (сұрыпталған сөздік + bisect),
+#     барлық сөздер табылуы керек (AND).
+#   - Индекс бірінші іздеуде жалқау құрылады, add_quiz / bulk save кезінде
+#     толықтырылады; жадты шектеу үшін суық қолданушылар шығарылады (LRU).
+
+from __future__ import annotations
+
+import bisect
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from parser_engine import _LABEL_CLASS
+
+_OPTION_LABEL_RE = re.compile(rf"^\s*[{_LABEL_CLASS}]\)\s*")
+_TOKEN_RE = re.compile(r"\w+")
+
+# Іздеуде бір-біріне теңелетін әріптер (casefold-тан кейін)
+_FOLD_TABLE = str.maketrans({"ё": "е"})
+
+MIN_PREFIX = 2
+QUESTION_BOOST = 2.0
+
+
+def fold(text: str) -> str:
+    return unicodedata.normalize("NFKC", text or "").casefold().translate(_FOLD_TABLE)
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(fold(text))
+
+
+class _UserIndex:
+    __slots__ = ("built_at", "docs", "postings", "vocab")
+
+    def __init__(self) -> None:
+        self.built_at = time.monotonic()
+        self.docs: Dict[int, Dict[str, Any]] = {}
+        self.postings: Dict[str, Set[int]] = {}
+        self.vocab: List[str] = []  # сұрыпталған, префикс іздеу үшін
+
+    @classmethod
+    def build(cls, rows: Iterable[Dict[str, Any]]) -> "_UserIndex":
+        """Толық құру: алдымен postings, сөздік соңында бір рет сұрыпталады."""
+        ix = cls()
+        for row in rows:
+            ix.add(row, sort_vocab=False)
+        ix.vocab = sorted(ix.postings)
+        return ix
+
+    def add(self, row: Dict[str, Any], sort_vocab: bool = True) -> None:
+        quiz_id = row.get("id")
+        if quiz_id is None or row.get("is_active") is False:
+            return
+        options = [str(o) for o in (row.get("options") or [])]
+        self.docs[quiz_id] = {
+            "id": quiz_id,
+            "topic_id": row.get("topic_id"),
+            "question": row.get("question") or "",
+            "options": options,
+            "correct_answer": row.get("correct_answer"),
+        }
+        terms = set(tokenize(row.get("question") or ""))
+        for opt in options:
+            terms.update(tokenize(_OPTION_LABEL_RE.sub("", opt)))
+        for term in terms:
+            ids = self.postings.get(term)
+            if ids is None:
+                ids = self.postings[term] = set()
+                if sort_vocab:
+                    bisect.insort(self.vocab, term)
+            ids.add(quiz_id)
+
+    def remove(self, quiz_id: int) -> None:
+        # Postings-тегі "өлі" id-лер іздеуде docs арқылы сүзіледі
+        self.docs.pop(quiz_id, None)
+
+    def _prefix_ids(self, prefix: str) -> Set[int]:
+        vocab = self.vocab
+        i = bisect.bisect_left(vocab, prefix)
+        out: Set[int] = set()
+        while i < len(vocab) and vocab[i].startswith(prefix):
+            out |= self.postings[vocab[i]]
+            i += 1
+        return out
+
+    def search(self, terms: List[str], limit: int) -> List[Dict[str, Any]]:
+        candidates: Optional[Set[int]] = None
+        for term in sorted(set(terms), key=len, reverse=True):
+            ids = self.postings.get(term, set()) if len(term) < MIN_PREFIX else self._prefix_ids(term)
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                return []
+
+        scored = []
+        for quiz_id in candidates or ():
+            doc = self.docs.get(quiz_id)
+            if doc is None:
+                continue
+            q_terms = tokenize(doc["question"])
+            score = 0.0
+            for term in terms:
+                if term in q_terms:
+                    score += QUESTION_BOOST
+                elif any(t.startswith(term) for t in q_terms):
+                    score += 1.0
+                else:
+                    score += 0.5  # тек нұсқаларда
+            scored.append((-score, quiz_id))
+        scored.sort()
+        return [self.docs[qid] for _, qid in scored[:limit]]
+
+
+class QuizSearchIndex:
+    """
+    user_id → _UserIndex.
+    - ttl_seconds өткен соң қайта құрылады (басқа worker-лердің жазбалары).
+    - Барлық индекстердегі сұрақ саны max_docs-тан асса, немесе
+      қолданушылар max_users-тен асса, ең ұзақ іздемеген қолданушы шығады.
+    """
+
+    def __init__(self, ttl_seconds: float = 600.0, max_users: int = 500, max_docs: int = 200_000):
+        self.ttl_seconds = ttl_seconds
+        self.max_users = max_users
+        self.max_docs = max_docs
+        self._users: "OrderedDict[int, _UserIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self) -> None:
+        total = sum(len(ix.docs) for ix in self._users.values())
+        while self._users and (len(self._users) > self.max_users or total > self.max_docs):
+            _, ix = self._users.popitem(last=False)
+            total -= len(ix.docs)
+
+    def search(
+        self,
+        user_id: int,
+        query: str,
+        loader: Callable[[int], Iterable[Dict[str, Any]]],
+        limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        with self._lock:
+            ix = self._users.get(user_id)
+            if ix is not None and time.monotonic() - ix.built_at >= self.ttl_seconds:
+                ix = None
+            if ix is not None:
+                self._users.move_to_end(user_id)
+                return ix.search(terms, limit)
+
+        ix = _UserIndex.build(loader(user_id))
+
+        with self._lock:
+            self._users[user_id] = ix
+            self._users.move_to_end(user_id)
+            self._evict()
+            return ix.search(terms, limit)
+
+    def add(self, user_id: int, rows: Iterable[Dict[str, Any]]) -> None:
+        """Жаңа сұрақтар (қолданушы индексі жадта болса ғана)."""
+        with self._lock:
+            ix = self._users.get(user_id)
+            if ix is None:
+                return
+            for row in rows:
+                ix.add(row)
+            self._evict()
+
+    def remove(self, user_id: int, quiz_ids: Iterable[int]) -> None:
+        with self._lock:
+            ix = self._users.get(user_id)
+            if ix is not None:
+                for quiz_id in quiz_ids:
+                    ix.remove(quiz_id)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._users.clear()
+
+
+quiz_search = QuizSearchIndex()
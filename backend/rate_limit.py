@@ -0,0 +1,278 @@
+# rate_limit.py
+# Token-bucket бойынша сұраныс жиілігін шектеу (per-IP / per-user).
+#
+# Әр ереже: capacity токен, period секундта толық толады (rate = capacity/period).
+# Сұраныс жолдың әр ережесінен бір токен алады — бәрі бірге: бір ереже
+# рұқсат етпесе, ешбір bucket азаймайды; 429 + Retry-After (секунд).
+#
+# Сақтау:
+#   MemoryBucketStore — процесс ішінде, OrderedDict (LRU), max_keys-пен шектеулі.
+#   RedisBucketStore  — EASY_RATE_LIMIT_REDIS_URL берілсе, барлық worker-лерге
+#                       ортақ; Lua скрипті атомарлы, уақыт Redis TIME-нан.
+#                       `redis` пакеті міндетті емес; Redis қолжетімсіз болса,
+#                       жергілікті store-ға ауысады (сервис тоқтамайды).
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from starlette.responses import JSONResponse
+
+from errors import ERROR_MESSAGES
+from metrics import observe_rate_limited
+
+SCOPES = ("ip", "user")
+
+
+class RateRule(NamedTuple):
+    capacity: int
+    period: float  # секунд
+    scope: str = "ip"  # ip | user
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+
+# (рұқсат, қанша секунд күту керек, алғашқы тоқтатқан ереже индексі немесе None)
+TakeResult = Tuple[bool, float, Optional[int]]
+
+
+def parse_rules(spec: str) -> Dict[str, List[RateRule]]:
+    """
+    "/api/login:ip=10/60;/api/parse-docx:user=20/60" → {path: [RateRule, ...]}.
+    Бос немесе қате бөліктер өткізіліп жіберіледі.
+    """
+    rules: Dict[str, List[RateRule]] = {}
+    for part in (spec or "").split(";"):
+        try:
+            target, limit = part.strip().rsplit("=", 1)
+            path, scope = target.rsplit(":", 1)
+            capacity, period = limit.split("/", 1)
+            rule = RateRule(int(capacity), float(period), scope.strip())
+        except ValueError:
+            continue
+        if rule.scope in SCOPES and rule.capacity > 0 and rule.period > 0:
+            rules.setdefault(path.strip(), []).append(rule)
+    return rules
+
+
+def merge_rules(
+    defaults: Dict[str, List[RateRule]],
+    overrides: Dict[str, List[RateRule]],
+) -> Dict[str, List[RateRule]]:
+    """overrides-тағы (path, scope) ережесі әдепкісін алмастырады."""
+    merged = {path: list(rules) for path, rules in defaults.items()}
+    for path, rules in overrides.items():
+        scopes = {r.scope for r in rules}
+        merged[path] = [r for r in merged.get(path, []) if r.scope not in scopes] + rules
+    return merged
+
+
+class MemoryBucketStore:
+    """key → [tokens, updated_at]; ең ұзақ қолданылмаған кілттер шығарылады."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _bucket(self, key: str, rule: RateRule, now: float) -> List[float]:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(rule.capacity), now]
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(rule.capacity, bucket[0] + (now - bucket[1]) * rule.rate)
+            bucket[1] = now
+        return bucket
+
+    def take_all(self, items: Sequence[Tuple[str, RateRule]], cost: float = 1.0) -> TakeResult:
+        """Барлық bucket-те cost болса ғана бәрінен алады."""
+        now = time.monotonic()
+        with self._lock:
+            buckets = [self._bucket(key, rule, now) for key, rule in items]
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+            denied: Optional[int] = None
+            wait = 0.0
+            for i, (bucket, (_, rule)) in enumerate(zip(buckets, items)):
+                if bucket[0] < cost:
+                    denied = i if denied is None else denied
+                    wait = max(wait, (cost - bucket[0]) / rule.rate)
+            if denied is not None:
+                return False, wait, denied
+            for bucket in buckets:
+                bucket[0] -= cost
+            return True, 0.0, None
+
+    def take(self, key: str, rule: RateRule, cost: float = 1.0) -> Tuple[bool, float]:
+        """(рұқсат, қанша секунд күту керек)."""
+        allowed, wait, _ = self.take_all([(key, rule)], cost)
+        return allowed, wait
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+# KEYS[i] — bucket; ARGV = cost, сосын әр кілтке capacity, rate.
+# Алдымен барлығы тексеріледі, бәрі рұқсат етсе ғана әрқайсысынан алынады.
+_REDIS_TAKE = """
+local cost = tonumber(ARGV[1])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local tokens = {}
+local wait = 0
+local denied = 0
+for i, key in ipairs(KEYS) do
+  local cap = tonumber(ARGV[2 * i])
+  local rate = tonumber(ARGV[2 * i + 1])
+  local b = redis.call('HMGET', key, 'tokens', 'ts')
+  local n = tonumber(b[1]) or cap
+  local ts = tonumber(b[2]) or now
+  n = math.min(cap, n + math.max(0, now - ts) * rate)
+  if n < cost then
+    if denied == 0 then denied = i end
+    wait = math.max(wait, (cost - n) / rate)
+  end
+  tokens[i] = n
+end
+for i, key in ipairs(KEYS) do
+  local cap = tonumber(ARGV[2 * i])
+  local rate = tonumber(ARGV[2 * i + 1])
+  local n = tokens[i]
+  if denied == 0 then n = n - cost end
+  redis.call('HSET', key, 'tokens', n, 'ts', now)
+  redis.call('PEXPIRE', key, math.ceil(cap / rate * 1000) + 1000)
+end
+return {denied, tostring(wait)}
+"""
+
+
+class RedisBucketStore:
+    """Бірнеше worker-ге ортақ bucket-тер (redis.asyncio, міндетті емес)."""
+
+    def __init__(self, url: str, fallback: MemoryBucketStore, prefix: str = "easy:rl:"):
+        import redis.asyncio as redis  # міндетті емес тәуелділік
+
+        self._client = redis.from_url(url)
+        self._script = self._client.register_script(_REDIS_TAKE)
+        self.fallback = fallback
+        self.prefix = prefix
+
+    async def take_all(self, items: Sequence[Tuple[str, RateRule]], cost: float = 1.0) -> TakeResult:
+        """Барлық кілт бір Lua шақыруында (атомарлы)."""
+        args: List[float] = [cost]
+        for _, rule in items:
+            args += [rule.capacity, rule.rate]
+        try:
+            denied, wait = await self._script(
+                keys=[self.prefix + key for key, _ in items], args=args
+            )
+        except Exception as e:
+            print(f"[rate_limit] redis unavailable, using local buckets: {e}")
+            return self.fallback.take_all(items, cost)
+        denied = int(denied)
+        return denied == 0, float(wait), (denied - 1 if denied else None)
+
+    async def take(self, key: str, rule: RateRule, cost: float = 1.0) -> Tuple[bool, float]:
+        allowed, wait, _ = await self.take_all([(key, rule)], cost)
+        return allowed, wait
+
+
+def make_store(redis_url: Optional[str], max_keys: int = 100_000):
+    memory = MemoryBucketStore(max_keys=max_keys)
+    if not redis_url:
+        return memory
+    try:
+        return RedisBucketStore(redis_url, fallback=memory)
+    except ImportError:
+        print("[rate_limit] EASY_RATE_LIMIT_REDIS_URL set but `redis` is not installed; using local buckets")
+        return memory
+
+
+def client_ip(scope, trusted_hops: int = 0) -> str:
+    """
+    trusted_hops — алдымыздағы сенімді proxy саны. X-Forwarded-For-тың сол
+    жағын клиент өзі жаза алады, сондықтан оң жақтан trusted_hops-ыншы
+    мекенжай алынады (әр proxy өзі көрген мекенжайды соңына қосады).
+    """
+    client = scope.get("client")
+    peer = client[0] if client else "unknown"
+    if trusted_hops <= 0:
+        return peer
+    chain: List[str] = []
+    for name, value in scope.get("headers", []):
+        if name == b"x-forwarded-for":
+            chain.extend(p.strip() for p in value.decode("latin-1").split(",") if p.strip())
+    if not chain:
+        return peer
+    return chain[-min(trusted_hops, len(chain))]
+
+
+class RateLimitMiddleware:
+    """
+    Таза ASGI middleware. rules: {"/api/login": [RateRule(...)], ...} —
+    жол дәл сәйкес келуі керек. user_key(scope) → қолданушы кілті немесе None
+    (None болса, user ережесі өткізіліп, тек ip ережесі қолданылады).
+    """
+
+    def __init__(
+        self,
+        app,
+        rules: Dict[str, List[RateRule]],
+        store=None,
+        user_key: Optional[Callable[[dict], Optional[str]]] = None,
+        trusted_hops: int = 0,
+        methods: Tuple[str, ...] = ("POST",),
+    ):
+        self.app = app
+        self.rules = rules
+        self.store = store or MemoryBucketStore()
+        self.user_key = user_key
+        self.trusted_hops = trusted_hops
+        self.methods = methods
+
+    async def _take_all(self, items: List[Tuple[str, RateRule]]) -> TakeResult:
+        result = self.store.take_all(items)
+        if not isinstance(result, tuple):
+            result = await result
+        return result
+
+    async def __call__(self, scope, receive, send):
+        rules = None
+        if scope["type"] == "http" and scope.get("method") in self.methods:
+            rules = self.rules.get(scope.get("path", ""))
+        if not rules:
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        items: List[Tuple[str, RateRule]] = []
+        for i, rule in enumerate(rules):
+            if rule.scope == "user":
+                subject = self.user_key(scope) if self.user_key else None
+                if subject is None:
+                    continue
+            else:
+                subject = client_ip(scope, self.trusted_hops)
+            items.append((f"{path}#{i}:{rule.scope}:{subject}", rule))
+
+        if items:
+            allowed, wait, denied = await self._take_all(items)
+            if not allowed:
+                observe_rate_limited(path, items[denied][1].scope)
+                response = JSONResponse(
+                    status_code=429,
+                    content={"detail": ERROR_MESSAGES["rate_limited"]},
+                    headers={"Retry-After": str(max(1, math.ceil(wait)))},
+                )
+                await response(scope, receive, send)
+                return
+
+        await self.app(scope, receive, send)
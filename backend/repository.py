@@ -0,0 +1,282 @@
+# repository.py
+"""
+Ыстық (жиі шақырылатын) оқу сұраныстарының репозиторий қабаты.
+
+Екі backend бар, EASY_DB_BACKEND арқылы таңдалады:
+  supabase (әдепкі) — Supabase REST (PostgREST) клиенті
+  postgres          — SUPABASE_DB_URL арқылы тікелей, pool-дағы байланыс
+                      (SQLAlchemy Core + psycopg 3, models.py кестелері)
+
+postgres режимінде HTTP секірісі мен PostgREST талдауы болмайды.
+Сұраныстар бір рет құрылып, SQLAlchemy-дің компиляция кэшінен алынады —
+SQL мәтіні әр шақыруда бірдей. psycopg 3 (prepare_threshold,
+database.create_db_engine) оны pool-дағы әр байланыста бір рет PREPARE
+етеді, кейінгі шақырулар тек EXECUTE (талдау/жоспарлау қайталанбайды).
+Тексеру: bench/run_bench.py --repo-check --repo-url postgresql://...
+Жолдар Supabase жауабымен бірдей пішімде: уақыт өрістері ISO жолы.
+SUPABASE_DB_URL=sqlite:///... берілсе, сол режим SQLite-пен де жұмыс істейді
+("public" схемасы алынып тасталады) — жергілікті тексеру үшін.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from database import get_engine, get_supabase
+from metrics import observe_coalesced, observe_db_call
+from singleflight import SingleFlight, coalesce_reads, query_key
+
+DB_BACKEND = os.getenv("EASY_DB_BACKEND", "supabase").strip().lower()
+
+USER_PUBLIC_FIELDS = ("id", "email", "username", "is_verified", "created_at", "credit_balance")
+QUIZ_LIST_FIELDS = ("id", "question", "options", "correct_answer", "created_at", "is_active")
+SUBJECT_FIELDS = ("id", "name", "created_at")
+DASHBOARD_TOPIC_FIELDS = ("id", "subject_id", "name", "attempt_count", "created_at")
+
+
+# Бір мезгілдегі бірдей оқулар бір Supabase шақыруын бөліседі
+read_flights = SingleFlight()
+
+
+def _execute(query, ctx: str):
+    start = time.perf_counter()
+    try:
+        res = query.execute()
+    except Exception as e:
+        observe_db_call(ctx, time.perf_counter() - start, ok=False)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Supabase error ({ctx}): {e}",
+        )
+
+    data = getattr(res, "data", None)
+    error = getattr(res, "error", None)
+    observe_db_call(ctx, time.perf_counter() - start, ok=not error)
+
+    if error:
+        msg = getattr(error, "message", str(error))
+        raise HTTPException(
+            status_code=500,
+            detail=f"Supabase error ({ctx}): {msg}",
+        )
+
+    if data is None and isinstance(res, dict):
+        data = res.get("data")
+
+    return data or []
+
+
+def _copy_rows(rows: List[Any]) -> List[Any]:
+    # Жолдар dict — бір шақырушы өзгертсе, басқаларына әсер етпесін
+    return [dict(row) if isinstance(row, dict) else row for row in rows]
+
+
+def supabase_exec(query, ctx: str, coalesce: Optional[bool] = None):
+    """
+    Барлық Supabase сұраныстарын орындайтын көмекші.
+    query.execute() шақырып, data / error өңдейді.
+    Еш жерде .insert().select() сияқты Python-ға тән емес тізбектер жоқ.
+    Әр шақырудың ұзақтығы ctx бойынша метрикаға жазылады.
+
+    Оқу сұраныстары (GET) әдепкіде біріктіріледі: дәл сондай сұраныс
+    орындалып жатса, жаңа шақыру жасалмай, соның нәтижесі күтіледі.
+    coalesce=False — тек осы шақыру үшін өшіру (None → сұраныс әдепкісі).
+    """
+    if coalesce is None:
+        coalesce = coalesce_reads.get()
+    key = query_key(query) if coalesce else None
+    if key is None:
+        return _execute(query, ctx)
+
+    data, shared = read_flights.do((ctx, key), lambda: _execute(query, ctx), share=_copy_rows)
+    if shared:
+        observe_coalesced(ctx)
+    return data
+
+
+# ───────────────────────────────────────────────────────────
+# Supabase REST
+# ───────────────────────────────────────────────────────────
+
+class SupabaseRepository:
+    name = "supabase"
+
+    def get_user(self, user_id: int) -> Optional[Dict[str, Any]]:
+        rows = supabase_exec(
+            get_supabase().table("users")
+            .select(",".join(USER_PUBLIC_FIELDS))
+            .eq("id", user_id)
+            .limit(1),
+            ctx="get_current_user",
+        )
+        return rows[0] if rows else None
+
+    def topic_owned(self, topic_id: int, user_id: int, ctx: str) -> bool:
+        rows = supabase_exec(
+            get_supabase().table("topics")
+            .select("id")
+            .eq("id", topic_id)
+            .eq("user_id", user_id)
+            .limit(1),
+            ctx=ctx,
+        )
+        return bool(rows)
+
+    def list_quizzes(self, topic_id: int, user_id: int) -> List[Dict[str, Any]]:
+        return supabase_exec(
+            get_supabase().table("quizzes")
+            .select(",".join(QUIZ_LIST_FIELDS))
+            .eq("topic_id", topic_id)
+            .eq("user_id", user_id)
+            .order("created_at", desc=False)
+            .order("id", desc=False),
+            ctx="list_quizzes",
+        )
+
+    def dashboard(self, user_id: int) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """(пәндер, тақырыптар + quiz_count) — екі сұраныс, сұрақ саны PostgREST агрегатымен."""
+        subjects = supabase_exec(
+            get_supabase().table("subjects")
+            .select(",".join(SUBJECT_FIELDS))
+            .eq("user_id", user_id)
+            .order("created_at", desc=False)
+            .order("id", desc=False),
+            ctx="dashboard_subjects",
+        )
+        topics = supabase_exec(
+            get_supabase().table("topics")
+            .select(",".join(DASHBOARD_TOPIC_FIELDS) + ",quizzes(count)")
+            .eq("user_id", user_id)
+            .order("created_at", desc=False)
+            .order("id", desc=False),
+            ctx="dashboard_topics",
+        )
+        for t in topics:
+            embedded = t.pop("quizzes", None) or [{}]
+            t["quiz_count"] = int(embedded[0].get("count") or 0)
+        return subjects, topics
+
+
+# ───────────────────────────────────────────────────────────
+# Тікелей Postgres (SQLAlchemy Core)
+# ───────────────────────────────────────────────────────────
+
+def _jsonable_row(row) -> Dict[str, Any]:
+    # PostgREST уақытты ISO жолы ретінде береді (timestamptz → +00:00, timestamp → белдеусіз);
+    # datetime.isoformat() дәл сондай, сондықтан кэштер мен JSON жауаптары backend-ке тәуелсіз
+    return {
+        k: v.isoformat() if isinstance(v, (datetime, date)) else v
+        for k, v in row.items()
+    }
+
+
+class PostgresRepository:
+    name = "postgres"
+
+    def __init__(self, engine=None):
+        from sqlalchemy import bindparam, func, select
+
+        from models import Quiz, Subject, Topic, User
+
+        # Тек оқу: AUTOCOMMIT режимінде пулға қайтарғанда ROLLBACK жіберілмейді,
+        # ал psycopg 3 ROLLBACK кезінде prepared statement кэшін тазалайды.
+        self.engine = (engine or get_engine()).execution_options(isolation_level="AUTOCOMMIT")
+        # SQLite-та "public" схемасы жоқ
+        self._exec_options: Dict[str, Any] = {}
+        if self.engine.dialect.name != "postgresql":
+            self._exec_options["schema_translate_map"] = {"public": None}
+
+        users = User.__table__
+        subjects = Subject.__table__
+        topics = Topic.__table__
+        quizzes = Quiz.__table__
+
+        # Сұраныстар бір рет құрылады, параметрлер bindparam арқылы беріледі
+        self._get_user = (
+            select(*[users.c[f] for f in USER_PUBLIC_FIELDS])
+            .where(users.c.id == bindparam("user_id"))
+            .limit(1)
+        )
+        self._topic_owned = (
+            select(topics.c.id)
+            .where(topics.c.id == bindparam("topic_id"))
+            .where(topics.c.user_id == bindparam("user_id"))
+            .limit(1)
+        )
+        self._list_quizzes = (
+            select(*[quizzes.c[f] for f in QUIZ_LIST_FIELDS])
+            .where(quizzes.c.topic_id == bindparam("topic_id"))
+            .where(quizzes.c.user_id == bindparam("user_id"))
+            .order_by(quizzes.c.created_at.asc(), quizzes.c.id.asc())
+        )
+        self._dashboard_subjects = (
+            select(*[subjects.c[f] for f in SUBJECT_FIELDS])
+            .where(subjects.c.user_id == bindparam("user_id"))
+            .order_by(subjects.c.created_at.asc(), subjects.c.id.asc())
+        )
+        self._dashboard_topics = (
+            select(
+                *[topics.c[f] for f in DASHBOARD_TOPIC_FIELDS],
+                func.count(quizzes.c.id).label("quiz_count"),
+            )
+            .select_from(topics.outerjoin(quizzes, quizzes.c.topic_id == topics.c.id))
+            .where(topics.c.user_id == bindparam("user_id"))
+            .group_by(*[topics.c[f] for f in DASHBOARD_TOPIC_FIELDS])
+            .order_by(topics.c.created_at.asc(), topics.c.id.asc())
+        )
+
+    def _fetch(self, stmt, params: Dict[str, Any], ctx: str) -> List[Dict[str, Any]]:
+        start = time.perf_counter()
+        try:
+            with self.engine.connect() as conn:
+                result = conn.execution_options(**self._exec_options).execute(stmt, params)
+                rows = [_jsonable_row(r) for r in result.mappings()]
+        except Exception as e:
+            observe_db_call(ctx, time.perf_counter() - start, ok=False)
+            raise HTTPException(
+                status_code=500,
+                detail=f"Database error ({ctx}): {e}",
+            )
+        observe_db_call(ctx, time.perf_counter() - start, ok=True)
+        return rows
+
+    def get_user(self, user_id: int) -> Optional[Dict[str, Any]]:
+        rows = self._fetch(self._get_user, {"user_id": user_id}, ctx="get_current_user")
+        return rows[0] if rows else None
+
+    def topic_owned(self, topic_id: int, user_id: int, ctx: str) -> bool:
+        rows = self._fetch(
+            self._topic_owned,
+            {"topic_id": topic_id, "user_id": user_id},
+            ctx=ctx,
+        )
+        return bool(rows)
+
+    def list_quizzes(self, topic_id: int, user_id: int) -> List[Dict[str, Any]]:
+        return self._fetch(
+            self._list_quizzes,
+            {"topic_id": topic_id, "user_id": user_id},
+            ctx="list_quizzes",
+        )
+
+    def dashboard(self, user_id: int) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        params = {"user_id": user_id}
+        subjects = self._fetch(self._dashboard_subjects, params, ctx="dashboard_subjects")
+        topics = self._fetch(self._dashboard_topics, params, ctx="dashboard_topics")
+        return subjects, topics
+
+
+@lru_cache(maxsize=1)
+def get_repository():
+    """EASY_DB_BACKEND бойынша репозиторийді бір рет жасау."""
+    if DB_BACKEND == "postgres":
+        return PostgresRepository()
+    if DB_BACKEND != "supabase":
+        raise RuntimeError(f"EASY_DB_BACKEND белгісіз: {DB_BACKEND!r} (supabase | postgres)")
+    return SupabaseRepository()
@@ -0,0 +1,386 @@
+# review_queue.py
+# Аралықты қайталау (spaced repetition, SM-2) кезегі.
+#
+# check_answer нәтижесі әр (user, quiz) жұбының күйін жаңартады:
+# repetitions / interval_days / ease / due_at. Күйлер review_items кестесінде:
+#
+#   create table public.review_items (
+#     user_id bigint references public.users(id) on delete cascade,
+#     quiz_id bigint references public.quizzes(id) on delete cascade,
+#     topic_id bigint,
+#     repetitions integer not null default 0,
+#     interval_days double precision not null default 0,
+#     ease double precision not null default 2.5,
+#     due_at timestamptz not null,
+#     primary key (user_id, quiz_id)
+#   );
+#   create index on public.review_items (user_id, due_at);
+#
+#   -- Жазу кезінде өшіріліп кеткен сұрақтар өткізіліп жіберіледі
+#   -- (FK қатесі бүкіл бөлікті құлатпайды)
+#   create function public.apply_review_items(rows jsonb) returns void as $$
+#     insert into public.review_items
+#       (user_id, quiz_id, topic_id, repetitions, interval_days, ease, due_at)
+#     select (r->>'user_id')::bigint, (r->>'quiz_id')::bigint, (r->>'topic_id')::bigint,
+#            (r->>'repetitions')::int, (r->>'interval_days')::float8,
+#            (r->>'ease')::float8, (r->>'due_at')::timestamptz
+#     from jsonb_array_elements(rows) r
+#     where exists (select 1 from public.quizzes q where q.id = (r->>'quiz_id')::bigint)
+#     on conflict (user_id, quiz_id) do update set
+#       topic_id = excluded.topic_id, repetitions = excluded.repetitions,
+#       interval_days = excluded.interval_days, ease = excluded.ease,
+#       due_at = excluded.due_at;
+#   $$ language sql;
+#
+# Келесі сұрақтар дерекқордан (user_id, due_at) индексі арқылы алынады —
+# тек n жол, тарих сканерленбейді. Процесс ішінде тек осы процестің әлі
+# жазылмаған жауаптары ұсталады (әр қолданушыға due_at бойынша min-heap),
+# олар дерекқор нәтижесінің үстінен қойылады. Heap-тағы ескі жазбалар
+# жойылмайды — күймен салыстырылып өткізіп жіберіледі (lazy deletion).
+#
+# check_answer жолында дерекқорға бармаймыз: бұрынғы күй жадта болмаса,
+# жауап "күтудегі" тізімге жазылады; фондық flush тек сол сұрақтардың
+# жолдарын оқып, SM-2-ні қолданады. Өзгерген күйлер stats_buffer ағынымен
+# бірге apply_review_items RPC-імен жазылады; ол идемпотентті, сондықтан
+# қайта жіберу қауіпсіз.
+
+from __future__ import annotations
+
+import heapq
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from database import get_supabase
+from repository import supabase_exec
+
+DAY_SECONDS = 86400.0
+MIN_EASE = 1.3
+DEFAULT_EASE = 2.5
+# Бинарлы жауапты SM-2 сапасына (0..5) айналдыру
+QUALITY_CORRECT = 4
+QUALITY_WRONG = 1
+
+# Дерекқор ұзақ қолжетімсіз болса, жадты шексіз толтырмау үшін
+# (жазылмаған күйлер мен күтудегі жауаптардың әрқайсысына)
+MAX_PENDING = 50_000
+FLUSH_CHUNK = 500
+
+Answer = Tuple[Optional[int], bool, float]  # (topic_id, дұрыс па, уақыты)
+Key = Tuple[int, int]  # (user_id, quiz_id)
+
+
+class ReviewState:
+    __slots__ = ("quiz_id", "topic_id", "repetitions", "interval_days", "ease", "due_at")
+
+    def __init__(
+        self,
+        quiz_id: int,
+        topic_id: Optional[int],
+        repetitions: int = 0,
+        interval_days: float = 0.0,
+        ease: float = DEFAULT_EASE,
+        due_at: float = 0.0,
+    ):
+        self.quiz_id = quiz_id
+        self.topic_id = topic_id
+        self.repetitions = repetitions
+        self.interval_days = interval_days
+        self.ease = ease
+        self.due_at = due_at  # unix уақыты
+
+    def copy(self, topic_id: Optional[int] = None) -> "ReviewState":
+        return ReviewState(
+            self.quiz_id,
+            self.topic_id if topic_id is None else topic_id,
+            self.repetitions,
+            self.interval_days,
+            self.ease,
+            self.due_at,
+        )
+
+    def review(self, correct: bool, now: float) -> None:
+        """SM-2: сапа < 3 болса, қайта бастау; әйтпесе аралық ease есе өседі."""
+        quality = QUALITY_CORRECT if correct else QUALITY_WRONG
+        if quality < 3:
+            self.repetitions = 0
+            self.interval_days = 1.0
+        else:
+            self.repetitions += 1
+            if self.repetitions == 1:
+                self.interval_days = 1.0
+            elif self.repetitions == 2:
+                self.interval_days = 6.0
+            else:
+                self.interval_days = round(self.interval_days * self.ease, 2)
+        self.ease = max(
+            MIN_EASE,
+            self.ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02),
+        )
+        self.due_at = now + self.interval_days * DAY_SECONDS
+
+    def to_row(self, user_id: int) -> Dict[str, Any]:
+        return {
+            "user_id": user_id,
+            "quiz_id": self.quiz_id,
+            "topic_id": self.topic_id,
+            "repetitions": self.repetitions,
+            "interval_days": self.interval_days,
+            "ease": round(self.ease, 4),
+            "due_at": datetime.fromtimestamp(self.due_at, timezone.utc).isoformat(),
+        }
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "ReviewState":
+        due = row.get("due_at")
+        if isinstance(due, str):
+            due = datetime.fromisoformat(due.replace("Z", "+00:00"))
+        if isinstance(due, datetime):
+            if due.tzinfo is None:
+                due = due.replace(tzinfo=timezone.utc)
+            due = due.timestamp()
+        return cls(
+            quiz_id=row["quiz_id"],
+            topic_id=row.get("topic_id"),
+            repetitions=int(row.get("repetitions") or 0),
+            interval_days=float(row.get("interval_days") or 0.0),
+            ease=float(row.get("ease") or DEFAULT_EASE),
+            due_at=float(due or 0.0),
+        )
+
+
+class _UserQueue:
+    """Бір қолданушының осы процесте жазылған (әлі жіберілмеген) күйлері."""
+
+    __slots__ = ("items", "heap")
+
+    def __init__(self) -> None:
+        self.items: Dict[int, ReviewState] = {}
+        self.heap: List[Tuple[float, int]] = []
+
+    def push(self, state: ReviewState) -> None:
+        self.items[state.quiz_id] = state
+        heapq.heappush(self.heap, (state.due_at, state.quiz_id))
+        # Ескі жазбалар тым көбейсе, heap-ты қайта құру
+        if len(self.heap) > 2 * len(self.items) + 64:
+            self.heap = [(s.due_at, s.quiz_id) for s in self.items.values()]
+            heapq.heapify(self.heap)
+
+    def due(self, n: int, now: float) -> List[ReviewState]:
+        out: List[ReviewState] = []
+        taken: List[Tuple[float, int]] = []
+        while self.heap and len(out) < n and self.heap[0][0] <= now:
+            entry = heapq.heappop(self.heap)
+            state = self.items.get(entry[1])
+            if state is None or state.due_at != entry[0]:
+                continue  # ескі жазба
+            out.append(state)
+            taken.append(entry)
+        # Жауап берілгенше сұрақ кезекте қала береді
+        for entry in taken:
+            heapq.heappush(self.heap, entry)
+        return out
+
+
+class ReviewQueue:
+    """
+    user_id → _UserQueue: тек осы процестің жазылмаған күйлері (flush сәтті
+    болғанда алынады). Қалғаны — дерекқорда, due_at индексі арқылы оқылады.
+    """
+
+    def __init__(
+        self,
+        loader: Optional[Callable[[int, List[int]], List[Dict[str, Any]]]] = None,
+        due_loader: Optional[Callable[[int, float, int], List[Dict[str, Any]]]] = None,
+    ):
+        self.loader = loader or load_review_rows
+        self.due_loader = due_loader or load_due_rows
+        self._own: Dict[int, _UserQueue] = {}
+        self._dirty: Dict[Key, ReviewState] = {}
+        # Бұрынғы күйі әлі белгісіз жауаптар: user_id → quiz_id → жауаптар
+        self._pending: Dict[int, Dict[int, List[Answer]]] = {}
+        self._pending_count = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _apply(base: Optional[ReviewState], quiz_id: int, answers: List[Answer]) -> ReviewState:
+        state = base.copy() if base is not None else ReviewState(quiz_id, None)
+        for topic_id, correct, at in answers:
+            if topic_id is not None:
+                state.topic_id = topic_id
+            state.review(correct, at)
+        return state
+
+    # ---- ішкі: _lock ұсталған кезде ----
+    def _set_dirty(self, user_id: int, state: ReviewState) -> None:
+        key = (user_id, state.quiz_id)
+        if key not in self._dirty and len(self._dirty) >= MAX_PENDING:
+            return
+        self._dirty[key] = state
+        self._own.setdefault(user_id, _UserQueue()).push(state)
+
+    def _drop_own(self, user_id: int, quiz_id: int, state: Optional[ReviewState] = None) -> None:
+        """Жергілікті күйді алу; state берілсе — тек сол нұсқа әлі соңғысы болса."""
+        uq = self._own.get(user_id)
+        if uq is None or (state is not None and uq.items.get(quiz_id) is not state):
+            return
+        uq.items.pop(quiz_id, None)
+        if not uq.items:
+            del self._own[user_id]
+
+    def _pop_pending(self, user_id: int, quiz_id: int) -> Optional[List[Answer]]:
+        by_quiz = self._pending.get(user_id)
+        answers = by_quiz.pop(quiz_id, None) if by_quiz else None
+        if answers is not None:
+            self._pending_count -= 1
+            if not by_quiz:
+                del self._pending[user_id]
+        return answers
+
+    # ---- жауап жолы: тек жад ----
+    def record(self, user_id: int, quiz_id: int, topic_id: Optional[int], correct: bool) -> None:
+        """Бұрынғы күй жадта болса — бірден SM-2, әйтпесе күтудегі тізімге."""
+        answer: Answer = (topic_id, correct, time.time())
+        with self._lock:
+            pending = self._pending.get(user_id, {}).get(quiz_id)
+            if pending is not None:
+                pending.append(answer)
+                return
+            uq = self._own.get(user_id)
+            base = uq.items.get(quiz_id) if uq is not None else None
+            if base is None:
+                if self._pending_count < MAX_PENDING:
+                    self._pending.setdefault(user_id, {})[quiz_id] = [answer]
+                    self._pending_count += 1
+                return
+            self._set_dirty(user_id, self._apply(base, quiz_id, [answer]))
+
+    def next_due(self, user_id: int, n: int) -> List[ReviewState]:
+        """
+        Дерекқордан due_at <= now бойынша n (+ жергілікті үстемелер саны) жол,
+        жергілікті күйі бар сұрақтар дерекқор нұсқасының орнына қойылады.
+        """
+        now = time.time()
+        with self._lock:
+            uq = self._own.get(user_id)
+            local_ids = set(uq.items) if uq is not None else set()
+            local_ids.update(self._pending.get(user_id, ()))
+
+        rows = self.due_loader(user_id, now, n + len(local_ids))
+
+        with self._lock:
+            uq = self._own.get(user_id)
+            overridden = set(self._pending.get(user_id, ()))
+            local: List[ReviewState] = []
+            if uq is not None:
+                overridden.update(uq.items)
+                local = uq.due(n, now)
+        remote = [ReviewState.from_row(r) for r in rows if r["quiz_id"] not in overridden]
+        merged = sorted(remote + local, key=lambda s: (s.due_at, s.quiz_id))
+        return merged[:n]
+
+    def forget(self, user_id: int, quiz_ids: Iterable[int]) -> None:
+        """Өшірілген сұрақтардың жергілікті күйлерін алу (жазуға жіберілмейді)."""
+        with self._lock:
+            for quiz_id in quiz_ids:
+                self._dirty.pop((user_id, quiz_id), None)
+                self._pop_pending(user_id, quiz_id)
+                self._drop_own(user_id, quiz_id)
+
+    def forget_topics(self, user_id: int, topic_ids: Iterable[int]) -> None:
+        """Тақырып/пән каскадпен өшірілгенде — сол тақырыптардың барлық жергілікті күйлері."""
+        topics = set(topic_ids)
+        if not topics:
+            return
+        with self._lock:
+            uq = self._own.get(user_id)
+            quiz_ids = [q for q, s in uq.items.items() if s.topic_id in topics] if uq else []
+            quiz_ids += [
+                q for q, answers in self._pending.get(user_id, {}).items()
+                if any(a[0] in topics for a in answers)
+            ]
+        self.forget(user_id, quiz_ids)
+
+    # ---- фондық жіберу ----
+    def _resolve_pending(self) -> None:
+        """Күтудегі жауаптардың бұрынғы күйін тек сол сұрақтар бойынша оқу (фондық ағын)."""
+        with self._lock:
+            by_user = {user_id: list(by_quiz) for user_id, by_quiz in self._pending.items()}
+
+        for user_id, quiz_ids in by_user.items():
+            loaded = {
+                s.quiz_id: s for s in (ReviewState.from_row(r) for r in self.loader(user_id, quiz_ids))
+            }
+            with self._lock:
+                for quiz_id in quiz_ids:
+                    answers = self._pop_pending(user_id, quiz_id)
+                    if answers is None:  # арада forget болған
+                        continue
+                    self._set_dirty(user_id, self._apply(loaded.get(quiz_id), quiz_id, answers))
+
+    def flush(self) -> int:
+        self._resolve_pending()
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+        if not dirty:
+            return 0
+        items = list(dirty.items())
+        written = 0
+        try:
+            for start in range(0, len(items), FLUSH_CHUNK):
+                chunk = items[start:start + FLUSH_CHUNK]
+                supabase_exec(
+                    get_supabase().rpc(
+                        "apply_review_items",
+                        {"rows": [state.to_row(user_id) for (user_id, _), state in chunk]},
+                    ),
+                    ctx="flush_review_items",
+                )
+                written += len(chunk)
+                with self._lock:
+                    for (user_id, quiz_id), state in chunk:
+                        self._drop_own(user_id, quiz_id, state)
+        except BaseException:
+            with self._lock:
+                for key, state in items[written:]:
+                    if key in self._dirty:
+                        continue  # арада жаңарақ күй жазылған
+                    if self._own.get(key[0]) is None or self._own[key[0]].items.get(key[1]) is not state:
+                        continue  # арада forget немесе жаңа жауап
+                    if len(self._dirty) < MAX_PENDING:
+                        self._dirty[key] = state
+            raise
+        return written
+
+
+def load_review_rows(user_id: int, quiz_ids: List[int]) -> List[Dict[str, Any]]:
+    """Берілген сұрақтардың сақталған күйлері (URL ұзындығы үшін бөліп оқылады)."""
+    out: List[Dict[str, Any]] = []
+    for start in range(0, len(quiz_ids), 200):
+        out.extend(
+            supabase_exec(
+                get_supabase().table("review_items")
+                .select("quiz_id,topic_id,repetitions,interval_days,ease,due_at")
+                .eq("user_id", user_id)
+                .in_("quiz_id", quiz_ids[start:start + 200]),
+                ctx="load_review_items",
+            )
+        )
+    return out
+
+
+def load_due_rows(user_id: int, now: float, limit: int) -> List[Dict[str, Any]]:
+    """(user_id, due_at) индексі бойынша уақыты жеткен limit жол."""
+    return supabase_exec(
+        get_supabase().table("review_items")
+        .select("quiz_id,topic_id,repetitions,interval_days,ease,due_at")
+        .eq("user_id", user_id)
+        .lte("due_at", datetime.fromtimestamp(now, timezone.utc).isoformat())
+        .order("due_at", desc=False)
+        .limit(limit),
+        ctx="load_due_review_items",
+    )
+
+
+review_queue = ReviewQueue()
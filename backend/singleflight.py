@@ -0,0 +1,121 @@
+# singleflight.py
+# Бір мезгілдегі бірдей оқу сұраныстарын біріктіру (request coalescing).
+#
+# Бір кілтпен (ctx + сұраныс параметрлері) қатар келген шақырулардың
+# біріншісі ғана Supabase-ке барады; қалғандары оның нәтижесін күтіп,
+# ортақ қолданады. Кэш емес: шақыру аяқталған соң кілт бірден босайды.
+#
+# Жазу сұраныстары (POST/PUT/PATCH/DELETE) біріктірілмейді —
+# CoalesceMiddleware оларға ContextVar арқылы өшіреді, себебі олардың
+# ішіндегі оқу (иелікті тексеру, баланс) жазудан бұрын басталған
+# "ескі" нәтижені алмауы керек.
+
+from __future__ import annotations
+
+import threading
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# Ағымдағы сұраныста оқуларды біріктіруге бола ма
+coalesce_reads: ContextVar[bool] = ContextVar("easy_coalesce_reads", default=True)
+
+READ_METHODS = frozenset({"GET", "HEAD"})
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "followers")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """Thread-safe: sync эндпоинттер threadpool-да қатар жүреді."""
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Any],
+        share: Optional[Callable[[Any], Any]] = None,
+    ) -> Tuple[Any, bool]:
+        """
+        (нәтиже, shared) — shared=True болса, нәтиже басқа шақырудан алынды.
+        share(result) — әр қатысушыға берілетін көшірме; бастаушы өзі
+        түпнұсқаны тек ешкім қосылмаған жағдайда ғана алады.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.followers += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return (share(call.result) if share else call.result), True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+                followers = call.followers  # енді ешкім қосыла алмайды
+            call.done.set()
+        if followers and share:
+            return share(call.result), False
+        return call.result, False
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+def query_key(query) -> Optional[Tuple[Any, ...]]:
+    """
+    Сұраныстың біріктіру кілті; тек оқу (GET) сұраныстары үшін, әйтпесе None.
+    postgrest builder-де .request (method, path, params, headers) бар;
+    басқа клиенттер coalesce_key() әдісін бере алады.
+    """
+    custom = getattr(query, "coalesce_key", None)
+    if callable(custom):
+        return custom()
+
+    req = getattr(query, "request", None)
+    if req is None:
+        return None
+    method = getattr(req.http_method, "value", req.http_method)
+    if str(method).upper() not in READ_METHODS:
+        return None
+    headers = tuple(sorted((k.lower(), v) for k, v in req.headers.items()))
+    return (str(method).upper(), str(req.path), str(req.params), headers)
+
+
+class CoalesceMiddleware:
+    """Таза ASGI middleware: жазу әдістерінде біріктіруді өшіреді."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("method", "GET") in READ_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        token = coalesce_reads.set(False)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            coalesce_reads.reset(token)
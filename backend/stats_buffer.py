@@ -0,0 +1,214 @@
+# stats_buffer.py
+# Жауап статистикасы мен тақырып әрекеттерін жазуды кейінге қалдыратын буфер
+# (write-behind).
+#
+# check_answer / practice жауап жолында дерекқорға жазбайды: сандар процесс
+# ішінде жинақталып, фондық ағын оларды интервал бойынша немесе буфер
+# толғанда бір RPC-пен жібереді. Инкремент атомарлы болуы үшін (бірнеше
+# worker бір жолды жаңартады) PostgREST upsert емес, SQL функциялары:
+#
+#   create table public.quiz_stats (
+#     quiz_id bigint primary key references public.quizzes(id) on delete cascade,
+#     topic_id bigint references public.topics(id) on delete cascade,
+#     user_id bigint references public.users(id) on delete cascade,
+#     correct_count integer not null default 0,
+#     wrong_count integer not null default 0,
+#     wrong_options jsonb not null default '{}',   -- {"нұсқа индексі": таңдалу саны}
+#     updated_at timestamptz not null default now()
+#   );
+#   create index on public.quiz_stats (topic_id);
+#
+#   create function public.apply_quiz_stats(rows jsonb) returns void as $$
+#     insert into public.quiz_stats
+#       (quiz_id, topic_id, user_id, correct_count, wrong_count, wrong_options)
+#     select (r->>'quiz_id')::bigint, (r->>'topic_id')::bigint, (r->>'user_id')::bigint,
+#            (r->>'correct')::int, (r->>'wrong')::int, coalesce(r->'wrong_options', '{}')
+#     from jsonb_array_elements(rows) r
+#     where exists (select 1 from public.quizzes q where q.id = (r->>'quiz_id')::bigint)
+#     on conflict (quiz_id) do update set
+#       correct_count = quiz_stats.correct_count + excluded.correct_count,
+#       wrong_count   = quiz_stats.wrong_count + excluded.wrong_count,
+#       wrong_options = (
+#         select coalesce(jsonb_object_agg(k, coalesce((quiz_stats.wrong_options->>k)::int, 0)
+#                                           + coalesce((excluded.wrong_options->>k)::int, 0)), '{}')
+#         from (select jsonb_object_keys(quiz_stats.wrong_options)
+#               union select jsonb_object_keys(excluded.wrong_options)) ks(k)
+#       ),
+#       updated_at    = now();
+#   $$ language sql;
+#
+#   create function public.increment_topic_attempts(rows jsonb) returns void as $$
+#     update public.topics t set attempt_count = t.attempt_count + (r->>'count')::int
+#     from jsonb_array_elements(rows) r
+#     where t.id = (r->>'topic_id')::bigint;
+#   $$ language sql;
+#
+# Процесс құласа, соңғы интервалдағы сандар жоғалады — бұл аналитика үшін
+# қабылданатын баға; қалыпты тоқтағанда close() қалғанын жібереді.
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from database import get_supabase
+from repository import supabase_exec
+
+FLUSH_INTERVAL_SECONDS = float(os.getenv("EASY_STATS_FLUSH_SECONDS", "10"))
+FLUSH_MAX_PENDING = int(os.getenv("EASY_STATS_FLUSH_MAX", "500"))
+# Дерекқор ұзақ қолжетімсіз болса, жадты шексіз толтырмау үшін
+MAX_PENDING = 50_000
+
+QuizKey = Tuple[int, int, int]  # (quiz_id, topic_id, user_id)
+
+
+class _Tally:
+    __slots__ = ("correct", "wrong", "choices")
+
+    def __init__(self) -> None:
+        self.correct = 0
+        self.wrong = 0
+        self.choices: Dict[str, int] = {}  # қате таңдалған нұсқа индексі → саны
+
+    def merge(self, other: "_Tally") -> None:
+        self.correct += other.correct
+        self.wrong += other.wrong
+        for k, n in other.choices.items():
+            self.choices[k] = self.choices.get(k, 0) + n
+
+
+class StatsBuffer:
+    def __init__(
+        self,
+        interval: float = FLUSH_INTERVAL_SECONDS,
+        max_pending: int = FLUSH_MAX_PENDING,
+    ):
+        self.interval = interval
+        self.max_pending = max_pending
+        self._quiz: Dict[QuizKey, _Tally] = {}
+        self._attempts: Dict[int, int] = {}  # topic_id → әрекет саны
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Осы ағынмен бірге жіберілетін басқа буферлер (мыс. review_queue.flush)
+        self.flush_hooks: List[Callable[[], object]] = []
+
+    # ---- жауап жолы: тек жад ----
+    def record_answer(
+        self,
+        user_id: int,
+        topic_id: int,
+        quiz_id: int,
+        correct: bool,
+        choice: Optional[int] = None,
+    ) -> None:
+        """choice — таңдалған нұсқаның options ішіндегі индексі (қате жауапта)."""
+        with self._lock:
+            tally = self._quiz.get((quiz_id, topic_id, user_id))
+            if tally is None:
+                if len(self._quiz) >= MAX_PENDING:
+                    return
+                tally = self._quiz[(quiz_id, topic_id, user_id)] = _Tally()
+            if correct:
+                tally.correct += 1
+            else:
+                tally.wrong += 1
+                if choice is not None:
+                    key = str(choice)
+                    tally.choices[key] = tally.choices.get(key, 0) + 1
+            full = len(self._quiz) >= self.max_pending
+        self._ensure_thread()
+        if full:
+            self._wake.set()
+
+    def record_attempt(self, topic_id: int) -> None:
+        with self._lock:
+            self._attempts[topic_id] = self._attempts.get(topic_id, 0) + 1
+        self._ensure_thread()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._quiz) + len(self._attempts)
+
+    # ---- фондық жіберу ----
+    def _ensure_thread(self) -> None:
+        if self._thread is not None or self._stop.is_set():
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="easy-stats-flush", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self._flush_all()
+
+    def _flush_all(self) -> None:
+        for fn in [self.flush, *self.flush_hooks]:
+            try:
+                fn()
+            except Exception as e:
+                print(f"[stats_buffer] flush failed ({getattr(fn, '__qualname__', fn)}): {e}")
+
+    def flush(self) -> int:
+        """Жинақталғанды жіберу; қате болса, сандар буферге қайтарылады."""
+        with self._lock:
+            quiz, self._quiz = self._quiz, {}
+            attempts, self._attempts = self._attempts, {}
+        total = len(quiz) + len(attempts)
+        if not total:
+            return 0
+
+        try:
+            if quiz:
+                rows = [
+                    {
+                        "quiz_id": q,
+                        "topic_id": t,
+                        "user_id": u,
+                        "correct": tally.correct,
+                        "wrong": tally.wrong,
+                        "wrong_options": tally.choices,
+                    }
+                    for (q, t, u), tally in quiz.items()
+                ]
+                supabase_exec(get_supabase().rpc("apply_quiz_stats", {"rows": rows}), ctx="flush_quiz_stats")
+                quiz = {}
+            if attempts:
+                rows = [{"topic_id": t, "count": n} for t, n in attempts.items()]
+                supabase_exec(
+                    get_supabase().rpc("increment_topic_attempts", {"rows": rows}),
+                    ctx="flush_topic_attempts",
+                )
+                attempts = {}
+        except BaseException:
+            self._merge_back(quiz, attempts)
+            raise
+        return total
+
+    def _merge_back(self, quiz: Dict[QuizKey, _Tally], attempts: Dict[int, int]) -> None:
+        with self._lock:
+            for key, old in quiz.items():
+                tally = self._quiz.get(key)
+                if tally is None:
+                    if len(self._quiz) >= MAX_PENDING:
+                        continue
+                    tally = self._quiz[key] = _Tally()
+                tally.merge(old)
+            for topic_id, n in attempts.items():
+                self._attempts[topic_id] = self._attempts.get(topic_id, 0) + n
+
+    def close(self) -> None:
+        """Қалыпты тоқтау: ағынды тоқтатып, қалғанын бір рет жіберу."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._flush_all()
+
+
+stats_buffer = StatsBuffer()
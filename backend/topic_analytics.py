@@ -0,0 +1,94 @@
+# topic_analytics.py
+# Тақырып бойынша сұрақтардың қиындығы (GET /api/topics/{id}/analytics).
+#
+# Шикі жауап оқиғалары сақталмайды және сканерленбейді: stats_buffer.py
+# әр сұраққа жинақталған қатарды (quiz_stats) жаңартып отырады, мұнда тек
+# сол дайын қатарлар + сұрақ мәтіндері оқылады — O(сұрақ саны), жауап
+# санына тәуелсіз. Нәтиже main.py-да қысқа TTL-мен кэштеледі.
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+from database import get_supabase
+from repository import supabase_exec
+
+PAGE_SIZE = 1000  # PostgREST max-rows әдепкі шегі
+
+
+def _load_paged(table: str, columns: str, topic_id: int, key: str, ctx: str) -> List[Dict[str, Any]]:
+    out: List[Dict[str, Any]] = []
+    last = 0
+    while True:
+        page = supabase_exec(
+            get_supabase().table(table)
+            .select(columns)
+            .eq("topic_id", topic_id)
+            .gt(key, last)
+            .order(key, desc=False)
+            .limit(PAGE_SIZE),
+            ctx=ctx,
+        )
+        out.extend(page)
+        if len(page) < PAGE_SIZE:
+            return out
+        last = page[-1][key]
+
+
+def _top_wrong(options: List[str], wrong_options: Dict[str, int]) -> Optional[Dict[str, Any]]:
+    best: Optional[Dict[str, Any]] = None
+    for key, count in (wrong_options or {}).items():
+        try:
+            idx = int(key)
+        except (TypeError, ValueError):
+            continue
+        if 0 <= idx < len(options) and (best is None or count > best["count"]):
+            best = {"index": idx, "option": options[idx], "count": count}
+    return best
+
+
+def build_topic_analytics(topic_id: int, min_attempts: int = 0) -> Dict[str, Any]:
+    """
+    Әр сұрақ: attempts, correct_rate, ең жиі таңдалған қате нұсқа.
+    Ең қиындары (correct_rate төмен) басында; жауабы жоқтар соңында.
+    """
+    quizzes = _load_paged(
+        "quizzes", "id,question,options", topic_id, "id", ctx="analytics_quizzes"
+    )
+    stats = _load_paged(
+        "quiz_stats",
+        "quiz_id,correct_count,wrong_count,wrong_options",
+        topic_id,
+        "quiz_id",
+        ctx="analytics_stats",
+    )
+    by_quiz = {s["quiz_id"]: s for s in stats}
+
+    items: List[Dict[str, Any]] = []
+    total_correct = total_attempts = 0
+    for q in quizzes:
+        s = by_quiz.get(q["id"]) or {}
+        correct = int(s.get("correct_count") or 0)
+        attempts = correct + int(s.get("wrong_count") or 0)
+        total_correct += correct
+        total_attempts += attempts
+        if attempts < min_attempts:
+            continue
+        items.append(
+            {
+                "quiz_id": q["id"],
+                "question": q.get("question") or "",
+                "attempts": attempts,
+                "correct_rate": round(correct / attempts, 4) if attempts else None,
+                "top_wrong": _top_wrong(q.get("options") or [], s.get("wrong_options") or {}),
+            }
+        )
+
+    items.sort(key=lambda it: (it["correct_rate"] is None, it["correct_rate"] or 0.0, -it["attempts"]))
+    return {
+        "topic_id": topic_id,
+        "quiz_count": len(quizzes),
+        "attempts": total_attempts,
+        "correct_rate": round(total_correct / total_attempts, 4) if total_attempts else None,
+        "quizzes": items,
+    }
@@ -0,0 +1,58 @@
+# upload_limit.py
+# Жүктелетін файл көлемін ағын (stream) кезінде шектеу.
+#
+# Content-Length шектен асса — app шақырылмай-ақ 413 қайтарылады.
+# Content-Length жоқ (chunked) болса, receive() арқылы келген байттар
+# саналады да, шектен асқан сәтте HTTPException(413) лақтырылады —
+# multipart парсері файлды соңына дейін оқып үлгермейді.
+
+from __future__ import annotations
+
+from typing import Dict
+
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+
+from errors import ERROR_MESSAGES
+
+
+class BodySizeLimitMiddleware:
+    """limits: {"/api/parse-docx": max_bytes, ...} — жол дәл сәйкес келуі керек."""
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope.get("path", "")) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope.get("headers", []):
+            if name == b"content-length":
+                try:
+                    declared = int(value)
+                except ValueError:
+                    declared = 0
+                if declared > limit:
+                    response = JSONResponse(
+                        status_code=413,
+                        content={"detail": ERROR_MESSAGES["file_too_large"]},
+                    )
+                    await response(scope, receive, send)
+                    return
+                break
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise HTTPException(status_code=413, detail=ERROR_MESSAGES["file_too_large"])
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -21,6 +21,41 @@ type QuizQuestion = {
   correctAnswer?: number;
 };
 
+// /parse-docx алдын ала қарауындағы (және bulk save-ке жіберілетін) бір сұрақ
+type PreviewItem = {
+  question: string;
+  options: string[];
+  answer_index: number | null;
+};
+type PreviewEdit = Partial<PreviewItem> & { index: number; removed?: boolean };
+
+/** Алдын ала қараумен салыстырып, өзгерген өрістерді ғана қайтарады; жоқ сұрақ — removed. */
+function diffPreview(
+  original: PreviewItem[],
+  current: [number, PreviewItem][]
+): PreviewEdit[] {
+  const byIndex = new Map(current);
+  const edits: PreviewEdit[] = [];
+  original.forEach((orig, index) => {
+    const cur = byIndex.get(index);
+    if (!cur) {
+      edits.push({ index, removed: true });
+      return;
+    }
+    const edit: PreviewEdit = { index };
+    if (cur.question !== orig.question) edit.question = cur.question;
+    if (
+      cur.options.length !== orig.options.length ||
+      cur.options.some((o, i) => o !== orig.options[i])
+    ) {
+      edit.options = cur.options;
+    }
+    if (cur.answer_index !== orig.answer_index) edit.answer_index = cur.answer_index;
+    if (Object.keys(edit).length > 1) edits.push(edit);
+  });
+  return edits;
+}
+
 type ToastKind = "success" | "error" | "info" | "warning";
 type Toast = { id: number; text: string; kind: ToastKind };
 
@@ -365,6 +400,9 @@ export default function AdminPanel() {
   // Step 3B: File Mode
   const [mode, setMode] = useState<"manual" | "file">("file");
   const [parsedQuestions, setParsedQuestions] = useState<QuizQuestion[]>([]);
+  // Сервердегі алдын ала қарау: bulk save тек өзгерістерді жібереді
+  const [previewId, setPreviewId] = useState<string | null>(null);
+  const [previewItems, setPreviewItems] = useState<PreviewItem[]>([]);
   const [parseLoading, setParseLoading] = useState(false);
   const [parseError, setParseError] = useState<string | null>(null);
   const [savingAll, setSavingAll] = useState(false);
@@ -731,6 +769,7 @@ export default function AdminPanel() {
     setParseError(null);
     setParseLoading(true);
     setParsedQuestions([]);
+    setPreviewId(null);
     setSaveProgress(0);
 
     try {
@@ -750,6 +789,20 @@ export default function AdminPanel() {
       }
 
       setParsedQuestions(normalized);
+      setPreviewId(
+        typeof res.data?.preview_id === "string" ? res.data.preview_id : null
+      );
+      setPreviewItems(
+        (Array.isArray(res.data?.questions) ? res.data.questions : []).map(
+          (q: any): PreviewItem => ({
+            question: String(q.text ?? q.question ?? ""),
+            options: (Array.isArray(q.options) ? q.options : []).map((o: any) =>
+              typeof o === "string" ? o : typeof o?.text === "string" ? o.text : String(o ?? "")
+            ),
+            answer_index: typeof q.answer_index === "number" ? q.answer_index : null,
+          })
+        )
+      );
 
       if (typeof res.data?.credit_balance === "number") {
         setCreditBalance(res.data.credit_balance);
@@ -830,10 +883,24 @@ export default function AdminPanel() {
         };
       });
 
-      const res = await api.post(
-        `/topics/${selectedTopicId}/quizzes/bulk`,
-        { quizzes }
-      );
+      const url = `/topics/${selectedTopicId}/quizzes/bulk`;
+      let res;
+      if (previewId) {
+        // Сұрақтар серверде сақтаулы — тек өзгерген өрістерді жібереміз
+        // (normalizeParsedToLocal id-лері 1-ден бастап ретімен беріледі)
+        const edits = diffPreview(
+          previewItems,
+          parsedQuestions.map((q, i) => [q.id - 1, quizzes[i]] as [number, PreviewItem])
+        );
+        try {
+          res = await api.post(url, { preview_id: previewId, edits });
+        } catch (e: any) {
+          if (e?.response?.status !== 404) throw e;
+          res = await api.post(url, { quizzes }); // мерзімі өтсе — толық тізім
+        }
+      } else {
+        res = await api.post(url, { quizzes });
+      }
 
       const savedCount = Array.isArray(res.data?.ids)
         ? res.data.ids.length
@@ -846,6 +913,7 @@ export default function AdminPanel() {
       );
 
       setParsedQuestions([]);
+      setPreviewId(null);
       setParseError(null);
       setTimeout(() => setSaveProgress(0), 400);
 
@@ -867,6 +935,7 @@ export default function AdminPanel() {
 
   function clearParsed() {
     setParsedQuestions([]);
+    setPreviewId(null);
     setParseError(null);
     setSaveProgress(0);
   }